@@ -2,7 +2,8 @@
 A lightweight framework for writing CLI tools in python.
 """
 
-from .context import Context  # noqa: F401
+from .cache import CachePolicy  # noqa: F401
+from .context import Context, get_current_context  # noqa: F401
 from .exceptions import CleaException  # noqa: F401
 from .params import (  # noqa: F401
     Boolean,
@@ -11,10 +12,12 @@ from .params import (  # noqa: F401
     ContextParameter,
     Directory,
     File,
+    Files,
     Float,
     Integer,
     String,
     StringList,
+    Variadic,
     VersionParameter,
 )
 from .runner import run  # noqa: F401
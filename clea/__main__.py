@@ -0,0 +1,136 @@
+"""Command line tools for clea applications."""
+
+import json
+import shlex
+import sys
+import typing as t
+from pathlib import Path
+
+from typing_extensions import Annotated
+
+from clea.bench import bench as bench_cli
+from clea.bench import render_report
+from clea.compiler import compile_cli
+from clea.distributed import distribute as distribute_tasks
+from clea.distributed import DEFAULT_RETRIES, map_items, parse_address, serve
+from clea.exceptions import CleaException
+from clea.helpers import import_object
+from clea.params import (
+    Boolean,
+    File,
+    Float,
+    Integer,
+    String,
+    StringList,
+    Variadic,
+)
+from clea.runner import run
+from clea.wrappers import group
+
+
+@group(name="clea")
+def main() -> None:
+    """Tools for clea applications."""
+
+
+@main.command(name="compile")
+def compile_(
+    target: Annotated[str, String(help="Import path of the CLI, eg. pkg.cli:main")],
+    output: Annotated[
+        Path, File("-o", "--output", help="Output file, defaults to stdout.")
+    ],
+) -> None:
+    """Compile a CLI into a module with generated parsers."""
+    source = compile_cli(cli=import_object(target), target=target)
+    if output is None:
+        sys.stdout.write(source)
+        return
+    output.write_text(source, encoding="utf-8")
+
+
+@main.command
+def bench(
+    target: Annotated[str, String(help="Import path of the CLI, eg. pkg.cli:main")],
+    argv: Annotated[
+        t.Iterable[str],
+        Variadic(String(), help="Arguments for the CLI, after `--` for options."),
+    ],
+    runs: Annotated[int, Integer("-n", "--runs", default=10, help="Number of runs.")],
+    as_json: Annotated[bool, Boolean(long_flag="--json", help="Print JSON report.")],
+) -> None:
+    """Benchmark the startup of a CLI in fresh interpreters."""
+    try:
+        report = bench_cli(target=target, argv=list(argv), runs=runs)
+    except RuntimeError as e:
+        raise CleaException(message=str(e), exit_code=1) from e
+    if as_json:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+        return
+    sys.stdout.write(render_report(report=report))
+
+
+@main.command
+def worker(
+    target: Annotated[str, String(help="Import path of the CLI, eg. pkg.cli:main")],
+    listen: Annotated[
+        str,
+        String(
+            "-l",
+            "--listen",
+            default="127.0.0.1:0",
+            help="Address to listen on, port 0 picks a free port.",
+        ),
+    ],
+) -> None:
+    """Run invocations received from a coordinator."""
+    serve(cli=import_object(target), address=parse_address(listen))
+
+
+@main.command
+def distribute(
+    workers: Annotated[
+        t.List[str], StringList("-w", "--worker", help="Worker address, host:port.")
+    ],
+    args: Annotated[
+        str,
+        String(
+            "-a",
+            "--args",
+            default="",
+            help="Arguments every input line is appended to.",
+        ),
+    ],
+    retries: Annotated[
+        int,
+        Integer(
+            long_flag="--retries",
+            default=DEFAULT_RETRIES,
+            help="Retries for tasks on lost workers.",
+        ),
+    ],
+    timeout: Annotated[
+        float, Float(long_flag="--task-timeout", help="Seconds to wait for a task.")
+    ],
+) -> None:
+    """Run the argv read from every line of stdin on remote workers."""
+    lines = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+    if args == "":
+        tasks = [shlex.split(line) for line in lines]
+    else:
+        tasks = map_items(argv=shlex.split(args), items=lines)
+    failed = 0
+    for result in distribute_tasks(
+        workers=workers, tasks=tasks, retries=retries, timeout=timeout
+    ):
+        failed += int(result.exit_code != 0)
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+        sys.stderr.write(result.stderr)
+    if failed > 0:
+        raise CleaException(
+            message=f"{failed} of {len(tasks)} tasks failed", exit_code=1
+        )
+
+
+if __name__ == "__main__":  # pragma: nocover
+    run(cli=main)
@@ -0,0 +1,306 @@
+"""
+Startup benchmark.
+
+The target CLI is invoked in fresh interpreters with `-X importtime`. Every
+run reports the interpreter startup, the import of clea and of the target
+(with the time spent wrapping commands), building the parsers, parsing and
+executing, and the import times are attributed to the modules defining the
+commands.
+"""
+
+import json
+import os
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+import typing as t
+from functools import wraps
+
+import clea.memory as memory
+from clea.compiler import walk
+from clea.exceptions import CleaException
+from clea.helpers import import_object
+from clea.wrappers import Command, Group
+
+
+PHASES = ("startup", "clea", "import", "wrap", "build", "parse", "execute", "total")
+PERCENTILES = (50, 90, 99)
+HEAVY_IMPORT_SHARE = 0.2
+TOP_IMPORTS = 3
+
+PROBE = "import time; _start = time.time(); from clea.bench import probe; probe(_start)"
+
+Stats = t.Dict[str, float]
+ImportNode = t.Tuple[str, int, int, t.List[t.Any]]
+
+
+class _PhaseTimer:  # pylint: disable=too-few-public-methods
+    """Collects the time between the phase marks of an invocation."""
+
+    def __init__(self) -> None:
+        """Initialize object."""
+        self.phases: t.Dict[str, float] = {"build": 0.0, "parse": 0.0, "execute": 0.0}
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """Close the current phase."""
+        now = time.perf_counter()
+        kind = phase.split(" ", 1)[0]
+        kind = kind if kind in ("build", "parse") else "execute"
+        self.phases[kind] += now - self._last
+        self._last = now
+
+
+def _timed_wrap(method: t.Any, spent: t.List[float]) -> t.Any:
+    """Accumulate the time spent in a `_wrap` classmethod."""
+    f = method.__func__
+
+    @wraps(f)
+    def _wrap(cls: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        start = time.perf_counter()
+        try:
+            return f(cls, *args, **kwargs)
+        finally:
+            spent[0] += time.perf_counter() - start
+
+    return classmethod(_wrap)
+
+
+def probe(start: float) -> None:
+    """
+    Run a single benchmark invocation, called in the child interpreter.
+
+    Reads the target, the result path and the arguments from `sys.argv`.
+    Errors of the CLI are recorded in the result, any other exception
+    propagates and fails the run.
+
+    :param start: Wall clock time at which the child started running code.
+    :type start: float
+    """
+    clea_time = time.time() - start
+    target, result_path, *argv = sys.argv[1:]
+    spent = [0.0]
+    setattr(Command, "_wrap", _timed_wrap(Command.__dict__["_wrap"], spent))
+    setattr(Group, "_wrap", _timed_wrap(Group.__dict__["_wrap"], spent))
+
+    import_start = time.perf_counter()
+    # `importlib.import_module` bypasses the `-X importtime` instrumentation
+    __import__(target.partition(":")[0])
+    cli = import_object(target)
+    import_time = time.perf_counter() - import_start
+
+    timer = _PhaseTimer()
+    memory.add_listener(timer.mark)
+    try:
+        exit_code, error = cli.invoke(argv=argv), ""
+    except CleaException as e:
+        exit_code, error = e.exit_code, e.message
+    finally:
+        memory.remove_listener(timer.mark)
+        timer.mark("execute")
+
+    modules: t.Dict[str, t.List[str]] = {}
+    for path, node in walk(cli=cli):
+        module = node._f.__module__  # pylint: disable=protected-access
+        modules.setdefault(module, []).append(" ".join((cli.name, *path)))
+
+    with open(result_path, "w", encoding="utf-8") as fp:
+        json.dump(
+            {
+                "start": start,
+                "exit_code": exit_code,
+                "error": error,
+                "clea": clea_time,
+                "import": import_time,
+                "wrap": spent[0],
+                **timer.phases,
+                "modules": modules,
+            },
+            fp,
+        )
+
+
+def parse_importtime(output: str) -> t.Dict[str, ImportNode]:
+    """
+    Parse `-X importtime` output.
+
+    :param output: Stderr of the interpreter.
+    :type output: str
+    :return: Mapping from module name to its self time, cumulative time in
+        microseconds and its direct imports.
+    :rtype: t.Dict[str, ImportNode]
+    """
+    modules: t.Dict[str, ImportNode] = {}
+    pending: t.Dict[int, t.List[ImportNode]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, field = line.split("|", 2)
+        field = field[1:]
+        name = field.lstrip()
+        depth = (len(field) - len(name)) // 2
+        node = (
+            name,
+            int(self_us.split(":")[1]),
+            int(cumulative_us),
+            pending.pop(depth + 1, []),
+        )
+        pending.setdefault(depth, []).append(node)
+        modules[name] = node
+    return modules
+
+
+def percentiles(values: t.List[float]) -> Stats:
+    """
+    Summary statistics using the nearest rank percentiles.
+
+    :param values: Samples.
+    :type values: t.List[float]
+    :return: Minimum, percentiles, maximum and mean.
+    :rtype: Stats
+    """
+    ordered = sorted(values)
+    stats = {"min": ordered[0]}
+    for percentile in PERCENTILES:
+        rank = max(int(-(-percentile * len(ordered) // 100)), 1)
+        stats[f"p{percentile}"] = ordered[rank - 1]
+    stats["max"] = ordered[-1]
+    stats["mean"] = sum(ordered) / len(ordered)
+    return stats
+
+
+def _run_once(target: str, argv: t.List[str]) -> t.Tuple[t.Dict[str, t.Any], str]:
+    """Run the target in a fresh interpreter."""
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        start = time.time()
+        process = subprocess.run(  # nosec
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                PROBE,
+                target,
+                result_path,
+                *argv,
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=False,
+            text=True,
+        )
+        total = time.time() - start
+        with open(result_path, encoding="utf-8") as fp:
+            content = fp.read()
+        if content == "":
+            raise RuntimeError(f"Benchmark run failed\n{process.stderr}")
+        result = json.loads(content)
+    finally:
+        os.unlink(result_path)
+    if result["exit_code"] != 0:
+        raise RuntimeError(
+            f"Benchmark run exited with code {result['exit_code']}\n{result['error']}"
+        )
+    result["startup"] = result.pop("start") - start
+    result["total"] = total
+    return result, process.stderr
+
+
+def bench(target: str, argv: t.List[str], runs: int = 10) -> t.Dict[str, t.Any]:
+    """
+    Benchmark the startup of a CLI.
+
+    :param target: Import path of the CLI, eg. `pkg.cli:main`.
+    :type target: str
+    :param argv: Arguments for the CLI.
+    :type argv: t.List[str]
+    :param runs: Number of fresh interpreters to run the CLI in.
+    :type runs: int
+    :return: Report with the phase statistics in milliseconds and the import
+        time of the modules defining the commands.
+    :rtype: t.Dict[str, t.Any]
+    """
+    samples: t.Dict[str, t.List[float]] = {phase: [] for phase in PHASES}
+    imports: t.Dict[str, t.List[float]] = {}
+    top_imports: t.Dict[str, t.Dict[str, t.List[float]]] = {}
+    commands: t.Dict[str, t.List[str]] = {}
+    for _ in range(runs):
+        result, output = _run_once(target=target, argv=argv)
+        for phase in PHASES:
+            samples[phase].append(result[phase] * 1000)
+        tree = parse_importtime(output=output)
+        commands = result["modules"]
+        for module in commands:
+            if module not in tree:
+                continue
+            name, _, cumulative, children = tree[module]
+            imports.setdefault(name, []).append(cumulative / 1000)
+            for child, _, child_cumulative, _ in children:
+                top_imports.setdefault(name, {}).setdefault(child, []).append(
+                    child_cumulative / 1000
+                )
+
+    phases = {phase: percentiles(values) for phase, values in samples.items()}
+    root = next(iter(commands), None)
+    modules = {}
+    import_p50 = phases["import"]["p50"]
+    for module, names in commands.items():
+        stats = percentiles(imports[module]) if module in imports else None
+        share = stats["p50"] / import_p50 if stats and import_p50 > 0 else 0.0
+        children = sorted(
+            (
+                (child, percentiles(values)["p50"])
+                for child, values in top_imports.get(module, {}).items()
+            ),
+            key=lambda item: -item[1],
+        )
+        modules[module] = {
+            "commands": names,
+            "import": stats,
+            "share": share,
+            "heavy": module != root and share >= HEAVY_IMPORT_SHARE,
+            "top_imports": children[:TOP_IMPORTS],
+        }
+    return {
+        "target": target,
+        "argv": argv,
+        "runs": runs,
+        "phases": phases,
+        "modules": modules,
+    }
+
+
+def render_report(report: t.Dict[str, t.Any]) -> str:
+    """
+    Render a benchmark report as text.
+
+    :param report: Report returned by `bench`.
+    :type report: t.Dict[str, t.Any]
+    :return: Rendered report.
+    :rtype: str
+    """
+    columns = ("min", *(f"p{p}" for p in PERCENTILES), "max")
+    lines = [
+        f"Benchmark {report['target']} {' '.join(report['argv'])}".rstrip()
+        + f" ({report['runs']} runs, times in ms)",
+        "",
+        f"{'Phase':<12}" + "".join(f"{column:>10}" for column in columns),
+    ]
+    for phase, stats in report["phases"].items():
+        lines.append(
+            f"{phase:<12}" + "".join(f"{stats[column]:>10.2f}" for column in columns)
+        )
+    lines.extend(["", f"{'Module':<40}{'Import p50':>12}{'Share':>8}"])
+    for module, info in report["modules"].items():
+        p50 = info["import"]["p50"] if info["import"] else 0.0
+        lines.append(f"{module:<40}{p50:>12.2f}{info['share']:>8.0%}")
+        if info["heavy"]:
+            heaviest = ", ".join(
+                f"{name} ({ms:.2f})" for name, ms in info["top_imports"]
+            )
+            lines.append(f"    ! top-level imports dominate startup: {heaviest}")
+    return "\n".join(lines) + "\n"
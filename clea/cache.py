@@ -0,0 +1,235 @@
+"""
+Disk backed memoization of command results.
+
+Entries are keyed on the parsed arguments of a command, stored as single
+files in a cache directory and evicted in least recently used order once
+the directory grows beyond the configured size.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+from clea.params import get_paths
+from clea.parser import Kwargs
+
+
+ENTRY_SUFFIX = ".entry"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def get_cache_dir() -> Path:
+    """Returns the user cache directory for clea."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base is None:
+        return Path.home() / ".cache" / "clea"
+    return Path(base) / "clea"
+
+
+class CachePolicy:  # pylint: disable=too-few-public-methods
+    """Cache policy for a command."""
+
+    def __init__(
+        self,
+        ttl: t.Optional[float] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        env: t.Optional[t.List[str]] = None,
+        directory: t.Optional[Path] = None,
+    ) -> None:
+        """Initialize object.
+
+        :param ttl: Time in seconds for which an entry stays valid, `None` means forever.
+        :type ttl: t.Optional[float]
+        :param max_bytes: Maximum size of the cache directory.
+        :type max_bytes: int
+        :param env: Environment variables which become part of the cache key.
+        :type env: t.Optional[t.List[str]]
+        :param directory: Cache directory, defaults to `$XDG_CACHE_HOME/clea`.
+        :type directory: t.Optional[Path]
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.env = env or []
+        self.directory = directory
+
+
+class _Tee(io.TextIOBase):
+    """Write to a stream while keeping a copy."""
+
+    def __init__(self, stream: t.TextIO) -> None:
+        """Initialize object."""
+        super().__init__()
+        self.stream = stream
+        self.copy = io.StringIO()
+
+    def write(self, s: str) -> int:  # type: ignore
+        """Write string."""
+        self.copy.write(s)
+        return self.stream.write(s)
+
+    def flush(self) -> None:
+        """Flush the underlying stream."""
+        self.stream.flush()
+
+
+class Cache:
+    """Command result cache."""
+
+    def __init__(self, policy: CachePolicy) -> None:
+        """Initialize object."""
+        self.policy = policy
+        self.directory = policy.directory or get_cache_dir()
+
+    def key(self, name: str, kwargs: Kwargs, options: t.Optional[Kwargs] = None) -> str:
+        """
+        Create the cache key for an invocation.
+
+        Path arguments contribute their size and modification time so
+        changes to input files invalidate the entry.
+
+        :param name: Qualified name of the command function.
+        :type name: str
+        :param kwargs: Parsed keyword arguments.
+        :type kwargs: Kwargs
+        :param options: Global options which change the output, like `output`.
+        :type options: t.Optional[Kwargs]
+        :return: Hex digest of the key.
+        :rtype: str
+        """
+        parts: t.List[t.Any] = [name]
+        for option, value in sorted((options or {}).items()):
+            parts.append(["--" + option, repr(value)])
+        for kwarg, value in sorted(kwargs.items()):
+            if kwarg == "context":
+                continue
+            parts.append([kwarg, repr(value)])
+            for path in get_paths(value=value):
+                try:
+                    stat = path.stat()
+                    parts.append([stat.st_size, stat.st_mtime_ns])
+                except OSError:
+                    parts.append(None)
+        for env in self.policy.env:
+            parts.append([env, os.environ.get(env)])
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """Entry path."""
+        return self.directory / (key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> t.Optional[t.Tuple[int, str]]:
+        """
+        Read an entry.
+
+        :param key: Cache key.
+        :type key: str
+        :return: Exit code and stdout or `None` on a miss.
+        :rtype: t.Optional[t.Tuple[int, str]]
+        """
+        path = self._path(key=key)
+        try:
+            with path.open("rb") as fp:
+                header = json.loads(fp.readline())
+                stdout = fp.read().decode()
+        except (OSError, ValueError):
+            return None
+        if self.policy.ttl is not None and (
+            time.time() - header["created"] > self.policy.ttl
+        ):
+            with contextlib.suppress(OSError):
+                path.unlink()
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return header["exit_code"], stdout
+
+    def put(self, key: str, exit_code: int, stdout: str) -> None:
+        """
+        Store an entry.
+
+        The entry is written to a temporary file and moved into place, so
+        concurrent writers never leave a partially written entry behind.
+
+        :param key: Cache key.
+        :type key: str
+        :param exit_code: Exit code of the command.
+        :type exit_code: int
+        :param stdout: Captured stdout.
+        :type stdout: str
+        """
+        import tempfile  # pylint: disable=import-outside-toplevel
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header = json.dumps({"exit_code": exit_code, "created": time.time()})
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(header.encode() + b"\n")
+                fp.write(stdout.encode())
+            os.replace(tmp, self._path(key=key))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits `max_bytes`."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*" + ENTRY_SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.policy.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                path.unlink()
+            total -= size
+
+    def run(
+        self,
+        name: str,
+        kwargs: Kwargs,
+        call: t.Callable[[], int],
+        options: t.Optional[Kwargs] = None,
+    ) -> int:
+        """
+        Replay a cached result or run and store it.
+
+        Only successful invocations are stored.
+
+        :param name: Qualified name of the command function.
+        :type name: str
+        :param kwargs: Parsed keyword arguments.
+        :type kwargs: Kwargs
+        :param call: Callable which runs the command and returns the exit code.
+        :type call: t.Callable[[], int]
+        :param options: Global options which change the output, like `output`.
+        :type options: t.Optional[Kwargs]
+        :return: Exit code.
+        :rtype: int
+        """
+        key = self.key(name=name, kwargs=kwargs, options=options)
+        entry = self.get(key=key)
+        if entry is not None:
+            exit_code, stdout = entry
+            sys.stdout.write(stdout)
+            return exit_code
+        tee = _Tee(stream=sys.stdout)
+        with contextlib.redirect_stdout(new_target=tee):  # type: ignore
+            exit_code = call()
+        if exit_code == 0:
+            self.put(key=key, exit_code=exit_code, stdout=tee.copy.getvalue())
+        return exit_code
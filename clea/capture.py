@@ -0,0 +1,266 @@
+"""
+Spooled output capture.
+
+Isolated runs capture stdout and stderr in memory until the output grows
+beyond a threshold, the captured bytes are moved to a temporary file then and
+the rest of the output is written to the file. The captured output is read
+lazily, lines can be iterated or taken from the end without loading all of
+the output into memory.
+"""
+
+import codecs
+import io
+import os
+import typing as t
+
+
+ENV_VAR = "CLEA_SPOOL_SIZE"
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+ENCODING = "utf-8"
+
+
+def get_spool_size(size: t.Optional[int]) -> int:
+    """Resolve the spool size from the argument or the environment."""
+    if size is not None:
+        return size
+    return int(os.environ.get(ENV_VAR) or DEFAULT_SPOOL_SIZE)
+
+
+def _lines(text: str) -> t.List[str]:
+    """Split text into lines keeping the line endings."""
+    *lines, last = text.split("\n")
+    return [line + "\n" for line in lines] + ([last] if last else [])
+
+
+class Spool(io.BufferedIOBase):
+    """Binary stream kept in memory up to a size and in a temporary file beyond."""
+
+    def __init__(self, max_size: int = DEFAULT_SPOOL_SIZE) -> None:
+        """Initialize object.
+
+        :param max_size: Number of bytes to hold in memory.
+        :type max_size: int
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.size = 0
+        self._storage: t.BinaryIO = io.BytesIO()
+        self._spilled = False
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the data was moved to a temporary file."""
+        return self._spilled
+
+    def writable(self) -> bool:
+        """Spools are write only."""
+        return True
+
+    def write(self, data: t.Any) -> int:
+        """
+        Write bytes.
+
+        :param data: Bytes like object.
+        :type data: t.Any
+        :return: Number of bytes written.
+        :rtype: int
+        """
+        size = len(data)
+        if not self._spilled and self.size + size > self.max_size:
+            import tempfile  # pylint: disable=import-outside-toplevel
+
+            storage = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+            storage.write(t.cast(io.BytesIO, self._storage).getbuffer())
+            self._storage = t.cast(t.BinaryIO, storage)
+            self._spilled = True
+        self._storage.write(data)
+        self.size += size
+        return size
+
+    def close(self) -> None:
+        """Close the stream, the data stays readable through `output`."""
+        if not self.closed:
+            self._storage.flush()
+        super().close()
+
+    def output(self, encoding: str = ENCODING) -> "CapturedOutput":
+        """
+        Create a reader for the written data.
+
+        :param encoding: Encoding of the data.
+        :type encoding: str
+        :return: Lazily read output.
+        :rtype: CapturedOutput
+        """
+        self._storage.flush()
+        return CapturedOutput(storage=self._storage, size=self.size, encoding=encoding)
+
+
+class CapturedOutput:
+    """
+    Captured output, read lazily.
+
+    Compares equal to the text of the output and supports `in`, `len` and
+    indexing. The whole output is only read into memory by `read`, which is
+    also needed for the `str` methods and for `json.loads`. Use `tail` or
+    iterate over the lines to work with large outputs.
+    """
+
+    def __init__(
+        self,
+        storage: t.BinaryIO,
+        size: int,
+        encoding: str = ENCODING,
+    ) -> None:
+        """Initialize object.
+
+        :param storage: Seekable binary stream holding the output.
+        :type storage: t.BinaryIO
+        :param size: Size of the output in bytes.
+        :type size: int
+        :param encoding: Encoding of the output.
+        :type encoding: str
+        """
+        self._storage = storage
+        self._size = size
+        self._text: t.Optional[str] = None
+        self.encoding = encoding
+
+    @classmethod
+    def from_text(cls, text: str) -> "CapturedOutput":
+        """Create captured output holding the text."""
+        data = text.encode(ENCODING)
+        output = cls(storage=io.BytesIO(data), size=len(data))
+        output._text = text
+        return output
+
+    @property
+    def size(self) -> int:
+        """Size of the output in bytes."""
+        return self._size
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the output is held in memory."""
+        return isinstance(self._storage, io.BytesIO)
+
+    def _chunks(self, start: int = 0) -> t.Iterator[bytes]:
+        """Read the bytes from the start offset in chunks."""
+        position = start
+        while position < self._size:
+            self._storage.seek(position)
+            chunk = self._storage.read(min(CHUNK_SIZE, self._size - position))
+            if len(chunk) == 0:
+                return  # pragma: nocover
+            position += len(chunk)
+            yield chunk
+
+    def read(self) -> str:
+        """Read the whole output."""
+        if self._text is not None:
+            return self._text
+        if self.in_memory:
+            self._text = (
+                t.cast(io.BytesIO, self._storage).getvalue().decode(self.encoding)
+            )
+            return self._text
+        return b"".join(self._chunks()).decode(self.encoding)
+
+    def __iter__(self) -> t.Iterator[str]:
+        """Iterate over the lines, keeping the line endings."""
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        pending = ""
+        for chunk in self._chunks():
+            *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                yield line + "\n"
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+
+    def tail(self, n: int = 10) -> t.List[str]:
+        """
+        Read the last lines.
+
+        :param n: Number of lines.
+        :type n: int
+        :return: Up to `n` lines, keeping the line endings.
+        :rtype: t.List[str]
+        """
+        if n <= 0:
+            return []
+        position = self._size
+        data = b""
+        while position > 0 and data.count(b"\n", 0, max(len(data) - 1, 0)) < n:
+            start = max(position - CHUNK_SIZE, 0)
+            self._storage.seek(start)
+            data = self._storage.read(position - start) + data
+            position = start
+        if position > 0:
+            # Drop the partial first line, the cut may split a character
+            data = data[data.index(b"\n") + 1 :]
+        return _lines(data.decode(self.encoding))[-n:]
+
+    def close(self) -> None:
+        """Release the storage."""
+        self._storage.close()
+
+    def __contains__(self, text: str) -> bool:
+        """Search the output, chunk by chunk if it is not held in memory."""
+        if self.in_memory:
+            return text in self.read()
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        overlap = ""
+        for chunk in self._chunks():
+            window = overlap + decoder.decode(chunk)
+            if text in window:
+                return True
+            overlap = window[-(len(text) - 1) :] if len(text) > 1 else ""
+        return False
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the text of the output."""
+        if isinstance(other, CapturedOutput):
+            other = other.read()
+        if not isinstance(other, str):
+            return NotImplemented
+        return self.read() == other
+
+    def __hash__(self) -> int:
+        """Hash of the text."""
+        return hash(self.read())
+
+    def __bool__(self) -> bool:
+        """Whether anything was written."""
+        return self._size > 0
+
+    def __add__(self, other: str) -> str:
+        """Concatenate with text."""
+        return self.read() + other
+
+    def __radd__(self, other: str) -> str:
+        """Concatenate with text."""
+        return other + self.read()
+
+    def __len__(self) -> int:
+        """Number of characters, counted chunk by chunk if not held in memory."""
+        if self._text is not None or self.in_memory:
+            return len(self.read())
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        length = sum(len(decoder.decode(chunk)) for chunk in self._chunks())
+        return length + len(decoder.decode(b"", final=True))
+
+    def __getitem__(self, key: t.Union[int, slice]) -> str:
+        """Characters of the text, reading the whole output."""
+        return self.read()[key]
+
+    def __str__(self) -> str:
+        """Text of the output."""
+        return self.read()
+
+    def __repr__(self) -> str:
+        """Representation, with the text for small outputs."""
+        if self.in_memory:
+            return repr(self.read())
+        return f"<CapturedOutput {self._size} bytes>"
@@ -0,0 +1,569 @@
+"""
+Ahead-of-time compilation of command trees.
+
+This module walks a `Group`/`Command` tree and generates a plain python module
+with a specialized parse function for every node. The generated functions
+match flags using straight-line comparisons, inline the conversions for the
+primitive parameter types and come with pre-rendered help strings, so running
+a compiled tree does not need any signature or annotation introspection. The
+parameter definitions are written out as literals, only parameters holding
+values which can't be written as literals are read from the annotations.
+"""
+
+import copy
+import math
+import sys
+import typing as t
+from enum import Enum
+from pathlib import PurePath
+
+import clea.params as p
+from clea.context import Context
+from clea.options import GLOBAL_OPTIONS
+from clea.parser import Argv, BaseParser, Kwargs
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    from clea.wrappers import BaseWrapper
+
+
+Path = t.Tuple[str, ...]
+ParseFunction = t.Callable[
+    [Argv, t.Dict[str, t.Any], t.Optional[Context]], t.Tuple[t.Tuple, Kwargs]
+]
+
+INLINE_TYPES = {p.String: "str", p.Integer: "int", p.Float: "float"}
+
+# Derived from the class or built on first use, left out of the compiled state
+TRANSIENT_ATTRIBUTES = ("_type",)
+RESET_ATTRIBUTES = {"_index": None}
+
+
+class _NotLiteral(Exception):
+    """Value can't be written as a literal."""
+
+
+class CompiledParser(BaseParser):
+    """Parser backed by a generated parse function."""
+
+    def __init__(
+        self,
+        parse: ParseFunction,
+        help_text: str,
+        kwargs: t.Optional[t.Dict[str, p.Parameter]] = None,
+    ) -> None:
+        """Initialize object.
+
+        :param parse: Generated parse function.
+        :type parse: ParseFunction
+        :param help_text: Pre-rendered help string.
+        :type help_text: str
+        :param kwargs: Flag to parameter mapping, used for completion.
+        :type kwargs: t.Optional[t.Dict[str, p.Parameter]]
+        """
+        super().__init__()
+        self._parse = parse
+        self._context: t.Optional[Context] = None
+        self._kwargs = kwargs or {}
+        self.help_text = help_text
+
+    def set_context(self, context: Context) -> None:
+        """Set context."""
+        self._context = context
+
+    def parse(
+        self, argv: Argv, commands: t.Optional[t.Dict[str, t.Any]] = None
+    ) -> t.Tuple:
+        """Parse and return kwargs."""
+        result, self.options = self._parse(argv, commands or {}, self._context)
+        return result
+
+    def copy(self) -> "CompiledParser":
+        """Create a copy of the object."""
+        parser = CompiledParser(
+            parse=self._parse,
+            help_text=t.cast(str, self.help_text),
+            kwargs=self._kwargs,
+        )
+        parser._context = self._context  # pylint: disable=protected-access
+        return parser
+
+
+def restore(cls: t.Type[p.Parameter], state: t.Dict[str, t.Any]) -> p.Parameter:
+    """
+    Recreate a parameter from its compiled state.
+
+    :param cls: Parameter class.
+    :type cls: t.Type[p.Parameter]
+    :param state: Instance attributes of the parameter.
+    :type state: t.Dict[str, t.Any]
+    :return: Parameter instance.
+    :rtype: p.Parameter
+    """
+    parameter = cls.__new__(cls)
+    parameter.__dict__.update(state)
+    (parameter._type,) = t.get_args(  # pylint: disable=protected-access
+        cls.__orig_bases__[0]  # type: ignore # pylint: disable=no-member
+    )
+    return parameter
+
+
+def walk(
+    cli: "BaseWrapper", path: Path = ()
+) -> t.Iterator[t.Tuple[Path, "BaseWrapper"]]:
+    """
+    Walk the command tree depth first.
+
+    :param cli: Root of the tree.
+    :type cli: BaseWrapper
+    :param path: Path of the root node.
+    :type path: Path
+    :return: Iterator over the path and the wrapper of every node.
+    :rtype: t.Iterator[t.Tuple[Path, BaseWrapper]]
+    """
+    yield path, cli
+    for name, child in getattr(cli, "_children", {}).items():
+        yield from walk(cli=child, path=(*path, name))
+
+
+def install(cli: "BaseWrapper", parsers: t.Dict[Path, CompiledParser]) -> t.Any:
+    """
+    Create a copy of the tree which uses the compiled parsers.
+
+    The original tree is left untouched.
+
+    :param cli: Root of the tree.
+    :type cli: BaseWrapper
+    :param parsers: Compiled parser for every node path.
+    :type parsers: t.Dict[Path, CompiledParser]
+    :return: Root of the compiled tree.
+    :rtype: BaseWrapper
+    """
+
+    def _install(
+        node: "BaseWrapper", path: Path, parent: t.Optional["BaseWrapper"]
+    ) -> "BaseWrapper":
+        clone = copy.copy(node)
+        parser = parsers[path]
+        if clone.context is not None:
+            parser.set_context(context=clone.context)
+        clone._built_parser = parser  # pylint: disable=protected-access
+        clone.parent = t.cast(t.Any, parent)
+        if hasattr(node, "_children"):
+            setattr(
+                clone,
+                "_children",
+                {
+                    name: _install(child, (*path, name), clone)
+                    for name, child in getattr(node, "_children").items()
+                },
+            )
+        return clone
+
+    return _install(cli, (), None)
+
+
+class _Writer:
+    """Source code writer."""
+
+    def __init__(self) -> None:
+        """Initialize object."""
+        self.lines: t.List[str] = []
+        self.level = 0
+
+    def __call__(self, line: str = "") -> None:
+        """Write a line at the current indentation level."""
+        self.lines.append(("    " * self.level + line) if line else "")
+
+    def indent(self) -> None:
+        """Increase indentation."""
+        self.level += 1
+
+    def dedent(self) -> None:
+        """Decrease indentation."""
+        self.level -= 1
+
+    def source(self) -> str:
+        """Return the source code."""
+        return "\n".join(self.lines) + "\n"
+
+
+class _Compiler:
+    """Code generator for a command tree."""
+
+    def __init__(self, cli: "BaseWrapper", target: str) -> None:
+        """Initialize object."""
+        self.cli = cli
+        self.target = target
+        self.refs: t.Dict[int, str] = {
+            id(option): f"GLOBAL_OPTIONS[{i}]"
+            for i, option in enumerate(GLOBAL_OPTIONS)
+        }
+        self.classes: t.Dict[str, str] = {}
+        self.write = _Writer()
+
+    def _header(self) -> None:
+        """Write module header."""
+        module, _, attribute = self.target.partition(":")
+        write = self.write
+        write(
+            f'"""Compiled parsers for `{self.target}`, generated by `python -m clea compile`."""'
+        )
+        write()
+        write("# pylint: skip-file")
+        write("# flake8: noqa")
+        write("# mypy: ignore-errors")
+        write()
+        write("import pathlib")
+        write()
+        write("from clea.compiler import CompiledParser, install, restore")
+        write(
+            "from clea.exceptions import ArgumentsMissing, ExtraArgumentProvided, ParsingError"
+        )
+        write("from clea.helpers import get_annotations, import_object")
+        write("from clea.options import GLOBAL_OPTIONS")
+        write(f"from {module} import {attribute.split('.')[0]} as _root")
+        write()
+        write(f"_n0 = _root{''.join('.' + name for name in attribute.split('.')[1:])}")
+
+    def _reference(self, obj: t.Any) -> str:
+        """Get the name a module level class is imported as."""
+        module, qualname = obj.__module__, obj.__qualname__
+        target = sys.modules.get(module)
+        for name in qualname.split("."):
+            target = getattr(target, name, None)
+        if target is not obj:
+            raise _NotLiteral(qualname)
+        return self.classes.setdefault(f"{module}:{qualname}", f"_c{len(self.classes)}")
+
+    def _literal(self, value: t.Any) -> str:
+        """Write a value as a literal."""
+        if value is None or isinstance(value, (bool, int, str, bytes)):
+            return repr(value)
+        if isinstance(value, float) and math.isfinite(value):
+            return repr(value)
+        if isinstance(value, Enum):
+            return f"{self._reference(type(value))}.{value.name}"
+        if isinstance(value, PurePath):
+            return f"pathlib.{type(value).__name__}({str(value)!r})"
+        if isinstance(value, type):
+            return self._reference(value)
+        if isinstance(value, (list, tuple)):
+            items = ", ".join(self._literal(item) for item in value)
+            return f"[{items}]" if isinstance(value, list) else f"({items},)"
+        if isinstance(value, dict):
+            items = ", ".join(
+                f"{self._literal(key)}: {self._literal(item)}"
+                for key, item in value.items()
+            )
+            return f"{{{items}}}"
+        if isinstance(value, p.Parameter):
+            state = {
+                name: RESET_ATTRIBUTES.get(name, item)
+                for name, item in vars(value).items()
+                if name not in TRANSIENT_ATTRIBUTES
+            }
+            return f"restore({self._reference(type(value))}, {self._literal(state)})"
+        raise _NotLiteral(type(value).__name__)
+
+    def _parameters(self, index: int, wrapper: "BaseWrapper") -> None:
+        """Write the parameter defintions of a node."""
+        write = self.write
+        parser = wrapper._parser  # pylint: disable=protected-access
+        parameters = list(parser._args) + list(  # pylint: disable=protected-access
+            dict.fromkeys(parser._kwargs.values())  # pylint: disable=protected-access
+        )
+        for j, parameter in enumerate(parameters):
+            if isinstance(parameter, (p.VersionParameter, p.ContextParameter)):
+                continue
+            ref = f"_n{index}_p{j}"
+            self.refs[id(parameter)] = ref
+            try:
+                write(f"{ref} = {self._literal(parameter)}")
+            except _NotLiteral:
+                self._annotation(index=index, wrapper=wrapper, parameter=parameter)
+
+    def _annotation(
+        self, index: int, wrapper: "BaseWrapper", parameter: p.Parameter
+    ) -> None:
+        """Write a reference to the parameter defintion in the annotations."""
+        write = self.write
+        ref = self.refs[id(parameter)]
+        f = wrapper._f  # pylint: disable=protected-access
+        code = getattr(f, "__code__")
+        argnames = code.co_varnames[: code.co_argcount]
+        defaults = getattr(f, "__defaults__") or ()
+        offset = len(argnames) - len(defaults)
+        write(
+            f"{ref} = get_annotations(_n{index}._f)[{parameter.name!r}].__metadata__[0]"
+        )
+        write(f"{ref}.name = {parameter.name!r}")
+        position = argnames.index(parameter.name)
+        if position >= offset and defaults[position - offset] is not None:
+            write(f"{ref}.default = _n{index}._f.__defaults__[{position - offset}]")
+        if (
+            parameter.long_flag is not None
+            and parameter.long_flag == "--" + parameter.name.replace("_", "-")
+        ):
+            write(f"{ref}.create_long_flag()")
+
+    def _convert(self, parameter: p.Parameter, target: str, value: str) -> None:
+        """Write conversion of `value` into `target`."""
+        write = self.write
+        if isinstance(parameter, p.ContextParameter):
+            write(f"{target} = context")
+            return
+        ref = self.refs[id(parameter)]
+        if type(parameter) is p.Boolean:  # pylint: disable=unidiomatic-typecheck
+            write(f"{target} = {not parameter.default!r}")
+            return
+        converter = INLINE_TYPES.get(type(parameter))
+        if converter is None:
+            write(f"{target} = {ref}.parse({value})")
+            return
+        if converter == "str":
+            write(f"{target} = str({value})")
+            return
+        message = (
+            f"Error parsing value for {parameter.metavar}; "
+            f"Provided value={{{value}}}; Expected type={converter}"
+        )
+        write("try:")
+        write.indent()
+        write(f"{target} = {converter}({value})")
+        write.dedent()
+        write("except ValueError as e:")
+        write.indent()
+        write(f"raise ParsingError(message=f{message!r}, exit_code=1) from e")
+        write.dedent()
+
+    def _flags(self, parser: BaseParser) -> None:
+        """Write flag matching."""
+        write = self.write
+        branch = "if"
+        grouped: t.Dict[int, t.List[str]] = {}
+        definitions: t.Dict[int, p.Parameter] = {}
+        for (
+            flag,
+            parameter,
+        ) in parser._kwargs.items():  # pylint: disable=protected-access
+            if isinstance(parameter, p.VersionParameter):
+                continue
+            if isinstance(parameter, p.ChoiceByFlag):
+                key = f"flag:{flag}"
+                condition = f"flag == {flag!r}"
+                write(f"{branch} {condition} and {key!r} not in seen:")
+                write.indent()
+                write(f"seen.add({key!r})")
+                self._convert(parameter, f"kwargs[{parameter.name!r}]", "value")
+                write.dedent()
+                branch = "elif"
+                continue
+            grouped.setdefault(id(parameter), []).append(flag)
+            definitions[id(parameter)] = parameter
+        for key, flags in grouped.items():
+            parameter = definitions[key]
+            condition = " or ".join(f"flag == {flag!r}" for flag in flags)
+            if len(flags) > 1:
+                condition = f"({condition})"
+            if parameter.is_container:
+                write(f"{branch} {condition}:")
+                write.indent()
+                write(
+                    f"kwargs.setdefault({parameter.name!r}, []).extend("
+                    f"{self.refs[id(parameter)]}.parse(value))"
+                )
+            else:
+                write(f"{branch} {condition} and {parameter.name!r} not in seen:")
+                write.indent()
+                write(f"seen.add({parameter.name!r})")
+                self._convert(parameter, f"kwargs[{parameter.name!r}]", "value")
+            write.dedent()
+            branch = "elif"
+        for flag, option in parser._options.items():  # pylint: disable=protected-access
+            write(f"{branch} flag == {flag!r}:")
+            write.indent()
+            self._convert(option, f"options[{option.name!r}]", "value")
+            write.dedent()
+            branch = "elif"
+        if branch == "if":
+            write("if True:")
+            write.indent()
+        else:
+            write("else:")
+            write.indent()
+        write(
+            'raise ExtraArgumentProvided(f"Extra argument provided with flag `{flag}`")'
+        )
+        write.dedent()
+
+    def _parse_function(self, index: int, wrapper: "BaseWrapper") -> None:
+        """Write the parse function of a node."""
+        write = self.write
+        parser = wrapper._parser  # pylint: disable=protected-access
+        is_group = hasattr(wrapper, "_children")
+        args = list(parser._args)  # pylint: disable=protected-access
+        write(f"_n{index}_metavars = {[arg.metavar for arg in args]!r}")
+        write()
+        write()
+        write(f"def _parse_n{index}(argv, commands, context):")
+        write.indent()
+        write("kwargs = {}")
+        write("options = {}")
+        write("seen = set()")
+        write("position = 0")
+        if is_group:
+            write("sub_command = None")
+            write("sub_argv = []")
+            write("for i, arg in enumerate(argv):")
+            write.indent()
+            write("sub_command = commands.get(arg)")
+            write("if sub_command is not None:")
+            write.indent()
+            write("sub_argv = argv[i + 1 :]")
+            write("break")
+            write.dedent()
+            help_result = "(kwargs, True, False, None, argv)"
+            version_result = "(kwargs, False, True, None, argv)"
+            options_active = ""
+        else:
+            write("ended = False")
+            write("for i, arg in enumerate(argv):")
+            write.indent()
+            write('if arg == "--" and not ended:')
+            write("    ended = True")
+            write("    continue")
+            help_result = "(kwargs, True, False)"
+            version_result = "(kwargs, False, True)"
+            options_active = "not ended and "
+        write(f'if {options_active}arg == "--help":')
+        write(f"    return {help_result}, options")
+        write(f'if {options_active}arg == "--version":')
+        write(f"    return {version_result}, options")
+        write(f'if {options_active}arg.startswith("-"):')
+        write.indent()
+        write('if "=" in arg:')
+        write('    flag, value = arg.split("=")')
+        write("else:")
+        write("    flag, value = arg, arg")
+        self._flags(parser=parser)
+        write.dedent()
+        for i, arg in enumerate(args):
+            write(f"elif position == {i}:")
+            write.indent()
+            if isinstance(arg, p.Variadic):
+                # The remaining positional arguments are converted lazily
+                ref = self.refs[id(arg)]
+                write(f"kwargs[{arg.name!r}] = {ref}.values(argv, i, ended)")
+            else:
+                self._convert(arg, f"kwargs[{arg.name!r}]", "arg")
+            write(f"position = {i + 1}")
+            write.dedent()
+        required = len(args)
+        if args and isinstance(args[-1], p.Variadic):
+            write(f"elif position == {len(args)}:")
+            write("    pass")
+            if args[-1].nargs == "*":
+                required -= 1
+        write("else:")
+        write('    raise ExtraArgumentProvided(f"Extra argument provided `{arg}`")')
+        write.dedent()
+        if required < len(args):
+            write(f"if position == {required}:")
+            write(
+                f"    kwargs[{args[-1].name!r}] = "
+                f"{self.refs[id(args[-1])]}.values(argv, len(argv))"
+            )
+            write(f"    position = {len(args)}")
+        if args:
+            write(f"if position < {len(args)}:")
+            write.indent()
+            write("raise ArgumentsMissing(")
+            write('    message="Missing argument for positional arguments "')
+            write(f'    + ", ".join(_n{index}_metavars[position:]),')
+            write("    exit_code=1,")
+            write(")")
+            write.dedent()
+        for parameter in dict.fromkeys(
+            parser._kwargs.values()  # pylint: disable=protected-access
+        ):
+            if parameter.name == "version":
+                continue
+            write(f"if {parameter.name!r} not in kwargs:")
+            write.indent()
+            if isinstance(parameter, p.ContextParameter):
+                write(f"kwargs[{parameter.name!r}] = context")
+            elif parameter.is_container:
+                write(
+                    f"kwargs[{parameter.name!r}] = "
+                    f"list({self.refs[id(parameter)]}.default or [])"
+                )
+            else:
+                write(
+                    f"kwargs[{parameter.name!r}] = {self.refs[id(parameter)]}.default"
+                )
+            write.dedent()
+        if is_group:
+            write("return (kwargs, False, False, sub_command, sub_argv), options")
+        else:
+            write("return (kwargs, False, False), options")
+        write.dedent()
+
+    def compile(self) -> str:
+        """Generate the module source."""
+        write = self.write
+        self._header()
+        nodes = list(walk(cli=self.cli))
+        for index, (path, _) in enumerate(nodes):
+            if index == 0:
+                continue
+            parent_index = [
+                i for i, (other, _) in enumerate(nodes) if other == path[:-1]
+            ][0]
+            write(f"_n{index} = _n{parent_index}._children[{path[-1]!r}]")
+        start = len(write.lines)
+        for index, (_, wrapper) in enumerate(nodes):
+            self._parameters(index=index, wrapper=wrapper)
+        write.lines[start:start] = [
+            f"{name} = import_object({path!r})" for path, name in self.classes.items()
+        ]
+        for index, (_, wrapper) in enumerate(nodes):
+            write()
+            self._parse_function(index=index, wrapper=wrapper)
+            write()
+        write()
+        write("cli = install(")
+        write("    _n0,")
+        write("    {")
+        for index, (path, wrapper) in enumerate(nodes):
+            parser = wrapper._parser  # pylint: disable=protected-access
+            flags = ", ".join(
+                f"{flag!r}: {self.refs[id(parameter)]}"
+                for flag, parameter in parser._kwargs.items()  # pylint: disable=protected-access
+                if id(parameter) in self.refs
+            )
+            write(f"        {path!r}: CompiledParser(")
+            write(f"            parse=_parse_n{index},")
+            write(f"            help_text={wrapper.render_help()!r},")
+            write(f"            kwargs={{{flags}}},")
+            write("        ),")
+        write("    },")
+        write(")")
+        return self.write.source()
+
+
+def compile_cli(cli: "BaseWrapper", target: str) -> str:
+    """
+    Generate a module with compiled parsers for a command tree.
+
+    The generated module exposes the compiled tree as `cli`, which can be
+    passed to `clea.run` directly.
+
+    :param cli: Root of the tree.
+    :type cli: BaseWrapper
+    :param target: Import path of the root, eg. `pkg.cli:main`.
+    :type target: str
+    :return: Source code of the generated module.
+    :rtype: str
+    """
+    return _Compiler(cli=cli, target=target).compile()
@@ -1,29 +1,295 @@
 """Runtime context."""
 
 
+import threading
+import time
 import typing as t
+from contextvars import ContextVar
 from pathlib import Path
 
+from clea.exceptions import CleaException
+from clea.output import DEFAULT_BUFFER_SIZE, Writer
+from clea.progress import Progress, ProgressMode
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    from clea.schedule import RunStats
+    from clea.store import Store
+    from clea.wrappers import BaseWrapper
+
+_current: ContextVar[t.Optional["Context"]] = ContextVar("context", default=None)
+
 
 class Context:
     """Runtime context class."""
 
     _data: t.Dict[t.Any, t.Any]
+    _persisted: t.Dict[str, t.Tuple[t.Any, t.Optional[float]]]
+    _providers: t.Dict[t.Any, t.Tuple[t.Callable[[], t.Any], t.Optional[t.Callable]]]
+    _resources: t.List[t.Tuple[t.Any, t.Any, t.Optional[t.Callable]]]
+    _out: t.Optional[Writer]
+    _err: t.Optional[Writer]
+    _parent: t.Optional["Context"]
+
+    deadline: t.Optional[float]
+    isolated: bool
+    schedule: t.Optional["RunStats"]
 
-    def __init__(self) -> None:
-        """Initialize context."""
+    def __init__(
+        self,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        store: t.Optional["Store"] = None,
+    ) -> None:
+        """Initialize context.
+
+        :param buffer_size: Buffer size for the output writers.
+        :type buffer_size: int
+        :param store: Persistent store shared across invocations.
+        :type store: t.Optional[Store]
+        """
+        self._parent = None
         self._data = {}
+        self._store = store
+        # Values read from or written to the store along with their expiry
+        self._persisted = {}
+        self._providers = {}
+        self._resources = []
+        self._resources_lock = threading.RLock()
+        self._token: t.Any = None
         self._cwd = Path.cwd()
+        self._buffer_size = buffer_size
+        self._out = None
+        self._err = None
+        self.deadline = None
+        self.isolated = False
+        self.schedule = None
 
     @property
     def cwd(self) -> Path:
         """Current working directory."""
         return self._cwd
 
+    @property
+    def parent(self) -> t.Optional["Context"]:
+        """Context this invocation context is layered over."""
+        return self._parent
+
+    @property
+    def out(self) -> Writer:
+        """Buffered writer for stdout."""
+        if self._parent is not None:
+            return self._parent.out
+        if self._out is None:
+            self._out = Writer(stream="stdout", buffer_size=self._buffer_size)
+        return self._out
+
+    @property
+    def err(self) -> Writer:
+        """Buffered writer for stderr."""
+        if self._parent is not None:
+            return self._parent.err
+        if self._err is None:
+            self._err = Writer(stream="stderr", buffer_size=self._buffer_size)
+        return self._err
+
+    def remaining(self) -> t.Optional[float]:
+        """Seconds left until the deadline of the current invocation."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def progress(
+        self,
+        total: t.Optional[int] = None,
+        description: str = "",
+        **kwargs: t.Any,
+    ) -> Progress:
+        """
+        Create a progress tracker.
+
+        Progress is not rendered when running isolated.
+
+        :param total: Expected number of items, `None` if unknown.
+        :type total: t.Optional[int]
+        :param description: Label for the progress line.
+        :type description: str
+        :return: Progress tracker.
+        :rtype: Progress
+        """
+        if self.isolated:
+            kwargs["mode"] = ProgressMode.DISABLED
+        return Progress(total=total, description=description, **kwargs)
+
+    def flush(self) -> None:
+        """Flush output writers."""
+        if self._parent is not None:
+            self._parent.flush()
+            return
+        if self._out is not None:
+            self._out.flush()
+        if self._err is not None:
+            self._err.flush()
+
+    def child(self) -> "Context":
+        """
+        Create a context for a single invocation layered over this one.
+
+        Values set on the child are not visible to this context or to the
+        other children, lookups for missing keys fall through to this context.
+        The output writers, the store and the resources created through the
+        providers registered on this context are shared. Used as a `with`
+        block the child is the current context until the block exits, the
+        resources provided on the child are closed afterwards.
+
+        :return: Context of the same class as this one.
+        :rtype: Context
+        """
+        context = object.__new__(type(self))
+        context.__dict__.update(self.__dict__)
+        context._parent = self
+        context._data = {}
+        context._providers = {}
+        context._resources = []
+        context.deadline = None
+        context.schedule = None
+        return context
+
+    def __enter__(self) -> "Context":
+        """Make this the context of the running invocation."""
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        """Restore the previous context and close the resources."""
+        _current.reset(self._token)
+        self.close()
+
     def set(self, key: t.Any, value: t.Any) -> None:
         """Set config value."""
         self._data[key] = value
 
+    def persist(self, key: str, value: t.Any, ttl: t.Optional[float] = None) -> None:
+        """
+        Set a value and write it to the persistent store.
+
+        :param key: Key of the value.
+        :type key: str
+        :param value: Picklable value.
+        :type value: t.Any
+        :param ttl: Time in seconds for which the value stays valid, `None` means forever.
+        :type ttl: t.Optional[float]
+        """
+        if self._store is None:
+            raise CleaException(
+                message="Context has no persistent store configured", exit_code=1
+            )
+        self._store.set(key=key, value=value, ttl=ttl)
+        self._data.pop(key, None)
+        self._persisted[key] = (value, None if ttl is None else time.time() + ttl)
+
+    def provide(
+        self,
+        key: t.Any,
+        factory: t.Callable[[], t.Any],
+        close: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+    ) -> None:
+        """
+        Register a lazily created resource.
+
+        The factory is called on the first `get` for the key and the resource
+        is reused afterwards until the context is closed.
+
+        :param key: Key of the resource.
+        :type key: t.Any
+        :param factory: Callable which creates the resource.
+        :type factory: t.Callable[[], t.Any]
+        :param close: Callable which releases the resource.
+        :type close: t.Optional[t.Callable[[t.Any], t.Any]]
+        """
+        self._providers[key] = (factory, close)
+
+    def _create(self, key: t.Any) -> t.Any:
+        """Create a provided resource."""
+        with self._resources_lock:
+            if key in self._data:
+                return self._data[key]
+            factory, close = self._providers[key]
+            value = factory()
+            self._resources.append((key, value, close))
+            self._data[key] = value
+            return value
+
+    def close(self) -> None:
+        """
+        Close the created resources in reverse creation order.
+
+        Every resource is closed even if closing another one fails, the first
+        error is raised afterwards. Providers stay registered so resources are
+        created again on the next use.
+        """
+        if len(self._resources) == 0:
+            return
+        error: t.Optional[BaseException] = None
+        with self._resources_lock:
+            resources, self._resources = self._resources, []
+            for key, value, close in reversed(resources):
+                self._data.pop(key, None)
+                if close is None:
+                    continue
+                try:
+                    close(value)
+                except Exception as e:  # pylint: disable=broad-except
+                    error = error or e
+        if error is not None:
+            raise error
+
+    def invoke(self, command: "BaseWrapper", **kwargs: t.Any) -> t.Any:
+        """
+        Call another command with python values using this context.
+
+        The command gets the remaining time of the current invocation at most.
+
+        :param command: Command to call.
+        :type command: BaseWrapper
+        :param kwargs: Values for the arguments of the command function.
+        :type kwargs: t.Any
+        :return: The return value of the command function.
+        :rtype: t.Any
+        """
+        return command.invoke_with(context=self, **kwargs)
+
     def get(self, key: t.Any, default: t.Any = None) -> t.Any:
-        """Get config value."""
-        return self._data.get(key, default)
+        """Get config value, provided resource or persisted value."""
+        if key in self._data:
+            return self._data[key]
+        if key in self._providers:
+            return self._create(key=key)
+        if self._parent is not None:
+            return self._parent.get(key, default)
+        if self._store is not None and isinstance(key, str):
+            entry = self._persisted.get(key)
+            if entry is None:
+                entry = self._store.entry(key=key)
+                if entry is None:
+                    return default
+                self._persisted[key] = entry
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                self._persisted.pop(key, None)
+                return default
+            return value
+        return default
+
+
+def get_current_context() -> t.Optional[Context]:
+    """
+    Get the context of the running invocation.
+
+    The context is tracked per thread and per asyncio task, threads started
+    by a command need `contextvars.copy_context` to see it.
+
+    :return: Context of the innermost running invocation, `None` outside of
+        an invocation.
+    :rtype: t.Optional[Context]
+    """
+    return _current.get()
@@ -0,0 +1,128 @@
+"""
+Deadlines.
+
+A deadline is an absolute `time.monotonic()` timestamp. It's computed once
+when a group or a command is invoked and passed down the tree, so a child can
+only shrink the remaining budget. Synchronous functions are interrupted using
+a `SIGALRM` timer when running on the main thread and coroutines are
+cancelled using `asyncio.wait_for`.
+"""
+
+import contextlib
+import signal
+import threading
+import time
+import typing as t
+
+from clea.exceptions import TimeoutExpired
+
+
+EXIT_TIMEOUT = 124
+
+
+def get_deadline(
+    deadline: t.Optional[float], *timeouts: t.Optional[float]
+) -> t.Optional[float]:
+    """
+    Get the earliest deadline.
+
+    :param deadline: Inherited deadline.
+    :type deadline: t.Optional[float]
+    :param timeouts: Timeouts in seconds starting now.
+    :type timeouts: t.Optional[float]
+    :return: The earliest deadline or `None` if there are none.
+    :rtype: t.Optional[float]
+    """
+    now = time.monotonic()
+    deadlines = [now + timeout for timeout in timeouts if timeout is not None]
+    if deadline is not None:
+        deadlines.append(deadline)
+    return min(deadlines, default=None)
+
+
+def _expired(name: str) -> TimeoutExpired:
+    """Create timeout exception."""
+    return TimeoutExpired(
+        message=f"Command `{name}` timed out",
+        exit_code=EXIT_TIMEOUT,
+    )
+
+
+def _can_signal() -> bool:
+    """Check if the timer signal can be used."""
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+@contextlib.contextmanager
+def enforce(deadline: t.Optional[float], name: str) -> t.Generator:
+    """
+    Raise `TimeoutExpired` in the main thread once the deadline passes.
+
+    :param deadline: The deadline.
+    :type deadline: t.Optional[float]
+    :param name: Name of the command, used in the error message.
+    :type name: str
+    """
+    if deadline is None:
+        yield
+        return
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise _expired(name=name)
+    if not _can_signal():
+        yield
+        return
+
+    state = {"outer_first": False, "outer_fired": False}
+
+    def _handler(signum: int, frame: t.Any) -> None:
+        if state["outer_first"] and callable(previous):
+            state["outer_fired"] = True
+            previous(signum, frame)
+            return
+        raise _expired(name=name)
+
+    previous = signal.signal(signal.SIGALRM, _handler)
+    started = time.monotonic()
+    # Keep the timer of an enclosing deadline to re-arm it on exit
+    outer, interval = signal.setitimer(signal.ITIMER_REAL, remaining)
+    if 0 < outer < remaining:
+        state["outer_first"] = True
+        signal.setitimer(signal.ITIMER_REAL, outer)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer > 0 and not state["outer_fired"]:
+            left = outer - (time.monotonic() - started)
+            if left <= 0 and callable(previous):
+                previous(signal.SIGALRM, None)
+            signal.setitimer(signal.ITIMER_REAL, max(left, 1e-6), interval)
+
+
+def run_coroutine(coro: t.Awaitable, deadline: t.Optional[float], name: str) -> t.Any:
+    """
+    Run a coroutine, cancelling it once the deadline passes.
+
+    :param coro: The coroutine.
+    :type coro: t.Awaitable
+    :param deadline: The deadline.
+    :type deadline: t.Optional[float]
+    :param name: Name of the command, used in the error message.
+    :type name: str
+    :return: Return value of the coroutine.
+    :rtype: t.Any
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    if deadline is None:
+        return asyncio.run(t.cast(t.Coroutine, coro))
+    remaining = deadline - time.monotonic()
+    try:
+        return asyncio.run(asyncio.wait_for(coro, timeout=max(remaining, 0)))
+    except asyncio.TimeoutError as e:
+        raise _expired(name=name) from e
@@ -0,0 +1,383 @@
+"""
+Distributed invocations.
+
+A worker started using `python -m clea worker pkg.cli:main --listen=host:port`
+imports the command tree once and runs the argv lists it receives over TCP
+one at a time, so a worker is started for every core to be used. Messages
+are JSON objects prefixed with their length as a 4 byte big endian integer.
+
+`distribute` spreads argv lists over a set of workers. The tasks are split
+into a queue per worker and a worker which runs out of tasks steals from the
+end of the longest queue, so slow workers and uneven tasks don't leave the
+other workers idle. Tasks running on a worker which disconnects or stops
+responding are retried on the remaining workers and the results are yielded
+as soon as they arrive.
+"""
+
+import json
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import traceback
+import typing as t
+from collections import deque
+
+from clea.exceptions import CleaException
+from clea.parser import Argv
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    from clea.wrappers import BaseWrapper
+
+DEFAULT_RETRIES = 2
+DEFAULT_CONNECT_TIMEOUT = 5.0
+MAX_MESSAGE_SIZE = 1 << 30
+
+Address = t.Tuple[str, int]
+
+_HEADER = struct.Struct(">I")
+
+
+def parse_address(value: str) -> Address:
+    """
+    Parse a `host:port` address.
+
+    :param value: Address string, the host defaults to `127.0.0.1`.
+    :type value: str
+    :return: Host and port.
+    :rtype: Address
+    """
+    host, _, port = value.rpartition(":")
+    if not port.isdigit():
+        raise CleaException(
+            message=f"Invalid address `{value}`; Expected `host:port`", exit_code=1
+        )
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def encode(message: t.Dict[str, t.Any]) -> bytes:
+    """Encode a message into a length prefixed frame."""
+    data = json.dumps(message).encode("utf-8")
+    return _HEADER.pack(len(data)) + data
+
+
+def read_message(stream: t.BinaryIO) -> t.Optional[t.Dict[str, t.Any]]:
+    """
+    Read a length prefixed frame.
+
+    :param stream: Buffered stream of the connection.
+    :type stream: t.BinaryIO
+    :return: Decoded message, `None` if the connection was closed.
+    :rtype: t.Optional[t.Dict[str, t.Any]]
+    """
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ConnectionError(f"Message of {size} bytes exceeds the size limit")
+    data = stream.read(size)
+    if len(data) < size:
+        return None
+    return json.loads(data)
+
+
+def execute(cli: "BaseWrapper", argv: Argv) -> t.Dict[str, t.Any]:
+    """Run an invocation isolated and return the result message."""
+    from clea.runner import run  # pylint: disable=import-outside-toplevel
+
+    try:
+        result = run(cli=cli, argv=argv, isolated=True)
+    except Exception:  # pylint: disable=broad-except
+        return {"exit_code": 1, "stdout": "", "stderr": traceback.format_exc()}
+    return {
+        "exit_code": result.exit_code,
+        "stdout": result.stdout.read(),
+        "stderr": result.stderr.read(),
+    }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Connection from a coordinator."""
+
+    server: "Worker"
+
+    def handle(self) -> None:
+        """Run the received invocations until the coordinator disconnects."""
+        while True:
+            try:
+                message = read_message(stream=self.rfile)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            with self.server.lock:
+                reply = execute(cli=self.server.cli, argv=message["argv"])
+            try:
+                self.wfile.write(encode(reply))
+            except OSError:
+                return
+
+
+class Worker(socketserver.ThreadingTCPServer):
+    """TCP server running invocations of a command tree."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, cli: "BaseWrapper", address: Address) -> None:
+        """Initialize object.
+
+        :param cli: Command tree to run.
+        :type cli: BaseWrapper
+        :param address: Host and port to listen on, port 0 picks a free port.
+        :type address: Address
+        """
+        self.cli = cli
+        # Invocations redirect the process wide stdout and stderr
+        self.lock = threading.Lock()
+        super().__init__(address, _Handler)
+
+    @property
+    def address(self) -> Address:
+        """Address the worker is listening on."""
+        host, port, *_ = self.server_address
+        return str(host), int(port)
+
+
+def serve(cli: "BaseWrapper", address: Address) -> None:
+    """
+    Run a worker until interrupted.
+
+    The bound address is written to stdout once the worker is listening.
+
+    :param cli: Command tree to run.
+    :type cli: BaseWrapper
+    :param address: Host and port to listen on.
+    :type address: Address
+    """
+    with Worker(cli=cli, address=address) as worker:
+        host, port = worker.address
+        sys.stdout.write(f"Listening on {host}:{port}\n")
+        sys.stdout.flush()
+        try:
+            worker.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class TaskResult:  # pylint: disable=too-few-public-methods
+    """Result of a distributed invocation."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        index: int,
+        argv: Argv,
+        exit_code: int,
+        stdout: str,
+        stderr: str,
+        worker: t.Optional[Address],
+        attempts: int,
+    ) -> None:
+        """Initialize object."""
+        self.index = index
+        self.argv = argv
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.worker = worker
+        self.attempts = attempts
+
+
+class _Task:  # pylint: disable=too-few-public-methods
+    """Queued invocation."""
+
+    __slots__ = ("index", "argv", "attempts")
+
+    def __init__(self, index: int, argv: Argv) -> None:
+        """Initialize object."""
+        self.index = index
+        self.argv = argv
+        self.attempts = 0
+
+
+class _Coordinator:  # pylint: disable=too-many-instance-attributes
+    """Shared state of the connections to the workers."""
+
+    def __init__(
+        self,
+        workers: t.List[Address],
+        tasks: t.List[Argv],
+        retries: int,
+        timeout: t.Optional[float],
+        connect_timeout: float,
+    ) -> None:
+        """Initialize object."""
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.queues: t.List[t.Deque[_Task]] = [deque() for _ in workers]
+        for index, argv in enumerate(tasks):
+            self.queues[index % len(workers)].append(_Task(index=index, argv=argv))
+        self.pending = len(tasks)
+        self.alive = len(workers)
+        self.condition = threading.Condition()
+        self.results: "queue.Queue[t.Optional[TaskResult]]" = queue.Queue()
+
+    def take(self, worker: int) -> t.Optional[_Task]:
+        """Take a task from the own queue or steal one, `None` once all are done."""
+        with self.condition:
+            while True:
+                if self.queues[worker]:
+                    return self.queues[worker].popleft()
+                victim = max(self.queues, key=len)
+                if victim:
+                    return victim.pop()
+                if self.pending == 0:
+                    return None
+                # Tasks running on other workers may come back for a retry
+                self.condition.wait()
+
+    def finish(self, result: TaskResult) -> None:
+        """Record a finished task."""
+        with self.condition:
+            self.pending -= 1
+            self.condition.notify_all()
+        self.results.put(result)
+
+    def lose(self, worker: int, task: t.Optional[_Task], reason: str) -> None:
+        """Retry the running task of a lost worker, or fail it after the retries."""
+        address = self.workers[worker]
+        sys.stderr.write(f"Lost worker {address[0]}:{address[1]}; {reason}\n")
+        with self.condition:
+            self.alive -= 1
+            if task is not None and task.attempts <= self.retries:
+                self.queues[worker].appendleft(task)
+                task = None
+            self.condition.notify_all()
+        if task is not None:
+            self.finish(
+                TaskResult(
+                    index=task.index,
+                    argv=task.argv,
+                    exit_code=1,
+                    stdout="",
+                    stderr=f"Worker lost after {task.attempts} attempts; {reason}\n",
+                    worker=address,
+                    attempts=task.attempts,
+                )
+            )
+        with self.condition:
+            if self.alive == 0 and self.pending > 0:
+                self.results.put(None)
+
+    def drive(self, worker: int) -> None:
+        """Send tasks to a worker one at a time."""
+        address = self.workers[worker]
+        try:
+            connection = socket.create_connection(address, timeout=self.connect_timeout)
+        except OSError as e:
+            self.lose(worker=worker, task=None, reason=str(e))
+            return
+        connection.settimeout(self.timeout)
+        task: t.Optional[_Task] = None
+        with connection, connection.makefile("rb") as stream:
+            try:
+                while True:
+                    task = self.take(worker=worker)
+                    if task is None:
+                        return
+                    task.attempts += 1
+                    connection.sendall(encode({"argv": task.argv}))
+                    reply = read_message(stream=t.cast(t.BinaryIO, stream))
+                    if reply is None:
+                        raise ConnectionError("Connection closed")
+                    self.finish(
+                        TaskResult(
+                            index=task.index,
+                            argv=task.argv,
+                            exit_code=reply["exit_code"],
+                            stdout=reply["stdout"],
+                            stderr=reply["stderr"],
+                            worker=address,
+                            attempts=task.attempts,
+                        )
+                    )
+                    task = None
+            except (OSError, ValueError) as e:
+                self.lose(worker=worker, task=task, reason=str(e) or type(e).__name__)
+
+
+def map_items(argv: Argv, items: t.Iterable[str]) -> t.List[Argv]:
+    """
+    Build an argv list for every item by appending it to the base argv.
+
+    :param argv: Arguments shared by every invocation.
+    :type argv: Argv
+    :param items: Values appended as the last argument.
+    :type items: t.Iterable[str]
+    :return: Argv lists.
+    :rtype: t.List[Argv]
+    """
+    return [[*argv, item] for item in items]
+
+
+def distribute(  # pylint: disable=too-many-arguments
+    workers: t.Sequence[t.Union[str, Address]],
+    tasks: t.Iterable[Argv],
+    retries: int = DEFAULT_RETRIES,
+    timeout: t.Optional[float] = None,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+) -> t.Iterator[TaskResult]:
+    """
+    Run invocations on remote workers.
+
+    :param workers: Addresses of the workers as `host:port` strings or tuples.
+    :type workers: t.Sequence[t.Union[str, Address]]
+    :param tasks: Argv lists to run.
+    :type tasks: t.Iterable[Argv]
+    :param retries: Number of times a task is retried when its worker is lost.
+    :type retries: int
+    :param timeout: Seconds to wait for the result of a task before the
+        worker is considered lost, waits forever if `None`.
+    :type timeout: t.Optional[float]
+    :param connect_timeout: Seconds to wait for connecting to a worker.
+    :type connect_timeout: float
+    :return: Results in the order in which the tasks finish.
+    :rtype: t.Iterator[TaskResult]
+    """
+    addresses = [
+        parse_address(worker) if isinstance(worker, str) else worker
+        for worker in workers
+    ]
+    if len(addresses) == 0:
+        raise CleaException(message="No workers provided", exit_code=1)
+    coordinator = _Coordinator(
+        workers=addresses,
+        tasks=list(tasks),
+        retries=retries,
+        timeout=timeout,
+        connect_timeout=connect_timeout,
+    )
+    threads = [
+        threading.Thread(target=coordinator.drive, args=(index,), daemon=True)
+        for index in range(len(addresses))
+    ]
+    remaining = coordinator.pending
+    for thread in threads:
+        thread.start()
+    while remaining > 0:
+        result = coordinator.results.get()
+        if result is None:
+            raise CleaException(
+                message=f"All workers were lost; {coordinator.pending} tasks did not run",
+                exit_code=1,
+            )
+        remaining -= 1
+        yield result
+    for thread in threads:
+        thread.join()
@@ -30,3 +30,7 @@ class ArgumentsMissing(CleaException):
 
 class ExtraArgumentProvided(CleaException):
     """Raised if there was an error parsing an argument."""
+
+
+class TimeoutExpired(CleaException):
+    """Raised if a command did not finish before its deadline."""
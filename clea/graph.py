@@ -0,0 +1,256 @@
+"""
+Dependency graph runner.
+
+Commands can declare the sibling commands they depend on using `depends_on`.
+`run_graph` resolves the requested targets and their dependencies and runs
+them on a thread or process pool, running independent branches in parallel
+and scheduling a command only once all of its dependencies succeeded.
+
+Every command runs with the global options of the invocation, the deadline
+of the graph and its own child of the graph context. Process pools use the
+`fork` start method, so the commands don't need to be importable from the
+workers, which also means the workers inherit the state of the parent
+process at the time they're started. Locks held by other threads in the
+parent stay locked in the workers, start the graph before starting threads
+which may hold locks shared with the commands.
+"""
+
+import multiprocessing
+import sys
+import traceback
+import typing as t
+from concurrent import futures
+from functools import partial
+
+from typing_extensions import Annotated
+
+from clea.deadline import enforce
+from clea.exceptions import ArgumentsMissing, CleaException
+from clea.options import Options
+from clea.params import Boolean, Integer
+from clea.parser import Argv, CommandParser, Kwargs
+from clea.wrappers import BaseWrapper, Command, Group
+
+
+Graph = t.Dict[str, t.Set[str]]
+
+# Read by the pool tasks, the forked workers inherit the registered graphs
+_graphs: t.Dict[int, t.Tuple["Group", Options]] = {}
+
+
+def resolve(children: t.Dict[str, "BaseWrapper"], targets: t.List[str]) -> Graph:
+    """
+    Resolve the dependency graph for the targets.
+
+    :param children: Sibling commands.
+    :type children: t.Dict[str, BaseWrapper]
+    :param targets: Names of the requested commands.
+    :type targets: t.List[str]
+    :return: Mapping from every required command to its dependencies.
+    :rtype: Graph
+    """
+    graph: Graph = {}
+    visiting: t.List[str] = []
+
+    def _visit(name: str) -> None:
+        if name in graph:
+            return
+        if name in visiting:
+            cycle = " -> ".join([*visiting[visiting.index(name) :], name])
+            raise CleaException(
+                message=f"Dependency cycle detected {cycle}", exit_code=1
+            )
+        if name not in children or isinstance(children[name], GraphCommand):
+            raise CleaException(message=f"Unknown command `{name}`", exit_code=1)
+        visiting.append(name)
+        depends_on = getattr(children[name], "depends_on", [])
+        for dependency in depends_on:
+            _visit(dependency)
+        visiting.pop()
+        graph[name] = set(depends_on)
+
+    for target in targets:
+        _visit(target)
+    return graph
+
+
+def _run_task(graph_id: int, name: str) -> int:
+    """Invoke a child command, used as the pool task."""
+    group, options = _graphs[graph_id]
+    child = group._children[name]  # pylint: disable=protected-access
+    context = options.get("context")
+    try:
+        if context is None:
+            return child.invoke(argv=[], options=dict(options))
+        with context.child() as scoped:
+            return child.invoke(argv=[], options={**options, "context": scoped})
+    except CleaException as e:
+        sys.stderr.write(f"Command `{name}` failed; {e.message}\n")
+        return e.exit_code
+    except Exception:  # pylint: disable=broad-except
+        sys.stderr.write(f"Command `{name}` failed\n")
+        traceback.print_exc()
+        return 1
+
+
+def _executor(jobs: int, processes: bool) -> futures.Executor:
+    """Create the pool."""
+    if not processes:
+        return futures.ThreadPoolExecutor(max_workers=jobs)
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise CleaException(  # pragma: nocover
+            message="Running commands in processes requires the `fork` start method",
+            exit_code=1,
+        )
+    return futures.ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+    )
+
+
+def run_graph(
+    group: "Group",
+    targets: t.List[str],
+    jobs: int = 1,
+    processes: bool = False,
+    options: t.Optional[Options] = None,
+) -> int:
+    """
+    Run the targets and their dependencies.
+
+    No new commands are scheduled once a command fails, the commands which
+    are already running are allowed to finish.
+
+    :param group: Group holding the commands.
+    :type group: Group
+    :param targets: Names of the requested commands.
+    :type targets: t.List[str]
+    :param jobs: Number of commands to run in parallel.
+    :type jobs: int
+    :param processes: Use a process pool instead of a thread pool.
+    :type processes: bool
+    :param options: Global options passed to every command, along with the
+        deadline and the context of the graph.
+    :type options: t.Optional[Options]
+    :return: Exit code of the first failed command or 0.
+    :rtype: int
+    """
+    pending = resolve(
+        children=group._children, targets=targets  # pylint: disable=protected-access
+    )
+    done: t.Set[str] = set()
+    running: t.Dict[futures.Future, str] = {}
+    exit_code = 0
+    graph_id = id(pending)
+    _graphs[graph_id] = (group, options or {})
+    try:
+        with _executor(jobs=jobs, processes=processes) as executor:
+            try:
+                while pending or running:
+                    if exit_code == 0:
+                        for name in [n for n, d in pending.items() if d <= done]:
+                            del pending[name]
+                            running[executor.submit(_run_task, graph_id, name)] = name
+                    if not running:
+                        break
+                    completed, _ = futures.wait(
+                        running, return_when=futures.FIRST_COMPLETED
+                    )
+                    for future in completed:
+                        name = running.pop(future)
+                        code = future.result()
+                        if code != 0:
+                            exit_code = exit_code or code
+                            continue
+                        done.add(name)
+            except BaseException:
+                # Interrupted, eg. by the deadline, drop the queued commands
+                for future in running:
+                    future.cancel()
+                raise
+    finally:
+        del _graphs[graph_id]
+    return exit_code
+
+
+class GraphCommand(Command):
+    """Command for running sibling commands along with their dependencies."""
+
+    def __init__(self, group: Group, name: str = "run") -> None:
+        """Initialize object.
+
+        :param group: Group holding the commands.
+        :type group: Group
+        :param name: Name of the command.
+        :type name: str
+        """
+
+        def run(  # pylint: disable=unused-argument
+            jobs: Annotated[
+                int,
+                Integer(
+                    short_flag="-j",
+                    long_flag="--jobs",
+                    default=1,
+                    help="Number of commands to run in parallel",
+                ),
+            ],
+            processes: Annotated[
+                bool,
+                Boolean(long_flag="--processes", help="Run commands in processes"),
+            ],
+        ) -> None:
+            """Run commands along with their dependencies."""
+
+        super().__init__(f=run, context=group.context, name=name, parent=group)
+        self.group = group
+
+    def invoke(
+        self,
+        argv: Argv,
+        isolated: bool = False,
+        options: t.Optional[Options] = None,
+    ) -> int:
+        """Run the targets.
+
+        :param argv: Target names followed or preceded by the flags.
+        :type argv: Argv
+        :param isolated: Whether to run the command in an isolated context.
+        :type isolated: bool
+        :param options: Global options parsed by the parent groups.
+        :type options: t.Optional[Options]
+        :return: Exit code of the first failed command or 0.
+        :rtype: int
+        """
+        targets = [arg for arg in argv if not arg.startswith("-")]
+        parser = t.cast(CommandParser, self._parser).copy()
+        kwargs, help_only, _ = parser.parse(
+            argv=[arg for arg in argv if arg.startswith("-")]
+        )
+        if help_only:
+            return self.help()
+        if len(targets) == 0:
+            raise ArgumentsMissing(
+                message="Missing argument for positional arguments TARGETS",
+                exit_code=1,
+            )
+        options = {**(options or {}), **parser.options}
+        options["deadline"] = self._get_deadline(options=options)
+        return self._scoped(
+            call=partial(self._run_graph, targets=targets, kwargs=kwargs),
+            options=options,
+        )
+
+    def _run_graph(self, options: Options, targets: t.List[str], kwargs: Kwargs) -> int:
+        """Run the targets until the deadline."""
+        with enforce(deadline=options["deadline"], name=self.name):
+            return run_graph(
+                group=self.group,
+                targets=targets,
+                jobs=kwargs["jobs"],
+                processes=kwargs["processes"],
+                options=options,
+            )
+
+    def render_help(self) -> str:
+        """Render help string."""
+        return super().render_help().replace("[OPTIONS] ", "[OPTIONS] TARGETS...", 1)
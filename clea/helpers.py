@@ -1,14 +1,84 @@
 """clea helpers."""
 
+import importlib
 import inspect
 import itertools
+import types
 import typing as t
+import weakref
 
-from typing_extensions import Annotated
+from typing_extensions import Annotated, get_type_hints
 
+from clea.exceptions import CleaException
 from clea.params import Parameter
 
 
+_annotations: "weakref.WeakKeyDictionary[t.Callable, t.Dict[str, t.Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _unwrap_optional(hint: t.Any) -> t.Any:
+    """Undo the `Optional` added to hints of arguments defaulting to `None` before python 3.11."""
+    if t.get_origin(hint) is t.Union:
+        args = [arg for arg in t.get_args(hint) if arg is not type(None)]
+        if len(args) == 1 and hasattr(args[0], "__metadata__"):
+            return args[0]
+    return hint
+
+
+def _resolve_annotations(
+    f: t.Callable, annotations: t.Dict[str, t.Any]
+) -> t.Dict[str, t.Any]:
+    """Evaluate string annotations in the namespace of the function."""
+    try:
+        hints = get_type_hints(f, include_extras=True)
+    except NameError:
+        # Names imported only for type checking, resolve whatever is possible
+        # and keep the rest as strings
+        hints = {}
+        globalns = getattr(inspect.unwrap(f), "__globals__", {})
+        for name, annotation in annotations.items():
+            try:
+                hints.update(
+                    get_type_hints(
+                        types.SimpleNamespace(__annotations__={name: annotation}),
+                        globalns=globalns,
+                        include_extras=True,
+                    )
+                )
+            except NameError:
+                hints[name] = annotation
+    return {name: _unwrap_optional(hint) for name, hint in hints.items()}
+
+
+def get_annotations(f: t.Callable) -> t.Dict[str, t.Any]:
+    """
+    Get the annotations of a function.
+
+    String annotations, eg. from modules using `from __future__ import annotations`,
+    are evaluated on the first call and the result is cached per function, so
+    resolving them does not cost anything at import time.
+
+    :param f: The function to get the annotations for.
+    :type f: callable
+    :return: A dictionary mapping argument names to their annotations.
+    :rtype: dict
+    """
+    try:
+        return _annotations[f]
+    except (KeyError, TypeError):
+        pass
+    annotations = dict(getattr(f, "__annotations__", None) or {})
+    if any(isinstance(annotation, str) for annotation in annotations.values()):
+        annotations = _resolve_annotations(f=f, annotations=annotations)
+    try:
+        _annotations[f] = annotations
+    except TypeError:  # pragma: nocover
+        pass
+    return annotations
+
+
 def get_function_metadata(
     f: t.Callable,
 ) -> t.Tuple[t.Dict[str, t.Any], t.Dict[str, Annotated[t.Any, Parameter]]]:
@@ -26,4 +96,25 @@ def get_function_metadata(
         [None for _ in range(len(args) - len(specs.defaults or []))],
         (specs.defaults or []),
     )
-    return dict(zip(specs.args, defaults)), specs.annotations
+    return dict(zip(specs.args, defaults)), get_annotations(f=f)
+
+
+def import_object(path: str) -> t.Any:
+    """
+    Import an object using `module:attribute` notation.
+
+    :param path: Import path, eg. `pkg.cli:main`.
+    :type path: str
+    :return: The imported object.
+    :rtype: t.Any
+    """
+    module_name, _, attribute = path.partition(":")
+    if attribute == "":
+        raise CleaException(
+            message=f"Invalid import path `{path}`; Expected `module:attribute`",
+            exit_code=1,
+        )
+    obj = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        obj = getattr(obj, name)
+    return obj
@@ -0,0 +1,221 @@
+"""
+Incremental execution.
+
+Incremental commands record a fingerprint of their inputs after every
+successful run and are skipped while the fingerprint stays the same and
+their outputs exist. Path arguments are fingerprinted by content, the
+content hash of a file is reused as long as its size and modification time
+match the recorded ones so unchanged inputs are never read twice.
+"""
+
+import contextlib
+import hashlib
+import json
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+from clea.cache import get_cache_dir
+from clea.params import get_paths
+from clea.parser import Kwargs
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    import sqlite3
+
+STATE_FILE = "state.db"
+CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS invocations (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def hash_file(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Hash the file contents using chunked reads.
+
+    :param path: Path of the file.
+    :type path: Path
+    :param chunk_size: Number of bytes read at a time.
+    :type chunk_size: int
+    :return: Hex digest of the contents.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _files(path: Path) -> t.List[Path]:
+    """List the files under a path."""
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        return sorted(file for file in path.rglob("*") if file.is_file())
+    return []
+
+
+class Incremental:
+    """Input fingerprinting for a command."""
+
+    def __init__(
+        self,
+        outputs: t.Optional[t.List[t.Union[str, Path]]] = None,
+        directory: t.Optional[Path] = None,
+    ) -> None:
+        """Initialize object.
+
+        :param outputs: Paths which the command produces, the command runs
+            again if any of them is missing.
+        :type outputs: t.Optional[t.List[t.Union[str, Path]]]
+        :param directory: Directory for the state database, defaults to `$XDG_CACHE_HOME/clea`.
+        :type directory: t.Optional[Path]
+        """
+        self.outputs = [Path(output) for output in outputs or []]
+        self.directory = directory
+
+    def _connect(self) -> "sqlite3.Connection":
+        """Open the state database."""
+        import sqlite3  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        directory = self.directory or get_cache_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(directory / STATE_FILE, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    @staticmethod
+    def _digest(connection: "sqlite3.Connection", path: Path) -> str:
+        """Content digest of a file, reusing the recorded one if the file is unchanged."""
+        stat = path.stat()
+        key = str(path.resolve())
+        row = connection.execute(
+            "SELECT size, mtime_ns, digest FROM files WHERE path = ?", (key,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = hash_file(path=path)
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (key, stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    @staticmethod
+    def key(name: str, kwargs: Kwargs) -> str:
+        """
+        Create the state key for an invocation.
+
+        State is kept for every combination of arguments, so switching between
+        them doesn't invalidate the state recorded for the others.
+
+        :param name: Name of the command.
+        :type name: str
+        :param kwargs: Parsed keyword arguments.
+        :type kwargs: Kwargs
+        :return: Hex digest of the name and the arguments.
+        :rtype: str
+        """
+        parts: t.List[t.Any] = [name]
+        for kwarg, value in sorted(kwargs.items()):
+            if kwarg != "context":
+                parts.append([kwarg, repr(value)])
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def fingerprint(
+        self, connection: "sqlite3.Connection", name: str, kwargs: Kwargs
+    ) -> str:
+        """
+        Fingerprint an invocation.
+
+        :param connection: State database connection.
+        :type connection: sqlite3.Connection
+        :param name: Name of the command.
+        :type name: str
+        :param kwargs: Parsed keyword arguments.
+        :type kwargs: Kwargs
+        :return: Hex digest of the arguments and the contents of the input paths.
+        :rtype: str
+        """
+        parts: t.List[t.Any] = [name]
+        for kwarg, value in sorted(kwargs.items()):
+            if kwarg == "context":
+                continue
+            parts.append([kwarg, repr(value)])
+            for path in get_paths(value=value):
+                parts.append(
+                    [
+                        [str(file), self._digest(connection=connection, path=file)]
+                        for file in _files(path=path)
+                    ]
+                )
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def outputs_exist(self) -> bool:
+        """Check if all of the outputs exist."""
+        return all(output.exists() for output in self.outputs)
+
+    def run(
+        self,
+        name: str,
+        kwargs: Kwargs,
+        call: t.Callable[[], int],
+        force: bool = False,
+    ) -> int:
+        """
+        Run the command unless its inputs are unchanged since the last successful run.
+
+        The fingerprint is taken before the command runs, so inputs modified by
+        the command itself cause another run.
+
+        :param name: Unique name of the command.
+        :type name: str
+        :param kwargs: Parsed keyword arguments.
+        :type kwargs: Kwargs
+        :param call: Callable which runs the command and returns the exit code.
+        :type call: t.Callable[[], int]
+        :param force: Run even if the inputs are unchanged.
+        :type force: bool
+        :return: Exit code.
+        :rtype: int
+        """
+        key = self.key(name=name, kwargs=kwargs)
+        with contextlib.closing(self._connect()) as connection:
+            fingerprint = self.fingerprint(
+                connection=connection, name=name, kwargs=kwargs
+            )
+            row = connection.execute(
+                "SELECT fingerprint FROM invocations WHERE key = ?", (key,)
+            ).fetchone()
+            if (
+                not force
+                and row is not None
+                and row[0] == fingerprint
+                and self.outputs_exist()
+            ):
+                sys.stderr.write(f"Skipping `{name}`, inputs are unchanged\n")
+                return 0
+            exit_code = call()
+            if exit_code == 0:
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO invocations VALUES (?, ?, ?, ?)",
+                        (key, name, fingerprint, time.time()),
+                    )
+            return exit_code
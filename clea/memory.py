@@ -0,0 +1,219 @@
+"""
+Memory profiling.
+
+When enabled through `clea.runner.run`, `tracemalloc` is started for the
+invocation and a snapshot is taken at every phase boundary (parser build,
+parsing, group callbacks and the leaf command). The report lists the peak
+memory and the top allocation sites for every phase.
+"""
+
+import os
+import sys
+import typing as t
+from pathlib import Path
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    import tracemalloc
+
+ENV_VAR = "CLEA_PROFILE_MEMORY"
+TOP_N = 5
+FRAMES = 1
+
+Target = t.Union[bool, str, Path, None]
+
+
+def _format_size(size: float) -> str:
+    """Human readable size."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class Phase:  # pylint: disable=too-few-public-methods
+    """Memory usage for a phase."""
+
+    def __init__(
+        self,
+        name: str,
+        current: int,
+        peak: int,
+        top: t.List["tracemalloc.StatisticDiff"],
+    ) -> None:
+        """Initialize object."""
+        self.name = name
+        self.current = current
+        self.peak = peak
+        self.top = top
+
+
+class MemoryProfiler:
+    """Phase based memory profiler."""
+
+    phases: t.List[Phase]
+
+    def __init__(self, top: int = TOP_N) -> None:
+        """Initialize object.
+
+        :param top: Number of allocation sites to report for every phase.
+        :type top: int
+        """
+        self.top = top
+        self.phases = []
+        self._snapshot: t.Optional["tracemalloc.Snapshot"] = None
+        self._started = False
+
+    def start(self) -> None:
+        """Start tracing."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(FRAMES)
+        self._snapshot = self._take_snapshot()
+        self._reset_peak()
+
+    @staticmethod
+    def _take_snapshot() -> "tracemalloc.Snapshot":
+        """Take a snapshot without the tracemalloc internals."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+
+    @staticmethod
+    def _reset_peak() -> None:
+        """Reset the traced peak, available on python 3.9+."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            reset_peak()
+
+    def mark(self, phase: str) -> None:
+        """
+        Close the current phase.
+
+        :param phase: Name of the phase which just ended.
+        :type phase: str
+        """
+        import tracemalloc  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._take_snapshot()
+        top = snapshot.compare_to(
+            t.cast("tracemalloc.Snapshot", self._snapshot), "lineno"
+        )
+        self.phases.append(
+            Phase(name=phase, current=current, peak=peak, top=top[: self.top])
+        )
+        self._snapshot = snapshot
+        self._reset_peak()
+
+    def stop(self) -> None:
+        """Stop tracing."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        if self._started:
+            tracemalloc.stop()
+        self._started = False
+
+    def report(self) -> str:
+        """Render the report."""
+        lines = ["Memory profile", ""]
+        lines.append(f"{'Phase':<40}{'Current':>14}{'Peak':>14}")
+        for phase in self.phases:
+            lines.append(
+                f"{phase.name:<40}"
+                f"{_format_size(phase.current):>14}"
+                f"{_format_size(phase.peak):>14}"
+            )
+            for stat in phase.top:
+                if stat.size_diff == 0:
+                    continue
+                frame = stat.traceback[0]
+                lines.append(
+                    f"    {frame.filename}:{frame.lineno}"
+                    f" {_format_size(stat.size_diff)} in {stat.count_diff} blocks"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write(self, target: Target) -> None:
+        """
+        Write the report.
+
+        :param target: Path of the report file, `True` or `"-"` for stderr.
+        :type target: t.Union[bool, str, Path]
+        """
+        report = self.report()
+        if target is True or str(target) in ("-", "1", "stderr"):
+            sys.stderr.write(report)
+            return
+        Path(t.cast(str, target)).write_text(report, encoding="utf-8")
+
+
+_profiler: t.Optional[MemoryProfiler] = None
+_listeners: t.List[t.Callable[[str], None]] = []
+
+
+def get_target(target: Target) -> Target:
+    """Resolve the report target from the argument or the environment."""
+    if target is None or target is False:
+        return os.environ.get(ENV_VAR) or None
+    return target
+
+
+def start() -> MemoryProfiler:
+    """Start the memory profiler for an invocation."""
+    global _profiler  # pylint: disable=global-statement
+    _profiler = MemoryProfiler()
+    _profiler.start()
+    return _profiler
+
+
+def stop() -> t.Optional[MemoryProfiler]:
+    """Stop the active memory profiler."""
+    global _profiler  # pylint: disable=global-statement
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def mark(phase: str) -> None:
+    """
+    Mark a phase boundary, no-op unless the profiler or a listener is active.
+
+    :param phase: Name of the phase which just ended.
+    :type phase: str
+    """
+    if _profiler is not None:
+        _profiler.mark(phase=phase)
+    for listener in _listeners:
+        listener(phase)
+
+
+def add_listener(listener: t.Callable[[str], None]) -> None:
+    """
+    Call a function with the name of every phase which ends.
+
+    :param listener: Function called with the phase name.
+    :type listener: t.Callable[[str], None]
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener: t.Callable[[str], None]) -> None:
+    """
+    Stop calling a phase listener.
+
+    :param listener: Function added using `add_listener`.
+    :type listener: t.Callable[[str], None]
+    """
+    _listeners.remove(listener)
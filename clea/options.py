@@ -0,0 +1,94 @@
+"""
+Global options.
+
+Global options are available on every command and group, they're parsed
+alongside the command parameters but collected separately and passed down
+the command tree instead of being passed to the function.
+"""
+
+import typing as t
+
+from clea.output import OutputFormat
+from clea.params import Boolean, Choice, Float, Parameter
+from clea.parser import Kwargs
+from clea.schedule import CronParameter, IntervalParameter, Overlap
+
+
+Options = Kwargs
+
+
+def _option(parameter: Parameter, name: str) -> Parameter:
+    """Name a global option."""
+    parameter.name = name
+    return parameter
+
+
+GLOBAL_OPTIONS: t.Tuple[Parameter, ...] = (
+    _option(
+        Choice(
+            OutputFormat,
+            long_flag="--output",
+            help="Output format for the return value",
+        ),
+        name="output",
+    ),
+    _option(
+        Float(long_flag="--timeout", help="Timeout for the invocation in seconds"),
+        name="timeout",
+    ),
+    _option(
+        Boolean(
+            long_flag="--force",
+            help="Run incremental commands even if the inputs are unchanged",
+        ),
+        name="force",
+    ),
+    _option(
+        Boolean(
+            long_flag="--watch",
+            help="Run again whenever the input paths change",
+        ),
+        name="watch",
+    ),
+    _option(
+        IntervalParameter(
+            long_flag="--every",
+            help="Keep running at this interval, eg. 10s, 5m or 1h",
+        ),
+        name="every",
+    ),
+    _option(
+        CronParameter(
+            long_flag="--cron",
+            help="Keep running on the schedule of a cron expression",
+        ),
+        name="cron",
+    ),
+    _option(
+        Choice(
+            Overlap,
+            long_flag="--overlap",
+            default=Overlap.SKIP,
+            help="Skip or queue scheduled runs which are due while running",
+        ),
+        name="overlap",
+    ),
+)
+
+_DEFAULTS = {option.name: option.default for option in GLOBAL_OPTIONS}
+
+
+def get_option(options: t.Optional[Options], name: str) -> t.Any:
+    """
+    Get the value of a global option.
+
+    :param options: Parsed global options.
+    :type options: t.Optional[Options]
+    :param name: Name of the option.
+    :type name: str
+    :return: Parsed value or the default value of the option.
+    :rtype: t.Any
+    """
+    if options is not None and name in options:
+        return options[name]
+    return _DEFAULTS[name]
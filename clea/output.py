@@ -0,0 +1,203 @@
+"""
+Output channels.
+
+This module provides buffered writers which batch many small writes into a
+single write on the underlying stream and renderers for command return values.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import typing as t
+from enum import Enum
+
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+FLUSH_INTERVAL = 0.1
+EXIT_BROKEN_PIPE = 141
+
+Data = t.Union[str, bytes]
+
+
+class OutputFormat(Enum):
+    """Output format for command return values."""
+
+    TEXT = "text"
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+class Writer:
+    """
+    Buffered writer for a standard stream.
+
+    The root context shares its writers with every invocation, the buffer is
+    guarded by a lock so commands running in threads can write concurrently.
+    """
+
+    _chunks: t.List[bytes]
+
+    def __init__(
+        self,
+        stream: str = "stdout",
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        encoding: str = "utf-8",
+    ) -> None:
+        """Initialize object.
+
+        :param stream: Name of the stream on the `sys` module, `stdout` or `stderr`.
+        :type stream: str
+        :param buffer_size: Number of bytes to hold before writing to the stream.
+        :type buffer_size: int
+        :param encoding: Encoding used for string data.
+        :type encoding: str
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self._chunks = []
+        self._size = 0
+        # Reentrant since writes flush while holding the lock
+        self._lock = threading.RLock()
+
+    def write(self, data: Data) -> int:
+        """
+        Write string or bytes.
+
+        :param data: Data to write.
+        :type data: t.Union[str, bytes]
+        :return: Number of bytes buffered.
+        :rtype: int
+        """
+        if isinstance(data, str):
+            data = data.encode(self.encoding)
+        with self._lock:
+            self._chunks.append(data)
+            self._size += len(data)
+            if self._size >= self.buffer_size:
+                self.flush()
+        return len(data)
+
+    def writelines(self, lines: t.Iterable[Data]) -> None:
+        """
+        Write an iterable of strings or bytes.
+
+        :param lines: Lines to write, line separators are not added.
+        :type lines: t.Iterable[t.Union[str, bytes]]
+        """
+        encoding = self.encoding
+        with self._lock:
+            for line in lines:
+                if isinstance(line, str):
+                    line = line.encode(encoding)
+                self._chunks.append(line)
+                self._size += len(line)
+                if self._size >= self.buffer_size:
+                    self.flush()
+
+    def flush(self) -> None:
+        """Write buffered data to the stream."""
+        if self._size == 0:
+            return
+        with self._lock:
+            if self._size == 0:
+                return
+            data = b"".join(self._chunks)
+            self._chunks = []
+            self._size = 0
+            # Written while holding the lock so flushes keep the write order
+            stream = getattr(sys, self.stream)
+            stream.flush()
+            buffer = getattr(stream, "buffer", None)
+            if buffer is None:
+                stream.write(data.decode(self.encoding))
+                stream.flush()
+                return
+            buffer.write(data)
+            buffer.flush()
+
+
+def _dumps(value: t.Any) -> str:
+    """Serialize value as JSON."""
+    return json.dumps(value, default=str)
+
+
+def _text(value: t.Any) -> str:
+    """Serialize value as text."""
+    if isinstance(value, dict):
+        return "\n".join(f"{key}: {item}" for key, item in value.items())
+    return str(value)
+
+
+def _is_stream(value: t.Any) -> bool:
+    """Check if value should be rendered item by item."""
+    return isinstance(value, t.Iterable) and not isinstance(value, (str, bytes, dict))
+
+
+def render(value: t.Any, output: OutputFormat, writer: Writer) -> None:
+    """
+    Render a command return value.
+
+    Lists and generators are serialized one item at a time, the writer is
+    flushed at most every `FLUSH_INTERVAL` seconds so consumers receive the
+    first items immediately without holding the whole result in memory.
+
+    :param value: The return value.
+    :type value: t.Any
+    :param output: Output format.
+    :type output: OutputFormat
+    :param writer: Writer to render to.
+    :type writer: Writer
+    """
+    if value is None:
+        return
+    serialize = _text if output == OutputFormat.TEXT else _dumps
+    if (
+        not _is_stream(value)
+        or output == OutputFormat.JSON
+        and not isinstance(value, t.Iterator)
+    ):
+        writer.write(serialize(value) + "\n")
+        return
+
+    items = iter(value)
+    is_json = output == OutputFormat.JSON
+    last_flush = 0.0
+    try:
+        if is_json:
+            writer.write("[")
+        for i, item in enumerate(items):
+            if is_json:
+                writer.write(("," if i > 0 else "") + serialize(item))
+            else:
+                writer.write(serialize(item) + "\n")
+            now = time.monotonic()
+            if now - last_flush > FLUSH_INTERVAL:
+                writer.flush()
+                last_flush = now
+        if is_json:
+            writer.write("]\n")
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def silence_stdout() -> int:
+    """
+    Handle a closed stdout pipe.
+
+    Points the stdout file descriptor to `os.devnull` so pending writes at
+    interpreter shutdown don't raise again.
+
+    :return: Exit code for a broken pipe.
+    :rtype: int
+    """
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (OSError, ValueError):
+        pass
+    return EXIT_BROKEN_PIPE
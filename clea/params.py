@@ -1,6 +1,10 @@
 """Parameter definition."""
 
+import difflib
+import itertools
 import typing as t
+from bisect import bisect_left
+from contextvars import ContextVar
 from enum import Enum
 from pathlib import Path
 
@@ -11,6 +15,12 @@ from clea.exceptions import ParsingError
 ParameterType = t.TypeVar("ParameterType")
 
 HELP_COL_LENGTH = 30
+MAX_HELP_CHOICES = 16
+MAX_SUGGESTIONS = 3
+SUGGESTION_WINDOW = 32
+
+# Set to `False` to skip the filesystem checks of path parameters
+check_paths: ContextVar[bool] = ContextVar("check_paths", default=True)
 
 
 class Parameter(t.Generic[ParameterType]):
@@ -19,7 +29,6 @@ class Parameter(t.Generic[ParameterType]):
     _name: t.Optional[str]
     _type: t.Type
 
-    container: t.List
     is_container: bool = False
 
     def __init__(
@@ -105,6 +114,30 @@ class Parameter(t.Generic[ParameterType]):
                 exit_code=1,
             ) from e
 
+    def validate(self, value: t.Any) -> ParameterType:
+        """
+        Check a value passed from python instead of the command line.
+
+        :param value: The value to be checked.
+        :type value: t.Any
+        :return: The checked value.
+        :rtype: ParameterType
+        """
+        if isinstance(value, bool) and self._type is not bool:
+            raise self._invalid(value=value)
+        if isinstance(value, self._type):
+            return value
+        if self._type is float and isinstance(value, int):
+            return t.cast(ParameterType, float(value))
+        raise self._invalid(value=value)
+
+    def _invalid(self, value: t.Any, expected: t.Optional[str] = None) -> ParsingError:
+        """Error for a value of the wrong type."""
+        return ParsingError(
+            message=f"Invalid value for `{self.name}`; Provided value={value!r}; Expected type={expected or self._type.__name__}",
+            exit_code=1,
+        )
+
     def help(self) -> str:
         """Help string."""
         if self.short_flag is not None:
@@ -160,7 +193,6 @@ class Boolean(Parameter[bool]):
 class StringList(Parameter[t.List[str]]):
     """String list parameter."""
 
-    container: t.List[str]
     is_container: bool = True
 
     def __init__(
@@ -172,19 +204,23 @@ class StringList(Parameter[t.List[str]]):
         env: t.Optional[str] = None,
     ) -> None:
         super().__init__(short_flag, long_flag, default or [], help, env)
-        self.container = []
 
     def parse(self, value: t.Any) -> t.List[str]:
         """
-        Parse as t.list of strings.
+        Parse a single occurrence, the parser collects the values of the flag.
 
         :param value: The value to be parsed.
         :type value: t.Any
         :return: The parsed object.
         :rtype: ParameterType
         """
-        self.container.append(str(value))
-        return self.container
+        return [str(value)]
+
+    def validate(self, value: t.Any) -> t.List[str]:
+        """Check a list of strings."""
+        if isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+            return list(value)
+        raise self._invalid(value=value, expected="list of str")
 
     def help(self) -> str:
         if self.short_flag is not None:
@@ -203,9 +239,142 @@ class StringList(Parameter[t.List[str]]):
         return help_string
 
 
+class ChoiceIndex:
+    """Lookup index for choice parameters."""
+
+    def __init__(
+        self,
+        choices: t.Dict[str, Enum],
+        case_sensitive: bool = True,
+        prefix: bool = False,
+    ) -> None:
+        """Initialize object.
+
+        :param choices: Mapping from the choice string to the enum member.
+        :type choices: t.Dict[str, Enum]
+        :param case_sensitive: Match the choices case sensitively.
+        :type case_sensitive: bool
+        :param prefix: Match unique prefixes of the choices.
+        :type prefix: bool
+        """
+        if not case_sensitive:
+            folded: t.Dict[str, Enum] = {}
+            for name, member in choices.items():
+                if folded.setdefault(name.casefold(), member) is not member:
+                    # Folding would merge distinct choices, match them exactly
+                    case_sensitive = True
+                    break
+        self.case_sensitive = case_sensitive
+        self.prefix = prefix
+        self.names = list(choices)
+        self.lookup = {self._key(name): member for name, member in choices.items()}
+        self._originals = {self._key(name): name for name in choices}
+        self._sorted = sorted(self.lookup) if prefix else []
+        self._neighbours: t.Optional[t.Tuple[t.List[str], t.List[str]]] = None
+
+    def _key(self, value: str) -> str:
+        """Normalize a choice string."""
+        return value if self.case_sensitive else value.casefold()
+
+    def find(self, value: str, limit: int = MAX_SUGGESTIONS) -> t.List[Enum]:
+        """
+        Find the members matching the value.
+
+        :param value: Choice string or prefix.
+        :type value: str
+        :param limit: Maximum number of prefix matches to collect.
+        :type limit: int
+        :return: The exact match or the members matching the prefix.
+        :rtype: t.List[Enum]
+        """
+        key = self._key(value)
+        member = self.lookup.get(key)
+        if member is not None:
+            return [member]
+        matches: t.List[Enum] = []
+        if not self.prefix:
+            return matches
+        for name in self._sorted[bisect_left(self._sorted, key) :]:
+            if not name.startswith(key) or len(matches) > limit:
+                break
+            if self.lookup[name] not in matches:
+                matches.append(self.lookup[name])
+        return matches
+
+    def suggest(self, value: str, n: int = MAX_SUGGESTIONS) -> t.List[str]:
+        """
+        Suggest choices close to the value.
+
+        :param value: Invalid choice string.
+        :type value: str
+        :param n: Maximum number of suggestions.
+        :type n: int
+        :return: Closest choices.
+        :rtype: t.List[str]
+        """
+        key = self._key(value)
+        return [
+            self._originals[match]
+            for match in difflib.get_close_matches(key, self._candidates(key), n=n)
+        ]
+
+    def _candidates(self, key: str) -> t.List[str]:
+        """
+        Choices sorted next to the key, by their start and by their end.
+
+        A typo keeps the choice close to the key in at least one of the two
+        orders unless it touches both ends, so only a window around the key
+        is compared instead of every choice.
+        """
+        if len(self.lookup) <= 4 * SUGGESTION_WINDOW:
+            return list(self.lookup)
+        if self._neighbours is None:
+            self._neighbours = (
+                sorted(self.lookup),
+                sorted(name[::-1] for name in self.lookup),
+            )
+        forward, backward = self._neighbours
+        candidates: t.Dict[str, None] = {}
+        for names, probe, step in ((forward, key, 1), (backward, key[::-1], -1)):
+            position = bisect_left(names, probe)
+            start = max(position - SUGGESTION_WINDOW, 0)
+            for name in names[start : position + SUGGESTION_WINDOW]:
+                candidates[name[::step]] = None
+        return list(candidates)
+
+    def format(self, separator: str, limit: int = MAX_HELP_CHOICES) -> str:
+        """Join the choices, truncating large lists."""
+        if len(self.names) <= limit:
+            return separator.join(self.names)
+        more = len(self.names) - limit
+        return separator.join([*self.names[:limit], f"... +{more} more"])
+
+
+def _choice_error(
+    parameter: Parameter, index: ChoiceIndex, value: t.Any, matches: t.List[Enum]
+) -> ParsingError:
+    """Create the parsing error for an invalid choice."""
+    message = f"Error parsing value for {parameter.metavar}; Provided value={value}; "
+    if len(matches) > 1:
+        names = ", ".join(str(member.value) for member in matches)
+        return ParsingError(
+            message=message + f"Value matches multiple choices {names}", exit_code=1
+        )
+    choices = ", ".join(map(repr, index.names[:MAX_HELP_CHOICES]))
+    if len(index.names) > MAX_HELP_CHOICES:
+        choices += f", ... +{len(index.names) - MAX_HELP_CHOICES} more"
+    message += f"Expected value from {{{choices}}}"
+    suggestions = index.suggest(value=str(value))
+    if len(suggestions) > 0:
+        message += f"; Did you mean {', '.join(suggestions)}?"
+    return ParsingError(message=message, exit_code=1)
+
+
 class Choice(Parameter[Enum]):
     """Choice parameter."""
 
+    _index: t.Optional[ChoiceIndex]
+
     def __init__(
         self,
         enum: t.Type[Enum],
@@ -214,9 +383,34 @@ class Choice(Parameter[Enum]):
         default: t.Optional[Enum] = None,
         help: t.Optional[str] = None,  # pylint: disable=redefined-builtin
         env: t.Optional[str] = None,
+        case_sensitive: bool = True,
+        prefix: bool = False,
     ) -> None:
+        """Initialize object.
+
+        :param enum: Enum defining the choices.
+        :type enum: t.Type[Enum]
+        :param case_sensitive: Match the values case sensitively.
+        :type case_sensitive: bool
+        :param prefix: Accept unique prefixes of the values.
+        :type prefix: bool
+        """
         super().__init__(short_flag, long_flag, default, help, env)
         self.enum = enum
+        self.case_sensitive = case_sensitive
+        self.prefix = prefix
+        self._index = None
+
+    @property
+    def index(self) -> ChoiceIndex:
+        """Lookup index over the enum values, built on first use."""
+        if self._index is None:
+            self._index = ChoiceIndex(
+                choices={str(member.value): member for member in self.enum},
+                case_sensitive=self.case_sensitive,
+                prefix=self.prefix,
+            )
+        return self._index
 
     def parse(self, value: t.Any) -> Enum:
         """
@@ -227,13 +421,20 @@ class Choice(Parameter[Enum]):
         :return: The parsed object.
         :rtype: ParameterType
         """
-        try:
-            return self.enum(value=value)
-        except ValueError as e:
-            raise ParsingError(
-                message=f"Error parsing value for {self.metavar}; Provided value={value}; Expected value from {set(map(lambda x:x.value, self.enum))}",
-                exit_code=1,
-            ) from e
+        matches = self.index.find(value=str(value))
+        if len(matches) == 1:
+            return matches[0]
+        raise _choice_error(
+            parameter=self, index=self.index, value=value, matches=matches
+        )
+
+    def validate(self, value: t.Any) -> Enum:
+        """Check an enum member or a value of one."""
+        if isinstance(value, self.enum):
+            return value
+        if isinstance(value, str):
+            return self.parse(value=value)
+        raise self._invalid(value=value, expected=self.enum.__name__)
 
     def help(self) -> str:
         """Help string."""
@@ -247,7 +448,7 @@ class Choice(Parameter[Enum]):
             if self.long_flag is not None:
                 help_string += f"{self.long_flag}"
 
-        choices = "|".join(list(map(lambda x: x.value, self.enum)))
+        choices = self.index.format(separator="|")
         help_string += f"  [{choices}]"
         if self._help is not None:
             str_len = len(help_string)
@@ -264,6 +465,8 @@ class Choice(Parameter[Enum]):
 class ChoiceByFlag(Parameter[Enum]):
     """Choice parameter."""
 
+    _index: t.Optional[ChoiceIndex]
+
     def __init__(
         self,
         enum: t.Type[Enum],
@@ -273,10 +476,17 @@ class ChoiceByFlag(Parameter[Enum]):
     ) -> None:
         super().__init__(None, None, default, help, env)
         self.enum = enum
-        self.flag_to_value = {}
-        for choice in enum:
-            long_flag = "--" + choice.name.lower().replace("_", "-")
-            self.flag_to_value[long_flag] = choice
+        self.flag_to_value = {
+            "--" + choice.name.lower().replace("_", "-"): choice for choice in enum
+        }
+        self._index = None
+
+    @property
+    def index(self) -> ChoiceIndex:
+        """Lookup index over the flags, built on first use."""
+        if self._index is None:
+            self._index = ChoiceIndex(choices=self.flag_to_value)
+        return self._index
 
     def parse(self, value: str) -> Enum:
         """
@@ -287,18 +497,22 @@ class ChoiceByFlag(Parameter[Enum]):
         :return: The parsed object.
         :rtype: ParameterType
         """
-        try:
-            self._default = self.flag_to_value[value]
-            return self._default
-        except (KeyError, ValueError) as e:
-            raise ParsingError(
-                message=f"Error parsing value for {self.metavar}; Provided value={value}; Expected value from {set(map(lambda x:x.value, self.enum))}",
-                exit_code=1,
-            ) from e
+        choice = self.flag_to_value.get(value)
+        if choice is None:
+            raise _choice_error(
+                parameter=self, index=self.index, value=value, matches=[]
+            )
+        return choice
+
+    def validate(self, value: t.Any) -> Enum:
+        """Check an enum member."""
+        if isinstance(value, self.enum):
+            return value
+        raise self._invalid(value=value, expected=self.enum.__name__)
 
     def help(self) -> str:
         """Help string."""
-        help_string = ", ".join(self.flag_to_value)
+        help_string = self.index.format(separator=", ")
         if self._help is not None:
             str_len = len(help_string)
             if str_len < HELP_COL_LENGTH:
@@ -338,6 +552,8 @@ class File(Parameter[Path]):
         :rtype: ParameterType
         """
         path = super().parse(value=value)
+        if not check_paths.get():
+            return path
         flag = self.short_flag or self.long_flag
         exists = path.exists()
         if self.exists and not path.exists():
@@ -354,6 +570,12 @@ class File(Parameter[Path]):
             return path.resolve()
         return path
 
+    def validate(self, value: t.Any) -> Path:
+        """Check a path, runs the same checks as for command line values."""
+        if isinstance(value, (str, Path)):
+            return self.parse(value=value)
+        raise self._invalid(value=value)
+
 
 class Directory(Parameter[Path]):
     """Directory parameter."""
@@ -383,6 +605,8 @@ class Directory(Parameter[Path]):
         :rtype: ParameterType
         """
         path = super().parse(value=value)
+        if not check_paths.get():
+            return path
         flag = self.short_flag or self.long_flag
         exists = path.exists()
         if self.exists and not exists:
@@ -399,6 +623,175 @@ class Directory(Parameter[Path]):
             return path.resolve()
         return path
 
+    def validate(self, value: t.Any) -> Path:
+        """Check a path, runs the same checks as for command line values."""
+        if isinstance(value, (str, Path)):
+            return self.parse(value=value)
+        raise self._invalid(value=value)
+
+
+class Values(t.Generic[ParameterType]):
+    """
+    Values of a variadic parameter.
+
+    Holds a reference to the argument list instead of a copy and converts the
+    tokens every time it is iterated, so the memory used and the time until
+    the first item don't depend on the number of values.
+    """
+
+    def __init__(
+        self,
+        parameter: Parameter[ParameterType],
+        argv: t.Sequence[str],
+        start: int,
+        ended: bool = False,
+    ) -> None:
+        """Initialize object.
+
+        :param parameter: Parameter converting a single token.
+        :type parameter: Parameter
+        :param argv: Argument list.
+        :type argv: t.Sequence[str]
+        :param start: Index of the first value.
+        :type start: int
+        :param ended: Whether the options were ended using `--` before the first value.
+        :type ended: bool
+        """
+        self.parameter = parameter
+        self._argv = argv
+        self._start = start
+        self._ended = ended
+
+    def tokens(self) -> t.Iterator[str]:
+        """Iterate over the raw tokens, skipping the options."""
+        ended = self._ended
+        for arg in itertools.islice(self._argv, self._start, None):
+            if not ended:
+                if arg == "--":
+                    ended = True
+                    continue
+                if arg.startswith("-"):
+                    continue
+            yield arg
+
+    def __iter__(self) -> t.Iterator[ParameterType]:
+        """Iterate over the converted values."""
+        return map(self.parameter.parse, self.tokens())
+
+    def __repr__(self) -> str:
+        """String representation, contains all of the tokens."""
+        return f"Values({list(self.tokens())!r})"
+
+
+class Variadic(Parameter[t.Iterable[t.Any]]):
+    """Positional parameter capturing the remaining positional arguments."""
+
+    def __init__(
+        self,
+        item: Parameter,
+        nargs: str = "*",
+        help: t.Optional[str] = None,  # pylint: disable=redefined-builtin
+    ) -> None:
+        """Initialize object.
+
+        :param item: Parameter converting every value.
+        :type item: Parameter
+        :param nargs: `*` for any number of values, `+` for at least one.
+        :type nargs: str
+        """
+        super().__init__(help=help)
+        if nargs not in ("*", "+"):
+            raise ValueError(f"Invalid nargs `{nargs}`, expected `*` or `+`")
+        self.item = item
+        self.nargs = nargs
+
+    @property
+    def name(self) -> str:
+        """Name"""
+        return t.cast(str, Parameter.name.fget(self))  # type: ignore
+
+    @name.setter
+    def name(self, value: str) -> None:
+        """Name"""
+        self._name = value
+        self.item.name = value
+
+    @property
+    def metavar(self) -> str:
+        """Metavar name"""
+        return f"<{self.name.upper()}... type={self.item._type.__name__}>"
+
+    @property
+    def var(self) -> str:
+        """Var name"""
+        if self.nargs == "*":
+            return f"[{self.name.upper()}...]"
+        return f"{self.name.upper()}..."
+
+    def parse(self, value: t.Any) -> t.Any:
+        """Parse a single value."""
+        return self.item.parse(value=value)
+
+    def values(self, argv: t.Sequence[str], start: int, ended: bool = False) -> Values:
+        """
+        Lazily converted values.
+
+        :param argv: Argument list.
+        :type argv: t.Sequence[str]
+        :param start: Index of the first value.
+        :type start: int
+        :param ended: Whether the options were ended before the first value.
+        :type ended: bool
+        :return: Values converted while iterating.
+        :rtype: Values
+        """
+        return Values(parameter=self.item, argv=argv, start=start, ended=ended)
+
+    def validate(self, value: t.Any) -> t.Iterable[t.Any]:
+        """Check the values lazily."""
+        if isinstance(value, (str, bytes)) or not isinstance(value, t.Iterable):
+            raise self._invalid(value=value, expected="iterable")
+        return map(self.item.validate, value)
+
+
+class Files(Variadic):
+    """Variadic file path parameter."""
+
+    def __init__(
+        self,
+        nargs: str = "*",
+        exists: bool = False,
+        resolve: bool = False,
+        help: t.Optional[str] = None,  # pylint: disable=redefined-builtin
+    ) -> None:
+        """Initialize object.
+
+        :param nargs: `*` for any number of paths, `+` for at least one.
+        :type nargs: str
+        :param exists: Check if the files exist.
+        :type exists: bool
+        :param resolve: Resolve the paths.
+        :type resolve: bool
+        """
+        super().__init__(
+            item=File(exists=exists, resolve=resolve), nargs=nargs, help=help
+        )
+
+
+def get_paths(value: t.Any) -> t.Iterator[Path]:
+    """
+    Iterate over the paths of an argument value.
+
+    :param value: Parsed argument value.
+    :type value: t.Any
+    :return: The value if it is a path, the path values of a variadic parameter.
+    :rtype: t.Iterator[Path]
+    """
+    if isinstance(value, Path):
+        yield value
+    elif isinstance(value, Values) and isinstance(value.parameter, (File, Directory)):
+        yield from value
+
 
 class ContextParameter(Parameter[Context]):
     """Context parameter."""
@@ -2,10 +2,11 @@
 
 import typing as t
 from collections import deque
+from itertools import compress, islice, repeat
 
 from clea.context import Context
 from clea.exceptions import ArgumentsMissing, ExtraArgumentProvided
-from clea.params import ChoiceByFlag, ContextParameter, Parameter
+from clea.params import ChoiceByFlag, ContextParameter, Parameter, Variadic
 
 
 Argv = t.List[str]
@@ -18,17 +19,31 @@ ParsedCommandArgs = t.Tuple[Kwargs, HelpOnly, VersionOnly]
 ParsedGroupArgs = t.Tuple[Kwargs, HelpOnly, VersionOnly, t.Any, Args]
 
 
+def _options(argv: Argv, start: int) -> t.Iterator[str]:
+    """Iterate over the tokens starting with `-`, filtering them without a python loop."""
+    return compress(
+        islice(argv, start, None),
+        map(str.startswith, islice(argv, start, None), repeat("-")),
+    )
+
+
 class BaseParser:
     """Argument parser."""
 
     _args: t.Deque[Parameter]
     _kwargs: t.Dict[str, Parameter]
+    _options: t.Dict[str, Parameter]
+
+    options: Kwargs
+    help_text: t.Optional[str] = None
 
     def __init__(self) -> None:
         """Initialize object."""
 
         self._kwargs = {}
         self._args = deque()
+        self._options = {}
+        self.options = {}
 
     def set_context(self, context: Context) -> None:
         """Set context."""
@@ -60,6 +75,11 @@ class BaseParser:
             and defintion.short_flag is None
             and defintion.long_flag is None
         ):
+            if len(self._args) > 0 and isinstance(self._args[-1], Variadic):
+                raise ValueError(
+                    f"Positional argument `{defintion.name}` can't follow "
+                    f"the variadic argument `{self._args[-1].name}`"
+                )
             self._args.append(defintion)
             return
 
@@ -72,6 +92,23 @@ class BaseParser:
         if defintion.short_flag is not None:
             self._kwargs[defintion.short_flag] = defintion
 
+    def add_option(self, defintion: Parameter) -> None:
+        """
+        Add global option.
+
+        Global options are matched only if the flag is not used by a
+        parameter of the command and are collected in `options` instead of
+        the parsed kwargs.
+        """
+        self._options[t.cast(str, defintion.long_flag)] = defintion
+
+    def get_option_defintion(self, flag: str) -> Parameter:
+        """Get global option defintion or raise if the flag is not defined."""
+        defintion = self._options.get(flag)
+        if defintion is None:
+            raise ExtraArgumentProvided(f"Extra argument provided with flag `{flag}`")
+        return defintion
+
     def parse(  # pylint: disable=unused-argument
         self, argv: Argv, commands: t.Optional[t.Dict[str, t.Any]] = None
     ) -> t.Tuple:
@@ -87,51 +124,89 @@ class CommandParser(BaseParser):
     ) -> ParsedCommandArgs:
         """Parse and return kwargs."""
         kwargs: Kwargs = {}
-        for arg in argv:
-            if arg == "--help":
-                return kwargs, True, False
-            if arg == "--version":
-                return kwargs, False, True
-            if arg.startswith("-"):
-                if "=" in arg:
-                    flag, value = arg.split("=")
-                else:
-                    flag, value = arg, arg
-                definition = self._kwargs.pop(flag, None)
-                if definition is None:
-                    raise ExtraArgumentProvided(
-                        f"Extra argument provided with flag `{flag}`"
-                    )
-                kwargs[definition.name] = definition.parse(value=value)
-                if definition.is_container:
-                    self._kwargs[flag] = definition
-                else:
-                    self._kwargs.pop(definition.short_flag or "", None)
-                    self._kwargs.pop(definition.long_flag or "", None)
-            else:
-                if len(self._args) == 0:
-                    raise ExtraArgumentProvided(f"Extra argument provided `{arg}`")
-                definition = self._args.popleft()
+        ended = False
+        for index, arg in enumerate(argv):
+            if not ended:
+                if arg == "--":
+                    ended = True
+                    continue
+                if arg == "--help":
+                    return kwargs, True, False
+                if arg == "--version":
+                    return kwargs, False, True
+                if arg.startswith("-"):
+                    self._parse_flag(arg=arg, kwargs=kwargs)
+                    continue
+            if len(self._args) == 0:
+                raise ExtraArgumentProvided(f"Extra argument provided `{arg}`")
+            definition = self._args.popleft()
+            if not isinstance(definition, Variadic):
                 kwargs[definition.name] = definition.parse(arg)
+                continue
+            # The remaining positional arguments are converted lazily, only
+            # the options following them need to be parsed now
+            kwargs[definition.name] = definition.values(
+                argv=argv, start=index, ended=ended
+            )
+            if ended:
+                break
+            for option in _options(argv=argv, start=index + 1):
+                if option == "--":
+                    break
+                if option == "--help":
+                    return kwargs, True, False
+                if option == "--version":
+                    return kwargs, False, True
+                self._parse_flag(arg=option, kwargs=kwargs)
+            break
+
+        if (
+            len(self._args) == 1
+            and isinstance(self._args[0], Variadic)
+            and self._args[0].nargs == "*"
+        ):
+            definition = self._args.popleft()
+            kwargs[definition.name] = definition.values(argv=argv, start=len(argv))
 
         if len(self._args) > 0:
             self.raise_missing_args()
 
         if len(self._kwargs) > 0:
             for kwarg in self._kwargs.values():
-                if kwarg.name == "version":
-                    continue  # pragma: nocover
+                if kwarg.name == "version" or kwarg.name in kwargs:
+                    continue
                 if kwarg.is_container:
-                    kwargs[kwarg.name] = kwarg.container
+                    kwargs[kwarg.name] = list(kwarg.default or [])
                 else:
                     kwargs[kwarg.name] = kwarg.default
         return kwargs, False, False
 
+    def _parse_flag(self, arg: str, kwargs: Kwargs) -> None:
+        """Parse a flag into the kwargs or the global options."""
+        if "=" in arg:
+            flag, value = arg.split("=")
+        else:
+            flag, value = arg, arg
+        definition = self._kwargs.pop(flag, None)
+        if definition is None:
+            option = self.get_option_defintion(flag=flag)
+            self.options[option.name] = option.parse(value=value)
+            return
+        if definition.is_container:
+            # Values are collected per parse, never on the shared definition
+            kwargs.setdefault(definition.name, []).extend(definition.parse(value=value))
+            self._kwargs[flag] = definition
+        else:
+            kwargs[definition.name] = definition.parse(value=value)
+            self._kwargs.pop(definition.short_flag or "", None)
+            self._kwargs.pop(definition.long_flag or "", None)
+
     def copy(self) -> "CommandParser":
         """Create a copy of the object."""
         parser = CommandParser()
         parser._args = deque(self._args)  # pylint: disable=protected-access
         parser._kwargs = self._kwargs.copy()  # pylint: disable=protected-access
+        parser._options = self._options  # pylint: disable=protected-access
         return parser
 
 
@@ -163,13 +238,16 @@ class GroupParser(BaseParser):
                     flag, value = arg, arg
                 definition = self._kwargs.pop(flag, None)
                 if definition is None:
-                    raise ExtraArgumentProvided(
-                        f"Extra argument provided with flag `{flag}`"
-                    )
-                kwargs[definition.name] = definition.parse(value=value)
+                    option = self.get_option_defintion(flag=flag)
+                    self.options[option.name] = option.parse(value=value)
+                    continue
                 if definition.is_container:
+                    kwargs.setdefault(definition.name, []).extend(
+                        definition.parse(value=value)
+                    )
                     self._kwargs[flag] = definition
                 else:
+                    kwargs[definition.name] = definition.parse(value=value)
                     self._kwargs.pop(definition.short_flag or "", None)
                     self._kwargs.pop(definition.long_flag or "", None)
             else:
@@ -183,10 +261,10 @@ class GroupParser(BaseParser):
 
         if len(self._kwargs) > 0:
             for kwarg in self._kwargs.values():
-                if kwarg.name == "version":
-                    continue  # pragma: nocover
+                if kwarg.name == "version" or kwarg.name in kwargs:
+                    continue
                 if kwarg.is_container:
-                    kwargs[kwarg.name] = kwarg.container
+                    kwargs[kwarg.name] = list(kwarg.default or [])
                 else:
                     kwargs[kwarg.name] = kwarg.default
         return kwargs, False, False, sub_command, sub_argv
@@ -196,4 +274,5 @@ class GroupParser(BaseParser):
         parser = GroupParser()
         parser._args = deque(self._args)  # pylint: disable=protected-access
         parser._kwargs = self._kwargs.copy()  # pylint: disable=protected-access
+        parser._options = self._options  # pylint: disable=protected-access
         return parser
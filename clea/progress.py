@@ -0,0 +1,163 @@
+"""
+Progress reporting.
+
+`Progress.update` only increments a counter and checks the clock, rendering
+happens at most `rate` times per second. On a terminal the progress is drawn
+as a single updating line, otherwise it's written as periodic log lines.
+"""
+
+import sys
+import threading
+import time
+import typing as t
+from enum import Enum
+
+
+DEFAULT_RATE = 10.0
+DEFAULT_LOG_INTERVAL = 10.0
+BAR_WIDTH = 20
+
+
+class ProgressMode(Enum):
+    """Rendering mode."""
+
+    TTY = "tty"
+    LOG = "log"
+    DISABLED = "disabled"
+
+
+def _format_time(seconds: float) -> str:
+    """Format seconds as `HH:MM:SS`."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class Progress:
+    """Thread safe progress tracker with rate limited rendering."""
+
+    def __init__(
+        self,
+        total: t.Optional[int] = None,
+        description: str = "",
+        rate: float = DEFAULT_RATE,
+        log_interval: float = DEFAULT_LOG_INTERVAL,
+        mode: t.Optional[ProgressMode] = None,
+        stream: str = "stderr",
+    ) -> None:
+        """Initialize object.
+
+        :param total: Expected number of items, `None` if unknown.
+        :type total: t.Optional[int]
+        :param description: Label for the progress line.
+        :type description: str
+        :param rate: Maximum number of renders per second on a terminal.
+        :type rate: float
+        :param log_interval: Seconds between log lines when not on a terminal.
+        :type log_interval: float
+        :param mode: Rendering mode, detected from the stream if not provided.
+        :type mode: t.Optional[ProgressMode]
+        :param stream: Name of the stream on the `sys` module.
+        :type stream: str
+        """
+        self.total = total
+        self.description = description
+        self.count = 0
+        self.stream = stream
+        if mode is None:
+            isatty = getattr(getattr(sys, stream), "isatty", None)
+            mode = ProgressMode.TTY if isatty and isatty() else ProgressMode.LOG
+        self.mode = mode
+        self._interval = 1.0 / rate if mode == ProgressMode.TTY else log_interval
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._start = time.monotonic()
+        self._next = (
+            float("inf")
+            if mode == ProgressMode.DISABLED
+            else self._start + self._interval
+        )
+
+    def update(self, n: int = 1) -> None:
+        """
+        Advance the progress.
+
+        :param n: Number of items completed.
+        :type n: int
+        """
+        with self._lock:
+            self.count += n
+        if time.monotonic() >= self._next:
+            self.render()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the tracker was created."""
+        return time.monotonic() - self._start
+
+    @property
+    def throughput(self) -> float:
+        """Items per second."""
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> t.Optional[float]:
+        """Estimated seconds left, `None` if unknown."""
+        throughput = self.throughput
+        if self.total is None or throughput == 0:
+            return None
+        return max(self.total - self.count, 0) / throughput
+
+    def line(self) -> str:
+        """Render the progress line."""
+        parts = [self.description] if self.description else []
+        if self.total:
+            ratio = min(self.count / self.total, 1.0)
+            if self.mode == ProgressMode.TTY:
+                filled = int(ratio * BAR_WIDTH)
+                parts.append("[" + "#" * filled + "." * (BAR_WIDTH - filled) + "]")
+            parts.append(f"{ratio:4.0%} {self.count}/{self.total}")
+        else:
+            parts.append(str(self.count))
+        parts.append(f"{self.throughput:.1f} it/s")
+        eta = self.eta
+        if eta is not None:
+            parts.append(f"ETA {_format_time(eta)}")
+        else:
+            parts.append(f"elapsed {_format_time(self.elapsed)}")
+        return " ".join(parts)
+
+    def render(self) -> None:
+        """Render the progress if no other thread is rendering."""
+        if self.mode == ProgressMode.DISABLED:
+            return
+        if not self._render_lock.acquire(blocking=False):
+            return
+        try:
+            self._next = time.monotonic() + self._interval
+            stream = getattr(sys, self.stream)
+            if self.mode == ProgressMode.TTY:
+                stream.write("\r\033[K" + self.line())
+            else:
+                stream.write(self.line() + "\n")
+            stream.flush()
+        finally:
+            self._render_lock.release()
+
+    def close(self) -> None:
+        """Render the final state."""
+        if self.mode == ProgressMode.DISABLED:
+            return
+        self.render()
+        if self.mode == ProgressMode.TTY:
+            getattr(sys, self.stream).write("\n")
+        self._next = float("inf")
+
+    def __enter__(self) -> "Progress":
+        """Enter context."""
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        """Exit context."""
+        self.close()
@@ -5,6 +5,9 @@ import io
 import sys
 import typing as t
 
+import clea.memory as memory
+import clea.sampling as sampling
+from clea.capture import DEFAULT_SPOOL_SIZE, CapturedOutput, Spool, get_spool_size
 from clea.exceptions import CleaException
 from clea.parser import Argv
 from clea.wrappers import BaseWrapper
@@ -13,20 +16,27 @@ from clea.wrappers import BaseWrapper
 class Result:  # pylint: disable=too-few-public-methods
     """Run result."""
 
+    stderr: CapturedOutput
+    stdout: CapturedOutput
+
     def __init__(
         self,
         exit_code: int,
-        stderr: str,
-        stdout: str,
+        stderr: t.Union[str, CapturedOutput],
+        stdout: t.Union[str, CapturedOutput],
     ) -> None:
         """Initialize object."""
         self.exit_code = exit_code
-        self.stderr = stderr
-        self.stdout = stdout
+        self.stderr = (
+            CapturedOutput.from_text(stderr) if isinstance(stderr, str) else stderr
+        )
+        self.stdout = (
+            CapturedOutput.from_text(stdout) if isinstance(stdout, str) else stdout
+        )
 
 
 def _run(cli: BaseWrapper, argv: Argv) -> Result:
-    """Run CLI application."""
+    """Run CLI application, flush the output and close the context resources."""
     try:
         return Result(
             exit_code=cli.invoke(argv=argv, isolated=False),
@@ -39,29 +49,142 @@ def _run(cli: BaseWrapper, argv: Argv) -> Result:
             stderr=e.message,
             stdout="",
         )
+    finally:
+        if cli.context is not None:
+            cli.context.flush()
+            cli.context.close()
+
+
+def _run_profiled(
+    cli: BaseWrapper,
+    argv: Argv,
+    target: memory.Target = None,
+    cpu_target: memory.Target = None,
+    frequency: int = sampling.DEFAULT_FREQUENCY,
+) -> Result:
+    """Run CLI application, profiling memory and CPU usage if report targets are set."""
+    with sampling.profile(target=cpu_target, frequency=frequency):
+        if target is None:
+            return _run(cli=cli, argv=argv)
+        profiler = memory.start()
+        try:
+            return _run(cli=cli, argv=argv)
+        finally:
+            memory.stop()
+            profiler.write(target=target)
+
+
+def _capture(spool_size: int) -> io.TextIOWrapper:
+    """Create a capture stream which spills to a temporary file beyond the size."""
+    return io.TextIOWrapper(
+        t.cast(t.BinaryIO, Spool(max_size=spool_size)),
+        encoding="utf-8",
+        newline="",
+    )
+
 
+def _captured(stream: io.TextIOWrapper) -> CapturedOutput:
+    """Flush the capture stream and read it lazily."""
+    return t.cast(Spool, stream.detach()).output()
 
-def _run_isolated(cli: BaseWrapper, argv: Argv) -> Result:
+
+@contextlib.contextmanager
+def _isolate(cli: BaseWrapper) -> t.Generator:
+    """Mark the context of the CLI as isolated."""
+    context = cli.context
+    if context is None:
+        yield
+        return
+    isolated, context.isolated = context.isolated, True
+    try:
+        yield
+    finally:
+        context.isolated = isolated
+
+
+def _run_isolated(
+    cli: BaseWrapper,
+    argv: Argv,
+    target: memory.Target = None,
+    cpu_target: memory.Target = None,
+    frequency: int = sampling.DEFAULT_FREQUENCY,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+) -> Result:
     """Run CLI application isolated."""
-    stdout_ctx = contextlib.redirect_stdout(new_target=io.StringIO())
-    stderr_ctx = contextlib.redirect_stderr(new_target=io.StringIO())
-    with stderr_ctx as stderr, stdout_ctx as stdout:
-        result = _run(cli=cli, argv=argv)
-        return Result(
-            exit_code=result.exit_code,
-            stdout=stdout.getvalue(),
-            stderr=(stderr.getvalue() + result.stderr),
+    stdout_ctx = contextlib.redirect_stdout(new_target=_capture(spool_size))
+    stderr_ctx = contextlib.redirect_stderr(new_target=_capture(spool_size))
+    with stderr_ctx as stderr, stdout_ctx as stdout, _isolate(cli=cli):
+        result = _run_profiled(
+            cli=cli,
+            argv=argv,
+            target=target,
+            cpu_target=cpu_target,
+            frequency=frequency,
         )
+    stderr.write(result.stderr.read())
+    return Result(
+        exit_code=result.exit_code,
+        stdout=_captured(stream=stdout),
+        stderr=_captured(stream=stderr),
+    )
 
 
 def run(
     cli: BaseWrapper,
     argv: t.Optional[Argv] = None,
     isolated: bool = False,
+    profile_memory: memory.Target = None,
+    profile_cpu: memory.Target = None,
+    profile_frequency: t.Optional[int] = None,
+    spool_size: t.Optional[int] = None,
 ) -> Result:
-    """Run the command line utility."""
+    """Run the command line utility.
+
+    :param cli: The command or group to run.
+    :type cli: BaseWrapper
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+    :type argv: t.Optional[Argv]
+    :param isolated: Capture the output and return it on the result.
+    :type isolated: bool
+    :param profile_memory: Report memory usage per phase, `True` for stderr or a
+        file path. Can also be enabled using the `CLEA_PROFILE_MEMORY` env var.
+    :type profile_memory: t.Union[bool, str, Path, None]
+    :param profile_cpu: Sample the stack of the main thread, `True` for a summary
+        on stderr or a file path to also write the stacks in the collapsed
+        flamegraph format. Can also be enabled using the `CLEA_PROFILE_CPU` env var.
+    :type profile_cpu: t.Union[bool, str, Path, None]
+    :param profile_frequency: Samples per second of CPU time, defaults to 100 or
+        the `CLEA_PROFILE_FREQUENCY` env var.
+    :type profile_frequency: t.Optional[int]
+    :param spool_size: Bytes of captured output held in memory for each stream
+        when running isolated, the output is moved to a temporary file beyond.
+        Defaults to 8 MiB or the `CLEA_SPOOL_SIZE` env var.
+    :type spool_size: t.Optional[int]
+    :return: Run result.
+    :rtype: Result
+    """
     argv = argv if argv is not None else sys.argv[1:].copy()
-    result = _run_isolated(cli=cli, argv=argv) if isolated else _run(cli=cli, argv=argv)
+    target = memory.get_target(target=profile_memory)
+    cpu_target = sampling.get_target(target=profile_cpu)
+    frequency = sampling.get_frequency(frequency=profile_frequency)
+    result = (
+        _run_isolated(
+            cli=cli,
+            argv=argv,
+            target=target,
+            cpu_target=cpu_target,
+            frequency=frequency,
+            spool_size=get_spool_size(size=spool_size),
+        )
+        if isolated
+        else _run_profiled(
+            cli=cli,
+            argv=argv,
+            target=target,
+            cpu_target=cpu_target,
+            frequency=frequency,
+        )
+    )
     if not isolated:
         if result.stderr != "":  # pragma: nocover
             sys.stderr.write(result.stderr + "\n")
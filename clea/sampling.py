@@ -0,0 +1,192 @@
+"""
+Sampling CPU profiler.
+
+When enabled through `clea.runner.run`, a `SIGPROF` interval timer
+interrupts the process at a fixed frequency of CPU time and the stack of the
+main thread is recorded. Identical stacks are counted instead of stored, so
+the overhead of a sample does not depend on the length of the run. The
+stacks are written in the collapsed format read by flamegraph tools, eg.
+`flamegraph.pl` or speedscope, and a summary of the functions with the most
+samples is written to stderr.
+"""
+
+import contextlib
+import os
+import signal
+import sys
+import threading
+import types
+import typing as t
+from pathlib import Path
+
+from clea.memory import Target
+
+
+ENV_VAR = "CLEA_PROFILE_CPU"
+FREQUENCY_ENV_VAR = "CLEA_PROFILE_FREQUENCY"
+DEFAULT_FREQUENCY = 100
+TOP_N = 10
+
+Stack = t.Tuple[types.CodeType, ...]
+
+
+def _label(code: types.CodeType) -> str:
+    """Flamegraph label for a code object."""
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the main thread."""
+
+    stacks: t.Dict[Stack, int]
+
+    def __init__(self, frequency: int = DEFAULT_FREQUENCY) -> None:
+        """Initialize object.
+
+        :param frequency: Samples per second of CPU time.
+        :type frequency: int
+        """
+        if frequency <= 0:
+            raise ValueError(f"Invalid sampling frequency `{frequency}`")
+        self.frequency = frequency
+        self.stacks = {}
+        self.samples = 0
+        self._previous: t.Any = None
+
+    @staticmethod
+    def available() -> bool:
+        """Check if the timer signal can be used."""
+        return (
+            hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def _sample(self, signum: int, frame: t.Optional[types.FrameType]) -> None:
+        """Record the interrupted stack, innermost frame first."""
+        del signum
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        key = tuple(stack)
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+        self.samples += 1
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        interval = 1.0 / self.frequency
+        signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def collapsed(self) -> str:
+        """
+        Render the stacks in the collapsed format.
+
+        :return: One line per stack, frames from the outermost to the innermost
+            separated by `;` followed by the number of samples.
+        :rtype: str
+        """
+        labels: t.Dict[types.CodeType, str] = {}
+        lines = []
+        for stack, count in self.stacks.items():
+            frames = []
+            for code in reversed(stack):
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _label(code).replace(";", ":")
+                frames.append(label)
+            lines.append(f"{';'.join(frames)} {count}")
+        lines.sort()
+        return "\n".join(lines) + "\n"
+
+    def top(self, n: int = TOP_N) -> t.List[t.Tuple[str, int, int]]:
+        """
+        Functions with the most samples.
+
+        :param n: Number of functions.
+        :type n: int
+        :return: Label, number of samples with the function running and with
+            the function on the stack.
+        :rtype: t.List[t.Tuple[str, int, int]]
+        """
+        own: t.Dict[types.CodeType, int] = {}
+        total: t.Dict[types.CodeType, int] = {}
+        for stack, count in self.stacks.items():
+            if len(stack) == 0:
+                continue  # pragma: nocover
+            own[stack[0]] = own.get(stack[0], 0) + count
+            for code in set(stack):
+                total[code] = total.get(code, 0) + count
+        ranked = sorted(total, key=lambda code: (-own.get(code, 0), -total[code]))
+        return [(_label(code), own.get(code, 0), total[code]) for code in ranked[:n]]
+
+    def report(self, n: int = TOP_N) -> str:
+        """Render the summary."""
+        lines = [
+            f"CPU profile, {self.samples} samples at {self.frequency} Hz",
+            "",
+            f"{'Self':>8}{'Total':>8}  Function",
+        ]
+        samples = max(self.samples, 1)
+        for label, own, total in self.top(n=n):
+            lines.append(f"{own / samples:>8.1%}{total / samples:>8.1%}  {label}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, target: Target) -> None:
+        """
+        Write the summary to stderr and the collapsed stacks to the target.
+
+        :param target: Path of the collapsed stacks file, `True` or `"-"` to
+            only write the summary.
+        :type target: t.Union[bool, str, Path]
+        """
+        sys.stderr.write(self.report())
+        if target is True or str(target) in ("-", "1", "stderr"):
+            return
+        Path(t.cast(str, target)).write_text(self.collapsed(), encoding="utf-8")
+
+
+def get_target(target: Target) -> Target:
+    """Resolve the output target from the argument or the environment."""
+    if target is None or target is False:
+        return os.environ.get(ENV_VAR) or None
+    return target
+
+
+def get_frequency(frequency: t.Optional[int]) -> int:
+    """Resolve the sampling frequency from the argument or the environment."""
+    if frequency is not None:
+        return frequency
+    return int(os.environ.get(FREQUENCY_ENV_VAR) or DEFAULT_FREQUENCY)
+
+
+@contextlib.contextmanager
+def profile(target: Target, frequency: int = DEFAULT_FREQUENCY) -> t.Generator:
+    """
+    Sample the enclosed block, no-op unless a target is set.
+
+    :param target: Path of the collapsed stacks file, `True` or `"-"` to only
+        write the summary to stderr.
+    :type target: t.Union[bool, str, Path, None]
+    :param frequency: Samples per second of CPU time.
+    :type frequency: int
+    """
+    if target is None:
+        yield None
+        return
+    profiler = SamplingProfiler(frequency=frequency)
+    if not profiler.available():
+        sys.stderr.write("CPU profiling is only available on the main thread\n")
+        yield None
+        return
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(target=target)
@@ -0,0 +1,391 @@
+"""
+Scheduled runs.
+
+With the global `--every` or `--cron` options a command stays in the same
+process and runs on schedule, reusing the parsed arguments and the resources
+provided on the context. Due times are derived from the previous due time
+rather than the end of the previous run so slow runs don't make the schedule
+drift. Runs which come due while another run is in progress are skipped or
+queued depending on the `--overlap` policy.
+"""
+
+import re
+import sys
+import time
+import typing as t
+from collections import deque
+from datetime import datetime, timedelta
+from enum import Enum
+
+from clea.exceptions import CleaException, ParsingError
+from clea.params import Parameter
+from clea.watch import run_reported
+
+
+DEFAULT_MAX_QUEUE = 16
+MAX_CRON_YEARS = 5
+
+INTERVAL_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+INTERVAL_RE = re.compile(r"^(\d+(?:\.\d*)?|\.\d+)(ms|s|m|h|d)?$")
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+
+class Overlap(Enum):
+    """Policy for runs which come due while another run is in progress."""
+
+    SKIP = "skip"
+    QUEUE = "queue"
+
+
+def parse_interval(value: str) -> float:
+    """
+    Parse an interval like `500ms`, `10s`, `5m`, `1.5h` or `1d`.
+
+    :param value: Interval, a number without a unit is in seconds.
+    :type value: str
+    :return: Interval in seconds.
+    :rtype: float
+    """
+    match = INTERVAL_RE.match(value.strip())
+    if match is None:
+        raise ValueError(
+            f"Invalid interval `{value}`, expected a number followed by ms, s, m, h or d"
+        )
+    number, unit = match.groups()
+    seconds = float(number) * INTERVAL_UNITS[unit or "s"]
+    if seconds <= 0:
+        raise ValueError(f"Invalid interval `{value}`, expected a positive duration")
+    return seconds
+
+
+def _parse_field(expression: str, name: str, low: int, high: int) -> t.Set[int]:
+    """Parse a single cron field."""
+    values: t.Set[int] = set()
+    for part in expression.split(","):
+        span, slash, step = part.partition("/")
+        try:
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                first, last = span.split("-", 1)
+                start, end = int(first), int(last)
+            else:
+                start = int(span)
+                end = high if slash else start
+            every = int(step) if slash else 1
+        except ValueError as e:
+            raise ValueError(f"Invalid {name} field `{expression}`") from e
+        if not low <= start <= end <= high or every < 1:
+            raise ValueError(
+                f"Invalid {name} field `{expression}`, expected values from {low} to {high}"
+            )
+        values.update(range(start, end + 1, every))
+    return values
+
+
+class Cron:
+    """Cron expression with the five standard fields."""
+
+    def __init__(self, expression: str) -> None:
+        """Initialize object.
+
+        :param expression: Minute, hour, day of month, month and day of week
+            fields or one of `@hourly`, `@daily`, `@weekly`, `@monthly` and
+            `@yearly`.
+        :type expression: str
+        """
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(
+                f"Invalid cron expression `{expression}`, expected 5 fields"
+            )
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            self.weekdays,
+        ) = (
+            _parse_field(field, name, low, high)
+            for field, (name, low, high) in zip(fields, CRON_FIELDS)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        # Like cron, if both day fields are restricted either of them can match
+        self._any_day = fields[2] != "*" and fields[4] != "*"
+        self.next_after(datetime.now())
+
+    def _day_matches(self, moment: datetime) -> bool:
+        """Check the day of month and day of week fields."""
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Get the first matching minute after the given time.
+
+        :param moment: Local time.
+        :type moment: datetime
+        :return: Local time of the next run.
+        :rtype: datetime
+        """
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + MAX_CRON_YEARS
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression `{self.expression}` never matches")
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<cron '{self.expression}'>"
+
+
+class IntervalParameter(Parameter[float]):
+    """Interval in seconds, parsed from values like `10s`."""
+
+    def parse(self, value: t.Any) -> float:
+        """Parse the interval."""
+        try:
+            return parse_interval(str(value))
+        except ValueError as e:
+            raise ParsingError(message=str(e), exit_code=1) from e
+
+
+class CronParameter(Parameter[Cron]):
+    """Cron expression."""
+
+    def parse(self, value: t.Any) -> Cron:
+        """Parse the cron expression."""
+        try:
+            return Cron(str(value))
+        except ValueError as e:
+            raise ParsingError(message=str(e), exit_code=1) from e
+
+
+class IntervalSchedule:
+    """Runs at fixed intervals, starting immediately."""
+
+    def __init__(self, interval: float) -> None:
+        """Initialize object.
+
+        :param interval: Seconds between the due times.
+        :type interval: float
+        """
+        self.interval = interval
+
+    def first(self, now: float) -> float:
+        """Monotonic time of the first run."""
+        return now
+
+    def next(self, previous: float) -> float:
+        """Monotonic time of the run after the one due at `previous`."""
+        return previous + self.interval
+
+
+class CronSchedule:
+    """Runs at the minutes matching a cron expression."""
+
+    def __init__(self, cron: Cron) -> None:
+        """Initialize object.
+
+        :param cron: Cron expression.
+        :type cron: Cron
+        """
+        self.cron = cron
+
+    @staticmethod
+    def _to_monotonic(moment: datetime) -> float:
+        """Convert local time to monotonic time."""
+        return time.monotonic() + moment.timestamp() - time.time()
+
+    @staticmethod
+    def _to_local(value: float) -> datetime:
+        """Convert monotonic time to local time."""
+        return datetime.fromtimestamp(time.time() + value - time.monotonic())
+
+    def first(self, now: float) -> float:
+        """Monotonic time of the first run."""
+        return self._to_monotonic(self.cron.next_after(self._to_local(now)))
+
+    def next(self, previous: float) -> float:
+        """Monotonic time of the run after the one due at `previous`."""
+        # Round to the minute the previous run was due at, converting between
+        # the clocks is not exact
+        moment = self._to_local(previous) + timedelta(seconds=30)
+        return self._to_monotonic(self.cron.next_after(moment))
+
+
+Schedule = t.Union[IntervalSchedule, CronSchedule]
+
+
+def get_schedule(
+    every: t.Optional[float] = None,
+    cron: t.Optional[Cron] = None,
+) -> t.Optional[Schedule]:
+    """
+    Get the schedule selected by the global options.
+
+    :param every: Interval in seconds.
+    :type every: t.Optional[float]
+    :param cron: Cron expression.
+    :type cron: t.Optional[Cron]
+    :return: Schedule or `None` if the command should run once.
+    :rtype: t.Optional[Schedule]
+    """
+    if every is not None and cron is not None:
+        raise CleaException(
+            message="Use either `--every` or `--cron`, not both", exit_code=1
+        )
+    if every is not None:
+        return IntervalSchedule(interval=every)
+    if cron is not None:
+        return CronSchedule(cron=cron)
+    return None
+
+
+class RunStats:  # pylint: disable=too-many-instance-attributes
+    """Statistics of the scheduled runs."""
+
+    def __init__(self) -> None:
+        """Initialize object."""
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_exit_code: t.Optional[int] = None
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.max_lag = 0.0
+
+    def record(self, exit_code: int, duration: float, lag: float) -> None:
+        """
+        Record a finished run.
+
+        :param exit_code: Exit code of the run.
+        :type exit_code: int
+        :param duration: Seconds the run took.
+        :type duration: float
+        :param lag: Seconds between the due time and the start of the run.
+        :type lag: float
+        """
+        self.runs += 1
+        self.failures += int(exit_code != 0)
+        self.last_exit_code = exit_code
+        self.last_duration = duration
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.max_lag = max(self.max_lag, lag)
+
+    @property
+    def mean_duration(self) -> float:
+        """Mean duration of the runs in seconds."""
+        return self.total_duration / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Statistics as a dictionary."""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_exit_code": self.last_exit_code,
+            "last_duration": self.last_duration,
+            "mean_duration": self.mean_duration,
+            "max_duration": self.max_duration,
+            "max_lag": self.max_lag,
+        }
+
+    def render(self) -> str:
+        """One line summary."""
+        return (
+            f"Scheduled runs: {self.runs} ({self.failures} failed, "
+            f"{self.skipped} skipped), duration mean {self.mean_duration * 1000:.1f} ms "
+            f"max {self.max_duration * 1000:.1f} ms, max lag {self.max_lag * 1000:.1f} ms"
+        )
+
+
+def run_scheduled(  # pylint: disable=too-many-arguments
+    call: t.Callable[[], int],
+    schedule: Schedule,
+    overlap: Overlap = Overlap.SKIP,
+    runs: t.Optional[int] = None,
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    stats: t.Optional[RunStats] = None,
+) -> int:
+    """
+    Run on schedule until interrupted.
+
+    :param call: Callable which runs the command and returns the exit code.
+    :type call: t.Callable[[], int]
+    :param schedule: Schedule providing the due times.
+    :type schedule: Schedule
+    :param overlap: What to do with runs which come due during another run.
+    :type overlap: Overlap
+    :param runs: Stop after this many runs, runs until interrupted if `None`.
+    :type runs: t.Optional[int]
+    :param max_queue: Maximum number of queued runs with `Overlap.QUEUE`,
+        older runs are skipped once the queue is full.
+    :type max_queue: int
+    :param stats: Statistics object to update, a new one is used if `None`.
+    :type stats: t.Optional[RunStats]
+    :return: Exit code of the last run.
+    :rtype: int
+    """
+    stats = stats if stats is not None else RunStats()
+    backlog = max_queue if overlap == Overlap.QUEUE else 0
+    queue: t.Deque[float] = deque()
+    upcoming = schedule.first(now=time.monotonic())
+    exit_code = 0
+    try:
+        while runs is None or stats.runs < runs:
+            if queue:
+                due = queue.popleft()
+            else:
+                due, upcoming = upcoming, schedule.next(previous=upcoming)
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            start = time.monotonic()
+            exit_code = run_reported(call=call)
+            end = time.monotonic()
+            stats.record(exit_code=exit_code, duration=end - start, lag=start - due)
+            while upcoming <= end:
+                queue.append(upcoming)
+                upcoming = schedule.next(previous=upcoming)
+                if len(queue) > backlog:
+                    queue.popleft()
+                    stats.skipped += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stderr.write(stats.render() + "\n")
+    return exit_code
@@ -0,0 +1,183 @@
+"""
+Interactive shell.
+
+This module provides a REPL which keeps a command tree loaded between
+invocations, so imports, context values and open resources are reused. The
+commands share a child context for the whole session, values set by one
+command stay visible to the next ones until the shell exits.
+"""
+
+import contextlib
+import shlex
+import sys
+import time
+import traceback
+import typing as t
+from pathlib import Path
+
+from clea.exceptions import CleaException
+from clea.parser import Argv
+
+
+if t.TYPE_CHECKING:  # pragma: nocover
+    from clea.wrappers import BaseWrapper, Group
+
+
+EXIT_COMMANDS = ("exit", "quit")
+
+
+class Shell:
+    """Interactive shell for a command group."""
+
+    def __init__(
+        self,
+        cli: "Group",
+        prompt: t.Optional[str] = None,
+        history: t.Optional[Path] = None,
+        timed: bool = False,
+    ) -> None:
+        """Initialize object.
+
+        :param cli: The group to dispatch commands to.
+        :type cli: Group
+        :param prompt: Prompt string, defaults to `<name> > `.
+        :type prompt: t.Optional[str]
+        :param history: Path to the readline history file.
+        :type history: t.Optional[Path]
+        :param timed: Report wall time for every command.
+        :type timed: bool
+        """
+        self.cli = cli
+        self.prompt = prompt or f"{cli.name} > "
+        self.history = history
+        self.timed = timed
+        self._readline: t.Any = None
+        self.context = cli.context.child() if cli.context is not None else None
+
+    def _resolve(self, argv: Argv) -> "BaseWrapper":
+        """Resolve the deepest wrapper for the given tokens."""
+        wrapper: "BaseWrapper" = self.cli
+        for arg in argv:
+            children = getattr(wrapper, "_children", {})
+            if arg not in children:
+                break
+            wrapper = children[arg]
+        return wrapper
+
+    def candidates(self, line: str, text: str) -> t.List[str]:
+        """
+        Get completion candidates.
+
+        :param line: The line buffer before the word being completed.
+        :type line: str
+        :param text: The word being completed.
+        :type text: str
+        :return: Sorted list of candidates.
+        :rtype: t.List[str]
+        """
+        try:
+            argv = shlex.split(line)
+        except ValueError:
+            return []
+        wrapper = self._resolve(argv=argv)
+        options = ["--help"]
+        options += getattr(wrapper, "_children", {}).keys()
+        options += (
+            flag
+            for flag in wrapper._parser._kwargs  # pylint: disable=protected-access
+            if flag != "--context"
+        )
+        if wrapper is self.cli:
+            options += EXIT_COMMANDS
+        return sorted({option for option in options if option.startswith(text)})
+
+    def complete(self, text: str, state: int) -> t.Optional[str]:
+        """Readline completer."""
+        line = self._readline.get_line_buffer()[: self._readline.get_begidx()]
+        matches = self.candidates(line=line, text=text)
+        if state < len(matches):
+            return matches[state]
+        return None
+
+    def onecmd(self, line: str) -> int:
+        """
+        Run a single line.
+
+        :param line: The line to run.
+        :type line: str
+        :return: Exit code of the command.
+        :rtype: int
+        """
+        argv = shlex.split(line)
+        if len(argv) == 0:
+            return 0
+        start = time.perf_counter()
+        try:
+            exit_code = self.cli.invoke(argv=argv, options={"context": self.context})
+        except CleaException as e:
+            sys.stderr.write(e.message + "\n")
+            exit_code = e.exit_code
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            exit_code = 1
+        if self.timed:
+            elapsed = time.perf_counter() - start
+            sys.stderr.write(f"Finished in {elapsed:.3f}s (exit code {exit_code})\n")
+        return exit_code
+
+    def _setup_readline(self) -> None:
+        """Enable history and completion if readline is available."""
+        try:
+            import readline  # pylint: disable=import-outside-toplevel
+        except ImportError:  # pragma: nocover
+            return
+        self._readline = readline
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(" \t\n")
+        readline.parse_and_bind("tab: complete")
+        if self.history is not None and self.history.exists():
+            readline.read_history_file(self.history)
+
+    def _teardown_readline(self) -> None:
+        """Persist history."""
+        if self._readline is not None and self.history is not None:
+            self._readline.write_history_file(self.history)
+
+    def loop(self) -> int:
+        """
+        Read and run lines until `exit` or EOF.
+
+        :return: Exit code of the last command.
+        :rtype: int
+        """
+        self._setup_readline()
+        exit_code = 0
+        session: t.ContextManager[t.Any] = (
+            self.context if self.context is not None else contextlib.nullcontext()
+        )
+        try:
+            with session:
+                while True:
+                    try:
+                        line = input(self.prompt)
+                    except EOFError:
+                        print()
+                        break
+                    except KeyboardInterrupt:
+                        print()
+                        continue
+                    if line.strip() in EXIT_COMMANDS:
+                        break
+                    try:
+                        exit_code = self.onecmd(line=line)
+                    except ValueError as e:
+                        sys.stderr.write(f"Error parsing line; {e}\n")
+                        exit_code = 1
+                    except KeyboardInterrupt:
+                        print()
+                        exit_code = 130
+        finally:
+            self._teardown_readline()
+            if self.cli.context is not None:
+                self.cli.context.close()
+        return exit_code
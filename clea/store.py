@@ -0,0 +1,145 @@
+"""
+Persistent key value store.
+
+Values are pickled into a SQLite database under the user cache directory,
+the database runs in WAL mode so concurrent invocations can read and write
+it at the same time. Entries can expire, expired entries are ignored on read
+and purged whenever the store is opened.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+from clea.cache import get_cache_dir
+
+
+STORE_FILE = "context.db"
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+"""
+
+
+class Store:
+    """SQLite backed persistent store."""
+
+    _connection: t.Optional[sqlite3.Connection]
+
+    def __init__(self, path: t.Optional[Path] = None) -> None:
+        """Initialize object.
+
+        :param path: Path of the database, defaults to `$XDG_CACHE_HOME/clea/context.db`.
+        :type path: t.Optional[Path]
+        """
+        self.path = path
+        self._connection = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection, opening a new one in a new process."""
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        path = self.path or get_cache_dir() / STORE_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        connection.execute(
+            "DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        )
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def entry(self, key: str) -> t.Optional[t.Tuple[t.Any, t.Optional[float]]]:
+        """
+        Read a value along with its expiry.
+
+        :param key: Key of the entry.
+        :type key: str
+        :return: Stored value and its expiry as a `time.time()` timestamp,
+            `None` if the entry is missing or expired.
+        :rtype: t.Optional[t.Tuple[t.Any, t.Optional[float]]]
+        """
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT value, expires FROM entries WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            return None
+        return pickle.loads(value), expires
+
+    def get(self, key: str, default: t.Any = None) -> t.Any:
+        """
+        Read a value.
+
+        :param key: Key of the entry.
+        :type key: str
+        :param default: Value returned if the entry is missing or expired.
+        :type default: t.Any
+        :return: Stored value.
+        :rtype: t.Any
+        """
+        entry = self.entry(key=key)
+        if entry is None:
+            return default
+        return entry[0]
+
+    def set(self, key: str, value: t.Any, ttl: t.Optional[float] = None) -> None:
+        """
+        Write a value.
+
+        :param key: Key of the entry.
+        :type key: str
+        :param value: Picklable value.
+        :type value: t.Any
+        :param ttl: Time in seconds for which the entry stays valid, `None` means forever.
+        :type ttl: t.Optional[float]
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, data, expires),
+            )
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a value.
+
+        :param key: Key of the entry.
+        :type key: str
+        """
+        with self._lock:
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -0,0 +1,170 @@
+"""
+Argument validation.
+
+`validate` resolves the subcommands and converts every argument exactly like
+an invocation would, but never calls the group callbacks or the command
+functions. The parsers of the tree are built once and reused, so validating
+large batches of argument lists only pays for the parsing.
+"""
+
+import typing as t
+from collections import deque
+
+from clea.exceptions import CleaException
+from clea.graph import GraphCommand, resolve
+from clea.params import Values
+from clea.params import check_paths as _check_paths
+from clea.parser import Argv, Kwargs
+from clea.wrappers import BaseWrapper
+
+
+class ValidationError:
+    """Validation error for an argument list."""
+
+    def __init__(
+        self,
+        index: int,
+        argv: Argv,
+        command: t.Tuple[str, ...],
+        error: CleaException,
+    ) -> None:
+        """Initialize object.
+
+        :param index: Position of the argument list in the validated batch.
+        :type index: int
+        :param argv: The argument list.
+        :type argv: Argv
+        :param command: Names of the commands resolved before the error.
+        :type command: t.Tuple[str, ...]
+        :param error: The raised error.
+        :type error: CleaException
+        """
+        self.index = index
+        self.argv = argv
+        self.command = command
+        self.error = error
+
+    @property
+    def kind(self) -> str:
+        """Name of the error class."""
+        return type(self.error).__name__
+
+    @property
+    def message(self) -> str:
+        """Error message."""
+        return self.error.message
+
+    @property
+    def exit_code(self) -> int:
+        """Exit code the invocation would exit with."""
+        return self.error.exit_code
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Serializable representation."""
+        return {
+            "index": self.index,
+            "argv": self.argv,
+            "command": list(self.command),
+            "kind": self.kind,
+            "message": self.message,
+            "exit_code": self.exit_code,
+        }
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<ValidationError {' '.join(self.command)}: {self.message}>"
+
+
+def _convert(kwargs: Kwargs) -> None:
+    """Convert the lazily converted values of the variadic arguments."""
+    for value in kwargs.values():
+        if isinstance(value, Values):
+            deque(value, maxlen=0)
+
+
+def _parse(cli: BaseWrapper, argv: Argv, command: t.List[str]) -> None:
+    """Resolve and parse the argument list, raising on the first error."""
+    node = cli
+    while True:
+        command.append(node.name)
+        children = getattr(node, "_children", None)
+        if isinstance(node, GraphCommand):
+            resolve(
+                children=node.group._children,  # pylint: disable=protected-access
+                targets=[arg for arg in argv if not arg.startswith("-")],
+            )
+            argv = [arg for arg in argv if arg.startswith("-")]
+        parser = node._parser.copy()  # pylint: disable=protected-access
+        if children is None:
+            kwargs, help_only, version_only = parser.parse(argv=argv)
+            if not (help_only or version_only):
+                _convert(kwargs=kwargs)
+            return
+        kwargs, help_only, version_only, sub_command, sub_argv = parser.parse(
+            argv=argv, commands=children
+        )
+        if help_only or version_only:
+            return
+        _convert(kwargs=kwargs)
+        if sub_command is None:
+            return
+        node, argv = sub_command, sub_argv
+
+
+def _validate(cli: BaseWrapper, argv: Argv, index: int) -> t.Optional[ValidationError]:
+    """Validate a single argument list."""
+    command: t.List[str] = []
+    try:
+        _parse(cli=cli, argv=argv, command=command)
+    except CleaException as e:
+        return ValidationError(index=index, argv=argv, command=tuple(command), error=e)
+    return None
+
+
+def validate(
+    cli: BaseWrapper, argv: Argv, check_paths: bool = True
+) -> t.Optional[ValidationError]:
+    """
+    Validate an argument list without running any command.
+
+    :param cli: The command or group to validate against.
+    :type cli: BaseWrapper
+    :param argv: Command line arguments.
+    :type argv: Argv
+    :param check_paths: Check `File` and `Directory` arguments against the filesystem.
+    :type check_paths: bool
+    :return: The error or `None` if the arguments are valid.
+    :rtype: t.Optional[ValidationError]
+    """
+    token = _check_paths.set(check_paths)
+    try:
+        return _validate(cli=cli, argv=argv, index=0)
+    finally:
+        _check_paths.reset(token)
+
+
+def validate_many(
+    cli: BaseWrapper, argvs: t.Iterable[Argv], check_paths: bool = True
+) -> t.List[ValidationError]:
+    """
+    Validate a batch of argument lists without running any command.
+
+    :param cli: The command or group to validate against.
+    :type cli: BaseWrapper
+    :param argvs: Command line arguments.
+    :type argvs: t.Iterable[Argv]
+    :param check_paths: Check `File` and `Directory` arguments against the filesystem.
+    :type check_paths: bool
+    :return: Errors for the invalid argument lists, in input order.
+    :rtype: t.List[ValidationError]
+    """
+    errors = []
+    token = _check_paths.set(check_paths)
+    try:
+        for index, argv in enumerate(argvs):
+            error = _validate(cli=cli, argv=argv, index=index)
+            if error is not None:
+                errors.append(error)
+    finally:
+        _check_paths.reset(token)
+    return errors
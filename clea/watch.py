@@ -0,0 +1,477 @@
+"""
+Watch mode.
+
+With the global `--watch` option a command runs once and then again every
+time one of its inputs changes, reusing the parsed arguments. The inputs are
+the paths bound to `File` and `Directory` parameters and the glob patterns
+declared on the command. Changes are picked up using inotify on linux and by
+polling elsewhere, the polling backend stats a bounded number of entries per
+interval so large trees don't keep the CPU busy. Bursts of changes are
+debounced into a single run.
+"""
+
+import contextlib
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+import traceback
+import typing as t
+from pathlib import Path
+
+from clea.exceptions import CleaException
+
+
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_INTERVAL = 0.5
+DEFAULT_BATCH_SIZE = 1000
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Target:
+    """A watched location."""
+
+    def __init__(
+        self,
+        root: Path,
+        recursive: bool,
+        pattern: t.Optional[str] = None,
+        path: t.Optional[Path] = None,
+    ) -> None:
+        """Initialize object.
+
+        :param root: Directory to watch.
+        :type root: Path
+        :param recursive: Watch the subdirectories of the root.
+        :type recursive: bool
+        :param pattern: Only match paths matching the glob pattern.
+        :type pattern: t.Optional[str]
+        :param path: Only match this path.
+        :type path: t.Optional[Path]
+        """
+        self.root = root
+        self.recursive = recursive
+        self.pattern = pattern
+        self.path = path
+
+    def match(self, path: Path) -> bool:
+        """Check if a changed path belongs to the target."""
+        if self.path is not None:
+            return path == self.path
+        if self.pattern is not None:
+            return fnmatch.fnmatch(str(path), self.pattern)
+        return True
+
+
+def get_targets(paths: t.Iterable[Path], globs: t.Iterable[str]) -> t.List[Target]:
+    """
+    Create the watch targets.
+
+    Files are watched through their parent directory so editors which
+    replace the file on save are picked up as well.
+
+    :param paths: File and directory paths.
+    :type paths: t.Iterable[Path]
+    :param globs: Glob patterns, relative patterns are resolved against the
+        working directory.
+    :type globs: t.Iterable[str]
+    :return: Watch targets.
+    :rtype: t.List[Target]
+    """
+    targets = []
+    for path in paths:
+        path = path.absolute()
+        if path.is_dir():
+            targets.append(Target(root=path, recursive=True))
+        else:
+            targets.append(Target(root=path.parent, recursive=False, path=path))
+    for pattern in globs:
+        parts = Path(pattern).absolute().parts
+        index = next(
+            (i for i, part in enumerate(parts) if any(c in part for c in "*?[")),
+            len(parts),
+        )
+        if index == len(parts):
+            targets.extend(get_targets(paths=[Path(*parts)], globs=()))
+            continue
+        targets.append(
+            Target(root=Path(*parts[:index]), recursive=True, pattern=str(Path(*parts)))
+        )
+    return targets
+
+
+def _walk(root: Path, recursive: bool) -> t.Iterator[Path]:
+    """List the entries under a directory."""
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        path = Path(entry.path)
+        yield path
+        if recursive and entry.is_dir(follow_symlinks=False):
+            yield from _walk(root=path, recursive=True)
+
+
+class PollingBackend:
+    """Detects changes by comparing the stat results of the watched entries."""
+
+    def __init__(
+        self,
+        targets: t.List[Target],
+        interval: float = DEFAULT_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """Initialize object.
+
+        :param targets: Watch targets.
+        :type targets: t.List[Target]
+        :param interval: Seconds between two polls.
+        :type interval: float
+        :param batch_size: Maximum number of entries to stat on every poll.
+        :type batch_size: int
+        """
+        self.targets = targets
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stats: t.Dict[Path, t.Tuple[int, int]] = {}
+        self._order: t.List[Path] = []
+        self._position = 0
+        for target in targets:
+            self._add(path=target.root)
+            for path in _walk(root=target.root, recursive=target.recursive):
+                if path.is_dir() or target.match(path):
+                    self._add(path=path)
+
+    @staticmethod
+    def _stat(path: Path) -> t.Optional[t.Tuple[int, int]]:
+        """Stat an entry."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _add(self, path: Path) -> None:
+        """Track an entry."""
+        if path in self._stats:
+            return
+        stat = self._stat(path=path)
+        if stat is None:
+            return
+        self._stats[path] = stat
+        self._order.append(path)
+
+    def _rescan(self, directory: Path) -> t.Set[Path]:
+        """List a changed directory, returning the new entries."""
+        added = set()
+        for target in self.targets:
+            if directory != target.root and not (
+                target.recursive and target.root in directory.parents
+            ):
+                continue
+            for path in _walk(root=directory, recursive=False):
+                if path in self._stats or not (path.is_dir() or target.match(path)):
+                    continue
+                self._add(path=path)
+                if not path.is_dir():
+                    added.add(path)
+                    continue
+                if not target.recursive:
+                    continue
+                for child in _walk(root=path, recursive=True):
+                    if child.is_dir() or target.match(child):
+                        self._add(path=child)
+                        if not child.is_dir():
+                            added.add(child)
+        return added
+
+    def poll(self, timeout: float) -> t.Set[Path]:
+        """
+        Wait and stat the next batch of entries.
+
+        :param timeout: Maximum number of seconds to wait.
+        :type timeout: float
+        :return: Changed paths.
+        :rtype: t.Set[Path]
+        """
+        time.sleep(min(timeout, self.interval))
+        changed: t.Set[Path] = set()
+        count = min(self.batch_size, len(self._order))
+        for _ in range(count):
+            if self._position >= len(self._order):
+                self._position = 0
+            path = self._order[self._position]
+            stat = self._stat(path=path)
+            if stat == self._stats[path]:
+                self._position += 1
+                continue
+            if stat is None:
+                del self._stats[path]
+                self._order.pop(self._position)
+                changed.add(path)
+                if len(self._order) == 0:
+                    break
+                continue
+            self._stats[path] = stat
+            self._position += 1
+            if path.is_dir():
+                changed |= self._rescan(directory=path)
+            else:
+                changed.add(path)
+        return {path for path in changed if self._matches(path=path)}
+
+    def _matches(self, path: Path) -> bool:
+        """Check if a changed path belongs to any of the targets."""
+        return any(target.match(path) for target in self.targets)
+
+    def close(self) -> None:
+        """Release resources."""
+
+
+class InotifyBackend:
+    """Detects changes using inotify."""
+
+    def __init__(self, targets: t.List[Target]) -> None:
+        """Initialize object.
+
+        :param targets: Watch targets.
+        :type targets: t.List[Target]
+        """
+        self.targets = targets
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            import ctypes  # pylint: disable=import-outside-toplevel
+
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: t.Dict[int, Path] = {}
+        for target in targets:
+            self._watch(directory=target.root, recursive=target.recursive)
+
+    def _watch(self, directory: Path, recursive: bool) -> None:
+        """Watch a directory."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_MASK)
+        if wd < 0:
+            return
+        self._directories[wd] = directory
+        if not recursive:
+            return
+        for path in _walk(root=directory, recursive=False):
+            if path.is_dir() and not path.is_symlink():
+                self._watch(directory=path, recursive=True)
+
+    def _recursive(self, directory: Path) -> bool:
+        """Check if new subdirectories of a directory should be watched."""
+        return any(
+            target.recursive
+            and (directory == target.root or target.root in directory.parents)
+            for target in self.targets
+        )
+
+    def poll(self, timeout: float) -> t.Set[Path]:
+        """
+        Wait for events.
+
+        :param timeout: Maximum number of seconds to wait.
+        :type timeout: float
+        :return: Changed paths.
+        :rtype: t.Set[Path]
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:  # pragma: nocover
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._directories[wd]
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if self._recursive(directory=directory):
+                    self._watch(directory=path, recursive=True)
+            if any(target.match(path) for target in self.targets):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        """Release resources."""
+        with contextlib.suppress(OSError):
+            os.close(self._fd)
+
+
+def _load_libc() -> t.Any:
+    """Load libc with the inotify functions."""
+    import ctypes  # pylint: disable=import-outside-toplevel
+    import ctypes.util  # pylint: disable=import-outside-toplevel
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("inotify is not available")
+    return libc
+
+
+Backend = t.Union[InotifyBackend, PollingBackend]
+
+
+def get_backend(targets: t.List[Target], polling: bool = False) -> Backend:
+    """
+    Create the change detection backend.
+
+    :param targets: Watch targets.
+    :type targets: t.List[Target]
+    :param polling: Use polling even if inotify is available.
+    :type polling: bool
+    :return: Inotify backend if available, polling backend otherwise.
+    :rtype: Backend
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyBackend(targets=targets)
+        except (OSError, AttributeError):  # pragma: nocover
+            pass
+    return PollingBackend(targets=targets)
+
+
+class Watcher:
+    """Debounced file watcher."""
+
+    def __init__(
+        self,
+        backend: Backend,
+        debounce: float = DEFAULT_DEBOUNCE,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        """Initialize object.
+
+        :param backend: Change detection backend.
+        :type backend: Backend
+        :param debounce: Seconds without changes before a burst is reported.
+        :type debounce: float
+        :param interval: Seconds to wait for changes at a time.
+        :type interval: float
+        """
+        self.backend = backend
+        self.debounce = debounce
+        self.interval = interval
+
+    def wait(self) -> t.Set[Path]:
+        """
+        Wait for changes.
+
+        :return: Paths which changed during the burst.
+        :rtype: t.Set[Path]
+        """
+        changes: t.Set[Path] = set()
+        while len(changes) == 0:
+            changes |= self.backend.poll(timeout=self.interval)
+        while True:
+            more = self.backend.poll(timeout=self.debounce)
+            if len(more) == 0:
+                return changes
+            changes |= more
+
+    def close(self) -> None:
+        """Release resources."""
+        self.backend.close()
+
+
+def run_reported(call: t.Callable[[], int]) -> int:
+    """Run once, reporting errors instead of raising them."""
+    try:
+        return call()
+    except CleaException as e:
+        sys.stderr.write(e.message + "\n")
+        return e.exit_code
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        return 1
+
+
+def watch(
+    call: t.Callable[[], int],
+    paths: t.Iterable[Path],
+    globs: t.Iterable[str] = (),
+    runs: t.Optional[int] = None,
+    debounce: float = DEFAULT_DEBOUNCE,
+    polling: bool = False,
+) -> int:
+    """
+    Run and re-run whenever the inputs change, until interrupted.
+
+    :param call: Callable which runs the command and returns the exit code.
+    :type call: t.Callable[[], int]
+    :param paths: File and directory inputs.
+    :type paths: t.Iterable[Path]
+    :param globs: Extra glob patterns to watch.
+    :type globs: t.Iterable[str]
+    :param runs: Stop after this many runs, runs until interrupted if `None`.
+    :type runs: t.Optional[int]
+    :param debounce: Seconds without changes before re-running.
+    :type debounce: float
+    :param polling: Use polling even if inotify is available.
+    :type polling: bool
+    :return: Exit code of the last run.
+    :rtype: int
+    """
+    targets = get_targets(paths=paths, globs=globs)
+    if len(targets) == 0:
+        raise CleaException(
+            message="Nothing to watch; Pass path arguments or configure `watch` globs",
+            exit_code=1,
+        )
+    watcher = Watcher(
+        backend=get_backend(targets=targets, polling=polling), debounce=debounce
+    )
+    count = 1
+    exit_code = run_reported(call=call)
+    try:
+        while runs is None or count < runs:
+            changes = watcher.wait()
+            sys.stderr.write(
+                f"Detected changes in {len(changes)} path(s), re-running\n"
+            )
+            count += 1
+            exit_code = run_reported(call=call)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return exit_code
@@ -5,13 +5,36 @@ This module provides a Command class that represents a single command implementa
 """
 
 
+import inspect
 import typing as t
 from functools import partial
+from pathlib import Path
 
+import clea.memory as memory
 import clea.params as p
+from clea.cache import Cache, CachePolicy
 from clea.context import Context
+from clea.deadline import enforce, get_deadline, run_coroutine
+from clea.exceptions import (
+    ArgumentsMissing,
+    CleaException,
+    ExtraArgumentProvided,
+    TimeoutExpired,
+)
 from clea.helpers import get_function_metadata
-from clea.parser import Args, Argv, CommandParser, GroupParser, Kwargs
+from clea.incremental import Incremental
+from clea.options import GLOBAL_OPTIONS, Options, get_option
+from clea.output import OutputFormat, Writer, render, silence_stdout
+from clea.parser import (
+    Args,
+    Argv,
+    BaseParser,
+    CommandParser,
+    GroupParser,
+    Kwargs,
+)
+from clea.schedule import RunStats, get_schedule, run_scheduled
+from clea.watch import watch as run_watched
 
 
 Annotations = t.Dict[str, p.Parameter]
@@ -21,7 +44,9 @@ class BaseWrapper:
     """Base command wrapper."""
 
     _f: t.Callable
-    _parser: t.Union[CommandParser, GroupParser]
+    _parser_class: t.Type[BaseParser]
+    _built_parser: t.Optional[BaseParser]
+    _built_parameters: t.Optional[t.Dict[str, t.Tuple[t.Optional[p.Parameter], bool]]]
 
     name: str
     version: t.Optional[str]
@@ -34,13 +59,18 @@ class BaseWrapper:
         name: t.Optional[str] = None,
         version: t.Optional[str] = None,
         parent: t.Optional["Group"] = None,
+        parser: t.Optional[BaseParser] = None,
+        timeout: t.Optional[float] = None,
     ) -> None:
         """Initialize Command object.
 
         :param f: The base function to be called.
         :type f: t.Callable
-        :param parser: The parser object that handles the command line arguments.
+        :param parser: The parser object that handles the command line arguments,
+            built from the function signature on first use if not provided.
         :type parser: Parser
+        :param timeout: Time in seconds the invocation is allowed to take.
+        :type timeout: t.Optional[float]
         :return: None
         """
         self._f = f
@@ -48,6 +78,49 @@ class BaseWrapper:
         self.name = name or f.__name__
         self.version = version
         self.parent = parent
+        self.timeout = timeout
+        self._built_parser = parser
+        self._built_parameters = None
+
+    @property
+    def _parser(self) -> BaseParser:
+        """Parser for the command line arguments, built on first use."""
+        if self._built_parser is None:
+            self._built_parser = self._build_parser()
+        return self._built_parser
+
+    def _build_parser(self) -> BaseParser:
+        """Build the parser from the function signature."""
+        parser = self._parser_class()
+        if self.version:
+            version_param = p.VersionParameter(
+                long_flag="--version",
+                help="Program version",
+            )
+            version_param.name = "version"
+            version_param.default = self.version
+            parser.add(version_param)
+        for option in GLOBAL_OPTIONS:
+            parser.add_option(option)
+        defaults_mapping, annotations = get_function_metadata(f=self._f)
+        for name, annotation in t.cast(t.Dict[str, Annotations], annotations).items():
+            if name == "return":
+                continue
+            if name == "context":
+                context_param = p.ContextParameter()
+                context_param.name = "context"
+                context_param.default = self.context
+                parser.add(defintion=context_param)
+                continue
+            (parameter,) = t.cast(
+                t.Tuple[p.Parameter, ...], getattr(annotation, "__metadata__")
+            )
+            default = defaults_mapping.get(name)
+            if default is not None:
+                parameter.default = default
+            parameter.name = name
+            parser.add(defintion=parameter)
+        return parser
 
     def __call__(self, *args: t.Any, **kwds: t.Any) -> t.Any:
         """Call the base function.
@@ -61,28 +134,191 @@ class BaseWrapper:
         """
         return self._f(*args, **kwds)
 
+    @property
+    def _parameters(self) -> t.Dict[str, t.Tuple[t.Optional[p.Parameter], bool]]:
+        """Parameter defintions by argument name and whether they're required."""
+        if self._built_parameters is None:
+            # Names and defaults are set on the defintions when building the parser
+            self._parser  # pylint: disable=pointless-statement
+            _, annotations = get_function_metadata(f=self._f)
+            parameters: t.Dict[str, t.Tuple[t.Optional[p.Parameter], bool]] = {}
+            for name, annotation in annotations.items():
+                if name == "return":
+                    continue
+                if name == "context":
+                    parameters[name] = (None, False)
+                    continue
+                (parameter,) = t.cast(
+                    t.Tuple[p.Parameter, ...], getattr(annotation, "__metadata__")
+                )
+                parameters[name] = (
+                    parameter,
+                    parameter.default is None
+                    and parameter.short_flag is None
+                    and parameter.long_flag is None
+                    and not isinstance(parameter, p.ChoiceByFlag)
+                    and not (
+                        isinstance(parameter, p.Variadic) and parameter.nargs == "*"
+                    ),
+                )
+            self._built_parameters = parameters
+        return self._built_parameters
+
+    def _bind(self, kwargs: Kwargs, context: t.Optional[Context]) -> Kwargs:
+        """Check python values against the parameter defintions and fill the defaults."""
+        parameters = self._parameters
+        bound: Kwargs = {}
+        missing = []
+        for name, (parameter, required) in parameters.items():
+            if parameter is None:
+                bound[name] = context
+            elif name in kwargs:
+                bound[name] = parameter.validate(value=kwargs[name])
+            elif required:
+                missing.append(name)
+            elif parameter.is_container or isinstance(parameter, p.Variadic):
+                bound[name] = list(parameter.default or [])
+            else:
+                bound[name] = parameter.default
+        if len(missing) > 0:
+            raise ArgumentsMissing(
+                message="Missing value for arguments " + ", ".join(missing),
+                exit_code=1,
+            )
+        extra = [name for name in kwargs if name not in parameters]
+        if len(extra) > 0:
+            raise ExtraArgumentProvided(
+                message="Unknown arguments " + ", ".join(extra), exit_code=1
+            )
+        return bound
+
+    def _call(self, kwargs: Kwargs, context: t.Optional[Context]) -> t.Any:
+        """Call the function within the deadline and flush the output."""
+        inherited = context.deadline if context is not None else None
+        deadline = get_deadline(inherited, self.timeout)
+        if context is not None:
+            context.deadline = deadline
+        try:
+            if inspect.iscoroutinefunction(self._f):
+                return run_coroutine(self(**kwargs), deadline=deadline, name=self.name)
+            if deadline is None:
+                return self._f(**kwargs)
+            with enforce(deadline=deadline, name=self.name):
+                return self._f(**kwargs)
+        finally:
+            if context is not None:
+                context.deadline = inherited
+                context.flush()
+
+    def invoke_with(
+        self,
+        callbacks: bool = False,
+        context: t.Optional[Context] = None,
+        **kwargs: t.Any,
+    ) -> t.Any:
+        """
+        Call the command with python values instead of command line arguments.
+
+        The values are checked against the parameter defintions and the
+        missing optional values are filled with their defaults, no argv is
+        built or parsed. Errors are raised instead of being turned into exit
+        codes.
+
+        :param callbacks: Run the callbacks of the parent groups first, using
+            their default values.
+        :type callbacks: bool
+        :param context: Context for the invocation, defaults to a child of the
+            context of the command.
+        :type context: t.Optional[Context]
+        :param kwargs: Values for the arguments of the function.
+        :type kwargs: t.Any
+        :return: The return value of the function.
+        :rtype: t.Any
+        """
+        if context is None and self.context is not None:
+            with self.context.child() as scoped:
+                return self.invoke_with(callbacks=callbacks, context=scoped, **kwargs)
+        if callbacks:
+            parents = []
+            parent = self.parent
+            while parent is not None:
+                parents.append(parent)
+                parent = parent.parent
+            for group in reversed(parents):
+                group._call(  # pylint: disable=protected-access
+                    kwargs=group._bind(  # pylint: disable=protected-access
+                        kwargs={}, context=context
+                    ),
+                    context=context,
+                )
+        return self._call(
+            kwargs=self._bind(kwargs=kwargs, context=context), context=context
+        )
+
     def _invoke(
         self,
         args: Args,
         kwargs: Kwargs,
         isolated: bool = False,
         help_only: bool = False,
+        output: t.Optional[OutputFormat] = None,
+        deadline: t.Optional[float] = None,
+        context: t.Optional[Context] = None,
     ) -> int:
         """Command for command function."""
         if help_only:
             return self.help()
+        context = context if context is not None else self.context
+        if context is not None:
+            context.deadline = deadline
+            if "context" in kwargs:
+                kwargs = {**kwargs, "context": context}
         try:
-            self(*args, **kwargs)
+            if inspect.iscoroutinefunction(self._f):
+                value = run_coroutine(
+                    self(*args, **kwargs), deadline=deadline, name=self.name
+                )
+            else:
+                with enforce(deadline=deadline, name=self.name):
+                    value = self(*args, **kwargs)
+            if output is not None:
+                writer = context.out if context is not None else Writer()
+                render(value=value, output=output, writer=writer)
+                writer.flush()
             return 0
+        except BrokenPipeError:
+            return silence_stdout()
+        except TimeoutExpired:
+            raise
         except Exception:
             if isolated:
                 return 1
             raise
+        finally:
+            if context is not None:
+                context.flush()
+
+    def _get_deadline(self, options: Options) -> t.Optional[float]:
+        """Get the deadline for this invocation."""
+        return get_deadline(
+            options.get("deadline"),
+            self.timeout,
+            get_option(options, "timeout"),
+        )
+
+    def _scoped(self, call: t.Callable[[Options], int], options: Options) -> int:
+        """Run the call with a child context unless a parent group created one."""
+        if self.context is None or options.get("context") is not None:
+            return call(options)
+        with self.context.child() as context:
+            options["context"] = context
+            return call(options)
 
     def set_context(self, context: Context) -> None:
         """Set context."""
         self.context = context
-        self._parser.set_context(context=context)
+        if self._built_parser is not None:
+            self._built_parser.set_context(context=context)
 
     def help(self) -> int:
         """
@@ -90,18 +326,29 @@ class BaseWrapper:
 
         :return: None
         """
+        print(self._parser.help_text or self.render_help())
+        return 0
+
+    def render_help(self) -> str:
+        """Render help string."""
         args = " ".join(self._parser.get_arg_vars())
-        print(f"Usage: {self.name} [OPTIONS] {args}")
-        print(f"\n\t{self.doc_full()}\n")
-        print("Options:\n")
+        lines = [
+            f"Usage: {self.name} [OPTIONS] {args}",
+            f"\n\t{self.doc_full()}\n",
+            "Options:\n",
+        ]
         for parameter in set(
             self._parser._kwargs.values()  # pylint: disable=protected-access
         ):
             if parameter.name == "context":
                 continue  # pragma: nocover
-            print(f"    {parameter.help()}")
-        print("    --help                        Show help and exit.")
-        return 0
+            lines.append(f"    {parameter.help()}")
+        for (
+            option
+        ) in self._parser._options.values():  # pylint: disable=protected-access
+            lines.append(f"    {option.help()}")
+        lines.append("    --help                        Show help and exit.")
+        return "\n".join(lines)
 
     def doc_one(self) -> str:
         """Returns the one line represenstion of the documentation."""
@@ -113,7 +360,10 @@ class BaseWrapper:
         return str(self._f.__doc__).lstrip().rstrip()
 
     def invoke(  # pylint: disable=unused-argument
-        self, argv: Argv, isolated: bool = False
+        self,
+        argv: Argv,
+        isolated: bool = False,
+        options: t.Optional[Options] = None,
     ) -> int:
         """Run the command."""
         return NotImplemented  # pragma: nocover
@@ -122,16 +372,22 @@ class BaseWrapper:
 class Command(BaseWrapper):
     """Command."""
 
-    _parser: CommandParser
+    _parser_class = CommandParser
 
     def __init__(
         self,
         f: t.Callable,
-        parser: CommandParser,
+        parser: t.Optional[CommandParser] = None,
         context: t.Optional[Context] = None,
         name: t.Optional[str] = None,
         version: t.Optional[str] = None,
         parent: t.Optional["Group"] = None,
+        cache: t.Optional[CachePolicy] = None,
+        timeout: t.Optional[float] = None,
+        depends_on: t.Optional[t.List[str]] = None,
+        incremental: bool = False,
+        outputs: t.Optional[t.List[t.Union[str, Path]]] = None,
+        watch: t.Optional[t.List[str]] = None,
     ) -> None:
         """Initialize Command object.
 
@@ -139,36 +395,159 @@ class Command(BaseWrapper):
         :type f: t.Callable
         :param parser: The parser object that handles the command line arguments.
         :type parser: Parser
+        :param cache: Cache policy for memoizing the command output.
+        :type cache: t.Optional[CachePolicy]
+        :param timeout: Time in seconds the command is allowed to take.
+        :type timeout: t.Optional[float]
+        :param depends_on: Names of the sibling commands to run before this one
+            when running with `Group.run_graph`.
+        :type depends_on: t.Optional[t.List[str]]
+        :param incremental: Skip the command if the arguments and the contents of
+            the path arguments are unchanged since the last successful run.
+        :type incremental: bool
+        :param outputs: Paths produced by an incremental command, the command
+            runs again if any of them is missing.
+        :type outputs: t.Optional[t.List[t.Union[str, Path]]]
+        :param watch: Glob patterns watched along with the path arguments when
+            running with `--watch`.
+        :type watch: t.Optional[t.List[str]]
         :return: None
         """
         super().__init__(
-            f=f, context=context, name=name, version=version, parent=parent
+            f=f,
+            context=context,
+            name=name,
+            version=version,
+            parent=parent,
+            parser=parser,
+            timeout=timeout,
         )
-        self._parser = parser
+        self.cache = Cache(policy=cache) if cache is not None else None
+        self.depends_on = list(depends_on or [])
+        self.incremental = Incremental(outputs=outputs) if incremental else None
+        self.watch = list(watch or [])
         if self.parent is not None:
             self.parent.add_child(self)
 
-    def invoke(self, argv: Argv, isolated: bool = False) -> int:
+    def invoke(
+        self,
+        argv: Argv,
+        isolated: bool = False,
+        options: t.Optional[Options] = None,
+    ) -> int:
         """Run the command.
 
         :param argv: The command line arguments.
         :type argv: Argv
         :param isolated: Whether to run the command in an isolated context. Defaults to False.
         :type isolated: bool
+        :param options: Global options parsed by the parent groups.
+        :type options: t.Optional[Options]
         :return: 0 if the command runs successfully, 1 otherwise.
         :rtype: int
         """
-        kwargs, help_only, version_only = self._parser.copy().parse(argv=argv)
+        parser = t.cast(CommandParser, self._parser).copy()
+        memory.mark(f"build {self.name}")
+        kwargs, help_only, version_only = parser.parse(argv=argv)
+        memory.mark(f"parse {self.name}")
         if version_only:
             print(self.version)
             return 0
 
-        return self._invoke(
+        return self._scoped(
+            call=partial(
+                self._execute, kwargs=kwargs, isolated=isolated, help_only=help_only
+            ),
+            options={**(options or {}), **parser.options},
+        )
+
+    def _execute(
+        self,
+        options: Options,
+        kwargs: Kwargs,
+        isolated: bool = False,
+        help_only: bool = False,
+    ) -> int:
+        """Run the command once, watched or on a schedule."""
+        watch = get_option(options, "watch")
+        schedule = get_schedule(
+            every=get_option(options, "every"), cron=get_option(options, "cron")
+        )
+        if help_only or (not watch and schedule is None):
+            exit_code = self._run_once(
+                kwargs=kwargs, options=options, isolated=isolated, help_only=help_only
+            )
+            memory.mark(f"command {self.name}")
+            return exit_code
+
+        if watch and schedule is not None:
+            raise CleaException(
+                message="Use either `--watch` or a schedule, not both", exit_code=1
+            )
+        # Every run gets its own deadline instead of the inherited one
+        options.pop("deadline", None)
+        call = partial(
+            self._run_once, kwargs=kwargs, options=options, isolated=isolated
+        )
+        if schedule is not None:
+            stats = RunStats()
+            if options.get("context") is not None:
+                options["context"].schedule = stats
+            exit_code = run_scheduled(
+                call=call,
+                schedule=schedule,
+                overlap=get_option(options, "overlap"),
+                stats=stats,
+            )
+        else:
+            exit_code = run_watched(
+                call=call,
+                paths=[
+                    path for value in kwargs.values() for path in p.get_paths(value)
+                ],
+                globs=self.watch,
+            )
+        memory.mark(f"command {self.name}")
+        return exit_code
+
+    def _run_once(
+        self,
+        kwargs: Kwargs,
+        options: Options,
+        isolated: bool = False,
+        help_only: bool = False,
+    ) -> int:
+        """Run the command function through the cache and incremental layers."""
+        call: t.Callable[[], int] = partial(
+            self._invoke,
             args=[],
             kwargs=kwargs,
             isolated=isolated,
             help_only=help_only,
+            output=get_option(options, "output"),
+            deadline=self._get_deadline(options=options),
+            context=options.get("context"),
         )
+        if help_only:
+            return call()
+        name = f"{self._f.__module__}.{self._f.__qualname__}"
+        if self.cache is not None:
+            call = partial(
+                self.cache.run,
+                name=name,
+                kwargs=kwargs,
+                call=call,
+                options={"output": get_option(options, "output")},
+            )
+        if self.incremental is not None:
+            call = partial(
+                self.incremental.run,
+                name=name,
+                kwargs=kwargs,
+                call=call,
+                force=get_option(options, "force"),
+            )
+        return call()
 
     @t.overload
     @classmethod
@@ -194,6 +573,12 @@ class Command(BaseWrapper):
         context: t.Optional[Context] = None,
         parent: t.Optional["Group"] = None,
         version: t.Optional[str] = None,
+        cache: t.Optional[CachePolicy] = None,
+        timeout: t.Optional[float] = None,
+        depends_on: t.Optional[t.List[str]] = None,
+        incremental: bool = False,
+        outputs: t.Optional[t.List[t.Union[str, Path]]] = None,
+        watch: t.Optional[t.List[str]] = None,
     ) -> t.Callable[[t.Callable], "Command"]:
         """Command wrapper"""
 
@@ -205,6 +590,12 @@ class Command(BaseWrapper):
         context: t.Optional[Context] = None,
         parent: t.Optional["Group"] = None,
         version: t.Optional[str] = None,
+        cache: t.Optional[CachePolicy] = None,
+        timeout: t.Optional[float] = None,
+        depends_on: t.Optional[t.List[str]] = None,
+        incremental: bool = False,
+        outputs: t.Optional[t.List[t.Union[str, Path]]] = None,
+        watch: t.Optional[t.List[str]] = None,
     ) -> t.Callable[[t.Callable], "Command"]:
         """
         Decorator function to wrap a function as a command.
@@ -217,7 +608,17 @@ class Command(BaseWrapper):
         if f is not None:
             return cls._wrap(f=f, context=context, parent=parent)
         return partial(
-            cls._wrap, name=name, context=context, parent=parent, version=version
+            cls._wrap,
+            name=name,
+            context=context,
+            parent=parent,
+            version=version,
+            cache=cache,
+            timeout=timeout,
+            depends_on=depends_on,
+            incremental=incremental,
+            outputs=outputs,
+            watch=watch,
         )
 
     @classmethod
@@ -236,51 +637,25 @@ class Command(BaseWrapper):
         :return: A `Command` object representing the wrapped function.
         :rtype: Command
         """
-        parser = CommandParser()
-        context = context or Context()
-        if version:
-            version_param = p.VersionParameter(
-                long_flag="--version",
-                help="Program version",
-            )
-            version_param.name = "version"
-            version_param.default = version
-            parser.add(version_param)
-        defaults_mapping, annotations = get_function_metadata(f=f)
-        for name, annotation in t.cast(t.Dict[str, Annotations], annotations).items():
-            if name == "return":
-                continue
-            if name == "context":
-                context_param = p.ContextParameter()
-                context_param.name = "context"
-                context_param.default = context
-                parser.add(defintion=context_param)
-                continue
-            (parameter,) = t.cast(
-                t.Tuple[p.Parameter, ...], getattr(annotation, "__metadata__")
-            )
-            default = defaults_mapping.get(name)
-            if default is not None:
-                parameter.default = default
-            parameter.name = name
-            parser.add(defintion=parameter)
-        return cls(f=f, parser=parser, version=version, **kwargs)
+        return cls(f=f, context=context or Context(), version=version, **kwargs)
 
 
 class Group(BaseWrapper):
     """Command group."""
 
     _children: t.Dict[str, t.Union[Command, "Group"]]
+    _parser_class = GroupParser
 
     def __init__(
         self,
         f: t.Callable,
-        parser: GroupParser,
+        parser: t.Optional[GroupParser] = None,
         context: t.Optional[Context] = None,
         name: t.Optional[str] = None,
         version: t.Optional[str] = None,
         allow_direct_exec: bool = False,
         parent: t.Optional["Group"] = None,
+        timeout: t.Optional[float] = None,
     ) -> None:
         """Initialize Command object.
 
@@ -288,6 +663,8 @@ class Group(BaseWrapper):
         :type f: t.Callable
         :param parser: The parser object that handles the command line arguments.
         :type parser: Parser
+        :param timeout: Time in seconds the group and its children are allowed to take.
+        :type timeout: t.Optional[float]
         :return: None
         """
         super().__init__(
@@ -296,10 +673,11 @@ class Group(BaseWrapper):
             name=name,
             version=version,
             parent=parent,
+            parser=parser,
+            timeout=timeout,
         )
 
         self._children = {}
-        self._parser = parser
         self._allow_direct_exec = allow_direct_exec
         if self.parent is not None:
             self.parent.add_child(self)
@@ -329,35 +707,7 @@ class Group(BaseWrapper):
         :return: A `Command` object representing the wrapped function.
         :rtype: Command
         """
-        parser = GroupParser()
-        context = context or Context()
-        if version:
-            version_param = p.VersionParameter(
-                long_flag="--version",
-                help="Program version",
-            )
-            version_param.name = "version"
-            version_param.default = version
-            parser.add(version_param)
-        defaults_mapping, annotations = get_function_metadata(f=f)
-        for name, annotation in t.cast(t.Dict[str, Annotations], annotations).items():
-            if name == "return":
-                continue
-            if name == "context":
-                context_param = p.ContextParameter()
-                context_param.name = "context"
-                context_param.default = context
-                parser.add(defintion=context_param)
-                continue
-            (parameter,) = t.cast(
-                t.Tuple[p.Parameter, ...], getattr(annotation, "__metadata__")
-            )
-            default = defaults_mapping.get(name)
-            if default is not None:
-                parameter.default = default
-            parameter.name = name
-            parser.add(defintion=parameter)
-        return cls(f=f, parser=parser, context=context, version=version, **kwargs)
+        return cls(f=f, context=context or Context(), version=version, **kwargs)
 
     @t.overload
     @classmethod
@@ -384,6 +734,7 @@ class Group(BaseWrapper):
         context: t.Optional[Context] = None,
         parent: t.Optional["Group"] = None,
         version: t.Optional[str] = None,
+        timeout: t.Optional[float] = None,
     ) -> t.Callable[[t.Callable], "Group"]:
         """
         Decorator function to wrap a function as a command.
@@ -403,6 +754,7 @@ class Group(BaseWrapper):
         context: t.Optional[Context] = None,
         parent: t.Optional["Group"] = None,
         version: t.Optional[str] = None,
+        timeout: t.Optional[float] = None,
     ) -> t.Callable[[t.Callable], "Group"]:
         """
         Decorator function to wrap a function as a command.
@@ -421,58 +773,154 @@ class Group(BaseWrapper):
             context=context,
             parent=parent,
             version=version,
+            timeout=timeout,
         )
 
-    def invoke(self, argv: Argv, isolated: bool = False) -> int:
+    def invoke(
+        self,
+        argv: Argv,
+        isolated: bool = False,
+        options: t.Optional[Options] = None,
+    ) -> int:
         """Run the command."""
+        parser = t.cast(GroupParser, self._parser).copy()
+        memory.mark(f"build {self.name}")
         (
             kwargs,
             help_only,
             version_only,
             sub_command,
             sub_argv,
-        ) = (
-            t.cast(GroupParser, self._parser)
-            .copy()
-            .parse(argv=argv, commands=self._children)
-        )
+        ) = parser.parse(argv=argv, commands=self._children)
+        memory.mark(f"parse {self.name}")
 
         if version_only:
             print(self.version)
             return 0
 
+        options = {**(options or {}), **parser.options}
+        options["deadline"] = self._get_deadline(options=options)
+        return self._scoped(
+            call=partial(
+                self._dispatch,
+                kwargs=kwargs,
+                isolated=isolated,
+                help_only=help_only,
+                sub_command=sub_command,
+                sub_argv=sub_argv,
+            ),
+            options=options,
+        )
+
+    def _dispatch(  # pylint: disable=too-many-arguments
+        self,
+        options: Options,
+        kwargs: Kwargs,
+        isolated: bool,
+        help_only: bool,
+        sub_command: t.Optional[BaseWrapper],
+        sub_argv: Argv,
+    ) -> int:
+        """Run the callback and the sub command or the group itself."""
         if sub_command is not None:
-            self._invoke(args=[], kwargs=kwargs, isolated=isolated, help_only=help_only)
-            return sub_command.invoke(argv=sub_argv)
+            self._invoke(
+                args=[],
+                kwargs=kwargs,
+                isolated=isolated,
+                help_only=help_only,
+                deadline=options["deadline"],
+                context=options.get("context"),
+            )
+            memory.mark(f"callback {self.name}")
+            return sub_command.invoke(argv=sub_argv, options=options)
 
         if self._allow_direct_exec:
-            return self._invoke(
-                args=[], kwargs=kwargs, isolated=isolated, help_only=help_only
+            exit_code = self._invoke(
+                args=[],
+                kwargs=kwargs,
+                isolated=isolated,
+                help_only=help_only,
+                output=get_option(options, "output"),
+                deadline=options["deadline"],
+                context=options.get("context"),
             )
+            memory.mark(f"command {self.name}")
+            return exit_code
 
         return self.help()
 
-    def help(self) -> int:
-        """Print help string."""
-        args = " ".join(self._parser.get_arg_vars())
-        print(f"Usage: {self.name} [OPTIONS] {args}")
-        print(f"\n\t{self.doc_full()}\n")
-        print("Options:\n")
-        for parameter in set(
-            self._parser._kwargs.values()  # pylint: disable=protected-access
-        ):
-            if parameter.name == "context":
-                continue  # pragma: nocover
-            print(f"    {parameter.help()}")
-        print("    --help                        Show help and exit.")
-        print("\nCommands:\n")
+    def shell(
+        self,
+        prompt: t.Optional[str] = None,
+        history: t.Optional[Path] = None,
+        timed: bool = False,
+    ) -> int:
+        """
+        Start an interactive shell for this group.
+
+        :param prompt: Prompt string, defaults to `<name> > `.
+        :type prompt: t.Optional[str]
+        :param history: Path to the readline history file.
+        :type history: t.Optional[Path]
+        :param timed: Report wall time for every command.
+        :type timed: bool
+        :return: Exit code of the last command.
+        :rtype: int
+        """
+        from clea.shell import Shell  # pylint: disable=import-outside-toplevel
+
+        return Shell(cli=self, prompt=prompt, history=history, timed=timed).loop()
+
+    def run_graph(
+        self,
+        targets: t.List[str],
+        jobs: int = 1,
+        processes: bool = False,
+    ) -> int:
+        """
+        Run the child commands along with their dependencies.
+
+        Commands are scheduled in the dependency order, independent commands
+        run in parallel and no new command is scheduled after a failure.
+
+        :param targets: Names of the child commands to run.
+        :type targets: t.List[str]
+        :param jobs: Number of commands to run in parallel.
+        :type jobs: int
+        :param processes: Use a process pool instead of a thread pool.
+        :type processes: bool
+        :return: Exit code of the first failed command or 0.
+        :rtype: int
+        """
+        from clea.graph import run_graph  # pylint: disable=import-outside-toplevel
+
+        return run_graph(group=self, targets=targets, jobs=jobs, processes=processes)
+
+    def add_graph_command(self, name: str = "run") -> Command:
+        """
+        Add a child command for running the other children with their dependencies.
+
+        The command is used as `cli run a b c --jobs=8`.
+
+        :param name: Name of the command.
+        :type name: str
+        :return: The added command.
+        :rtype: Command
+        """
+        from clea.graph import GraphCommand  # pylint: disable=import-outside-toplevel
+
+        return GraphCommand(group=self, name=name)
+
+    def render_help(self) -> str:
+        """Render help string."""
+        lines = [super().render_help(), "\nCommands:\n"]
         for name, child in self._children.items():
             help_str = f"    {name}"
             help_str += " " * (p.HELP_COL_LENGTH - len(help_str))
             help_str += "    "
             help_str += child.doc_one()
-            print(help_str)
-        return 0
+            lines.append(help_str)
+        return "\n".join(lines)
 
 
 command = Command.wrap
@@ -0,0 +1,53 @@
+"""Shared fixtures."""
+
+import subprocess  # nosec
+import sys
+import types
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from clea.compiler import compile_cli
+from clea.runner import run
+
+
+def compile_tree(cli: t.Any) -> t.Any:
+    """Compile a tree held in memory and return the compiled copy."""
+    name = f"_clea_tree_{id(cli)}"
+    module = types.ModuleType(name)
+    setattr(module, "cli", cli)
+    sys.modules[name] = module
+    try:
+        namespace: t.Dict[str, t.Any] = {}
+        source = compile_cli(cli=cli, target=f"{name}:cli")
+        code = compile(source, name, "exec")
+        exec(code, namespace)  # pylint: disable=exec-used # nosec
+        return namespace["cli"]
+    finally:
+        del sys.modules[name]
+
+
+def loaded_modules(statement: str = "import clea") -> t.Set[str]:
+    """Run a statement in a fresh interpreter and return the loaded modules."""
+    code = f"{statement}\nimport sys\nprint(' '.join(sys.modules))"
+    result = subprocess.run(  # nosec
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(result.stdout.split())
+
+
+@pytest.fixture(params=("uncompiled", "compiled"))
+def parsers(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run the test against the trees as defined and compiled ahead of time."""
+    if request.param == "compiled":
+
+        def _run(cli: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+            return run(compile_tree(cli), *args, **kwargs)
+
+        monkeypatch.setattr(request.module, "run", _run)
+    return request.param
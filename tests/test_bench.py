@@ -0,0 +1,118 @@
+"""Test startup benchmark."""
+
+import os
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from clea.bench import bench, parse_importtime, percentiles, render_report
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     slow.inner
+import time:       500 |        600 |   slow
+import time:        50 |         50 |   json
+import time:       200 |        850 | pkg.db
+"""
+
+
+def test_parse_importtime() -> None:
+    """Test parsing the import tree."""
+    tree = parse_importtime(output=IMPORTTIME)
+    name, self_us, cumulative_us, children = tree["pkg.db"]
+    assert (name, self_us, cumulative_us) == ("pkg.db", 200, 850)
+    assert [child[0] for child in children] == ["slow", "json"]
+    assert [child[0] for child in tree["slow"][3]] == ["slow.inner"]
+
+
+def test_percentiles() -> None:
+    """Test nearest rank percentiles."""
+    stats = percentiles(values=[float(i) for i in range(1, 101)])
+    assert stats["min"] == 1
+    assert stats["p50"] == 50
+    assert stats["p90"] == 90
+    assert stats["p99"] == 99
+    assert stats["max"] == 100
+    assert percentiles(values=[3.0])["p99"] == 3.0
+
+
+def test_bench(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test benchmarking a CLI with a slow subcommand module."""
+    package = tmp_path / "benchpkg"
+    (package / "commands").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "commands" / "__init__.py").write_text("")
+    (package / "slow.py").write_text("import time\ntime.sleep(0.05)\n")
+    (package / "commands" / "db.py").write_text(
+        textwrap.dedent(
+            '''
+            import benchpkg.slow
+            from clea import command
+
+            @command
+            def migrate() -> None:
+                """Migrate."""
+            '''
+        )
+    )
+    (package / "cli.py").write_text(
+        textwrap.dedent(
+            '''
+            from clea import group
+            from benchpkg.commands import db
+
+            @group
+            def main() -> None:
+                """Main."""
+
+            main.add_child(db.migrate)
+            '''
+        )
+    )
+    root = Path(__file__).parent.parent
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(tmp_path), str(root)]))
+
+    report = bench(target="benchpkg.cli:main", argv=["migrate"], runs=2)
+    assert report["runs"] == 2
+    assert report["phases"]["import"]["min"] >= 50
+    assert report["phases"]["total"]["max"] >= report["phases"]["import"]["max"]
+    db = report["modules"]["benchpkg.commands.db"]
+    assert db["commands"] == ["main migrate"]
+    assert db["heavy"]
+    assert db["top_imports"][0][0] == "benchpkg.slow"
+    assert not report["modules"]["benchpkg.cli"]["heavy"]
+
+    text = render_report(report=report)
+    assert "Benchmark benchpkg.cli:main migrate (2 runs, times in ms)" in text
+    assert "top-level imports dominate startup: benchpkg.slow" in text
+
+
+def test_bench_errors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test failing runs are reported instead of being timed."""
+    (tmp_path / "failing.py").write_text(
+        textwrap.dedent(
+            '''
+            from clea import command
+            from clea.exceptions import CleaException
+
+            @command
+            def usage() -> None:
+                """Usage error."""
+                raise CleaException(message="Bad usage", exit_code=2)
+
+            @command
+            def crash() -> None:
+                """Crash."""
+                raise ValueError("Broken")
+            '''
+        )
+    )
+    root = Path(__file__).parent.parent
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(tmp_path), str(root)]))
+
+    with pytest.raises(RuntimeError, match="exited with code 2\nBad usage"):
+        bench(target="failing:usage", argv=[], runs=1)
+    with pytest.raises(RuntimeError, match="ValueError: Broken"):
+        bench(target="failing:crash", argv=[], runs=1)
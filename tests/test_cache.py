@@ -0,0 +1,134 @@
+"""Test command result cache."""
+
+import time
+import typing as t
+from pathlib import Path
+
+import pytest
+from typing_extensions import Annotated
+
+from clea.cache import Cache, CachePolicy
+from clea.params import File, Integer
+from clea.runner import run
+from clea.wrappers import Command
+
+
+pytestmark = pytest.mark.usefixtures("parsers")
+
+
+def _make_command(policy: CachePolicy, calls: t.List[int]) -> Command:
+    """Create a cached command."""
+
+    @Command.wrap(cache=policy)
+    def _command(
+        n: Annotated[int, Integer()],
+        file: Annotated[Path, File(long_flag="--file")],
+    ) -> None:
+        """Cached command."""
+        calls.append(n)
+        print(f"Result {n * 2}")
+
+    return _command
+
+
+def test_cache_hit(tmp_path: Path) -> None:
+    """Test results are replayed on a cache hit."""
+    calls: t.List[int] = []
+    cmd = _make_command(CachePolicy(directory=tmp_path / "cache"), calls)
+    data = tmp_path / "data.txt"
+    data.write_text("a")
+    for _ in range(2):
+        result = run(cli=cmd, argv=["2", f"--file={data}"], isolated=True)
+        assert result.exit_code == 0
+        assert result.stdout == "Result 4\n"
+    assert calls == [2]
+
+    run(cli=cmd, argv=["3", f"--file={data}"], isolated=True)
+    assert calls == [2, 3]
+
+
+def test_cache_file_change(tmp_path: Path) -> None:
+    """Test file arguments invalidate the entry when changed."""
+    calls: t.List[int] = []
+    cmd = _make_command(CachePolicy(directory=tmp_path / "cache"), calls)
+    data = tmp_path / "data.txt"
+    data.write_text("a")
+    run(cli=cmd, argv=["2", f"--file={data}"], isolated=True)
+    data.write_text("ab")
+    run(cli=cmd, argv=["2", f"--file={data}"], isolated=True)
+    assert calls == [2, 2]
+
+
+def test_cache_ttl(tmp_path: Path) -> None:
+    """Test expired entries are not replayed."""
+    cache = Cache(policy=CachePolicy(ttl=0.0, directory=tmp_path))
+    cache.put(key="key", exit_code=0, stdout="out")
+    time.sleep(0.01)
+    assert cache.get(key="key") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_env(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test selected env vars are part of the key."""
+    cache = Cache(policy=CachePolicy(env=["CLEA_TEST"], directory=tmp_path))
+    monkeypatch.setenv("CLEA_TEST", "a")
+    key = cache.key(name="cmd", kwargs={"n": 1})
+    monkeypatch.setenv("CLEA_TEST", "b")
+    assert key != cache.key(name="cmd", kwargs={"n": 1})
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    """Test least recently used entries are evicted first."""
+    cache = Cache(policy=CachePolicy(max_bytes=200, directory=tmp_path))
+    cache.put(key="one", exit_code=0, stdout="1" * 50)
+    time.sleep(0.01)
+    cache.put(key="two", exit_code=0, stdout="2" * 50)
+    time.sleep(0.01)
+    assert cache.get(key="one") is not None
+    cache.put(key="three", exit_code=0, stdout="3" * 50)
+    assert cache.get(key="two") is None
+    assert cache.get(key="one") == (0, "1" * 50)
+    assert cache.get(key="three") == (0, "3" * 50)
+
+
+def test_cache_qualified_name(tmp_path: Path) -> None:
+    """Test commands sharing a name don't share entries."""
+    policy = CachePolicy(directory=tmp_path / "cache")
+    calls: t.List[str] = []
+
+    @Command.wrap(name="cmd", cache=policy)
+    def _first() -> None:
+        """First command."""
+        calls.append("first")
+
+    @Command.wrap(name="cmd", cache=policy)
+    def _second() -> None:
+        """Second command."""
+        calls.append("second")
+
+    for cmd in (_first, _second, _first):
+        run(cli=cmd, argv=[], isolated=True)
+    assert calls == ["first", "second"]
+
+
+def test_cache_output_format(tmp_path: Path) -> None:
+    """Test runs with a different output format don't replay each other."""
+    calls: t.List[int] = []
+
+    @Command.wrap(cache=CachePolicy(directory=tmp_path / "cache"))
+    def _command(n: Annotated[int, Integer()]) -> t.Dict[str, int]:
+        """Cached command."""
+        calls.append(n)
+        return {"n": n}
+
+    argvs = (
+        ["--output=json", "1"],
+        ["--output=text", "1"],
+        ["1"],
+        ["--output=json", "1"],
+    )
+    outputs = [run(cli=_command, argv=argv, isolated=True).stdout for argv in argvs]
+    assert calls == [1, 1, 1]
+    assert outputs[0] == outputs[3] == '{"n": 1}\n'
+    assert outputs[1] != outputs[0]
+    assert outputs[2] == ""
@@ -0,0 +1,239 @@
+"""Test ahead-of-time compilation."""
+
+import importlib
+import types
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from clea.__main__ import main
+from clea.compiler import CompiledParser, compile_cli, walk
+from clea.helpers import import_object
+from clea.runner import run
+from tests.test_examples import (
+    test_add,
+    test_add_number,
+    test_add_student,
+    test_calculator,
+    test_custom_context,
+    test_manage_students,
+    test_runtime_context,
+    test_version,
+)
+from tests.test_helpers import POSTPONED
+
+
+def _compile(target: str, tmp_path: Path, monkeypatch: t.Any) -> t.Any:
+    """Compile a target and import the compiled tree."""
+    name = "_compiled_" + target.replace(".", "_").replace(":", "_")
+    source = compile_cli(cli=import_object(target), target=target)
+    (tmp_path / f"{name}.py").write_text(source, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return importlib.import_module(name).cli
+
+
+@pytest.mark.parametrize(
+    argnames="module",
+    argvalues=(
+        test_add,
+        test_add_number,
+        test_add_student,
+        test_calculator,
+        test_custom_context,
+        test_manage_students,
+        test_runtime_context,
+        test_version,
+    ),
+)
+def test_examples_compiled(
+    module: types.ModuleType, tmp_path: Path, monkeypatch: t.Any
+) -> None:
+    """Run the example test-suite against the compiled parsers."""
+    original = getattr(module, "cli")
+    target = f"{original._f.__module__}:{_attribute(original)}"
+    compiled = _compile(target=target, tmp_path=tmp_path, monkeypatch=monkeypatch)
+    for _, wrapper in walk(cli=compiled):
+        assert isinstance(wrapper._built_parser, CompiledParser)
+    monkeypatch.setattr(module, "cli", compiled)
+    for name, test in vars(module).items():
+        if name.startswith("test_") and callable(test):
+            test()
+
+
+def _attribute(cli: t.Any) -> str:
+    """Find the module attribute holding a wrapper."""
+    module = importlib.import_module(cli._f.__module__)
+    for name, value in vars(module).items():
+        if value is cli:
+            return name
+    raise AssertionError("Wrapper not found")  # pragma: nocover
+
+
+def test_compiled_tree_is_a_copy(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test compiling does not modify the original tree."""
+    original = import_object("examples.calculator:calculator")
+    compiled = _compile(
+        target="examples.calculator:calculator",
+        tmp_path=tmp_path,
+        monkeypatch=monkeypatch,
+    )
+    assert compiled is not original
+    assert not isinstance(original._parser, CompiledParser)
+    assert compiled._children["add"].parent is compiled
+
+
+def test_compiled_help(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test pre-rendered help."""
+    compiled = _compile(
+        target="examples.calculator:calculator",
+        tmp_path=tmp_path,
+        monkeypatch=monkeypatch,
+    )
+    result = run(cli=compiled, argv=["--help"], isolated=True)
+    assert "CLI Calculator app." in result.stdout
+    assert "devide                        Devide two numbers." in result.stdout
+
+
+def test_compiled_errors(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test inlined conversion errors."""
+    compiled = _compile(
+        target="examples.calculator:calculator",
+        tmp_path=tmp_path,
+        monkeypatch=monkeypatch,
+    )
+    result = run(cli=compiled, argv=["add", "1", "a"], isolated=True)
+    assert result.exit_code == 1
+    assert (
+        "Error parsing value for <N2 type=int>; Provided value=a; Expected type=int"
+        in result.stderr
+    )
+    result = run(cli=compiled, argv=["add", "1", "2", "3"], isolated=True)
+    assert "Extra argument provided `3`" in result.stderr
+    result = run(cli=compiled, argv=["devide", "4", "2", "--round"], isolated=True)
+    assert result.stdout == "Answer 2\n"
+    result = run(cli=compiled, argv=["--output=json", "add", "1", "2"], isolated=True)
+    assert result.stdout == "Answer 3\n"
+
+
+def test_compile_command(tmp_path: Path) -> None:
+    """Test `python -m clea compile`."""
+    output = tmp_path / "_cli_compiled.py"
+    result = run(
+        cli=main,
+        argv=["compile", "examples.add:add", f"-o={output}"],
+        isolated=True,
+    )
+    assert result.exit_code == 0
+    assert "def _parse_n0(argv, commands, context):" in output.read_text()
+
+    result = run(cli=main, argv=["compile", "examples.add:add"], isolated=True)
+    assert result.stdout.read().startswith('"""Compiled parsers for `examples.add:add`')
+
+    result = run(cli=main, argv=["compile", "examples.add"], isolated=True)
+    assert "Invalid import path `examples.add`" in result.stderr
+
+
+def test_compile_postponed_annotations(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test compiling commands from modules with postponed annotations."""
+    (tmp_path / "_postponed_compile.py").write_text(POSTPONED, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    cli = _compile("_postponed_compile:greet", tmp_path, monkeypatch)
+    assert isinstance(cli._parser, CompiledParser)
+    result = run(cli=cli, argv=["clea", "--count=2"], isolated=True)
+    assert result.stdout == "Hello clea Hello clea\n"
+
+
+VARIADIC = '''
+import typing as t
+from pathlib import Path
+
+from typing_extensions import Annotated
+
+from clea import Integer, String, Variadic, command
+
+
+@command
+def total(
+    label: Annotated[str, String()],
+    numbers: Annotated[t.Iterable[int], Variadic(Integer())],
+) -> None:
+    """Total"""
+    print(label, sum(numbers))
+'''
+
+
+def test_compile_variadic(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test compiled parsers capture variadic arguments lazily."""
+    (tmp_path / "_variadic_compile.py").write_text(VARIADIC, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original = import_object("_variadic_compile:total")
+    cli = _compile("_variadic_compile:total", tmp_path, monkeypatch)
+    assert isinstance(cli._parser, CompiledParser)
+    for argv in (
+        ["sum", "1", "2", "--output=text", "3"],
+        ["sum"],
+        ["--", "-a", "-1", "--2"],
+        ["sum", "1", "x"],
+        [],
+    ):
+        expected = run(cli=original, argv=argv, isolated=True)
+        result = run(cli=cli, argv=argv, isolated=True)
+        assert (result.exit_code, result.stdout, result.stderr) == (
+            expected.exit_code,
+            expected.stdout,
+            expected.stderr,
+        )
+    assert run(cli=cli, argv=["sum", "1", "2"], isolated=True).stdout == "sum 3\n"
+
+
+LITERALS = '''
+import enum
+import typing as t
+from pathlib import Path
+
+from typing_extensions import Annotated
+
+from clea import Choice, Files, String, StringList, command
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+@command
+def paint(
+    files: Annotated[t.Iterable[Path], Files()],
+    color: Annotated[Color, Choice(Color, long_flag="--color")] = Color.RED,
+    tags: Annotated[t.List[str], StringList(long_flag="--tag")] = None,
+    prefix: Annotated[str, String(long_flag="--prefix")] = "out",
+) -> None:
+    """Paint"""
+    print(color.value, tags, prefix, *files)
+'''
+
+
+def test_compile_literals(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test parameter definitions are written as literals."""
+    (tmp_path / "_literals_compile.py").write_text(LITERALS, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original = import_object("_literals_compile:paint")
+    source = compile_cli(cli=original, target="_literals_compile:paint")
+    assert "get_annotations(" not in source
+    assert "_literals_compile:Color" in source
+    cli = _compile("_literals_compile:paint", tmp_path, monkeypatch)
+    for argv in (
+        ["a", "b", "--color=green", "--tag=x", "--tag=y"],
+        ["--prefix=p"],
+        ["--color=blue"],
+    ):
+        expected = run(cli=original, argv=argv, isolated=True)
+        result = run(cli=cli, argv=argv, isolated=True)
+        assert (result.exit_code, result.stdout, result.stderr) == (
+            expected.exit_code,
+            expected.stdout,
+            expected.stderr,
+        )
+    result = run(cli=cli, argv=["c", "--prefix=p"], isolated=True)
+    assert result.stdout == "red [] p c\n"
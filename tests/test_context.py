@@ -1,8 +1,20 @@
 """Test context."""
 
+import asyncio
+import multiprocessing
+import threading
+import time
+import typing as t
 from pathlib import Path
 
-from clea.context import Context
+import pytest
+from typing_extensions import Annotated
+
+from clea.context import Context, get_current_context
+from clea.exceptions import CleaException
+from clea.params import Integer, String
+from clea.store import Store
+from clea.wrappers import Group
 
 
 def test_cwd() -> None:
@@ -16,3 +28,203 @@ def test_data_store() -> None:
     ctx = Context()
     ctx.set("hello", "world")
     assert ctx.get("hello") == "world"
+
+
+def test_output_writers() -> None:
+    """Test buffered output writers."""
+    ctx = Context(buffer_size=1024)
+    assert ctx.out is ctx.out
+    assert ctx.out.stream == "stdout"
+    assert ctx.err.stream == "stderr"
+    assert ctx.out.buffer_size == 1024
+
+
+def test_persistent_store(tmp_path: Path) -> None:
+    """Test values are shared across contexts through the store."""
+    ctx = Context(store=Store(path=tmp_path / "context.db"))
+    ctx.persist("token", {"value": "abc"})
+    ctx.persist("short", 1, ttl=-1)
+    assert ctx.get("token") == {"value": "abc"}
+
+    other = Context(store=Store(path=tmp_path / "context.db"))
+    assert other.get("token") == {"value": "abc"}
+    assert other.get("short") is None
+    assert other.get("missing", "default") == "default"
+
+    with pytest.raises(CleaException, match="no persistent store"):
+        Context().persist("token", "abc")
+
+
+def test_persistent_store_ttl(tmp_path: Path) -> None:
+    """Test values read from the store expire within an invocation."""
+    ctx = Context(store=Store(path=tmp_path / "context.db"))
+    ctx.persist("token", "abc", ttl=0.05)
+    other = Context(store=Store(path=tmp_path / "context.db"))
+    assert ctx.get("token") == "abc"
+    assert other.get("token") == "abc"
+    time.sleep(0.06)
+    assert ctx.get("token") is None
+    assert other.get("token") is None
+
+    with ctx.child() as child:
+        child.set("token", "local")
+        child.persist("token", "def")
+        assert child.get("token") == "def"
+    assert ctx.get("token") == "def"
+
+
+def _persist(path: Path, index: int) -> None:
+    """Write from another process."""
+    Store(path=path).set(f"key-{index}", index)
+
+
+def test_store_concurrent_processes(tmp_path: Path) -> None:
+    """Test concurrent writers."""
+    path = tmp_path / "context.db"
+    store = Store(path=path)
+    store.set("key-0", 0)
+    processes = [
+        multiprocessing.Process(target=_persist, args=(path, i)) for i in range(1, 5)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [store.get(f"key-{i}") for i in range(5)] == [0, 1, 2, 3, 4]
+    store.delete("key-0")
+    assert store.get("key-0") is None
+    store.close()
+
+
+def test_provide() -> None:
+    """Test lazily created resources."""
+    ctx = Context()
+    events = []
+    ctx.provide("db", lambda: events.append("open db") or "db", close=events.append)
+    ctx.provide(
+        "http", lambda: events.append("open http") or "http", close=events.append
+    )
+    ctx.provide("unused", lambda: events.append("open unused"))
+    assert events == []
+    assert ctx.get("http") == "http"
+    assert ctx.get("db") == "db"
+    assert ctx.get("db") == "db"
+    ctx.close()
+    assert events == ["open http", "open db", "db", "http"]
+    assert ctx.get("db") == "db"
+    assert events[-1] == "open db"
+
+
+def test_close_errors() -> None:
+    """Test all resources are closed if closing one fails."""
+    ctx = Context()
+    closed = []
+
+    def _fail(_: str) -> None:
+        raise RuntimeError("close failed")
+
+    ctx.provide("a", lambda: "a", close=closed.append)
+    ctx.provide("b", lambda: "b", close=_fail)
+    ctx.get("a")
+    ctx.get("b")
+    with pytest.raises(RuntimeError, match="close failed"):
+        ctx.close()
+    assert closed == ["a"]
+
+
+def test_child_context() -> None:
+    """Test child contexts are layered over the parent."""
+
+    class Custom(Context):
+        """Custom context."""
+
+        def config(self) -> str:
+            """Config."""
+            return self.get("config")
+
+    ctx = Custom()
+    ctx.set("config", "base")
+    ctx.provide("db", lambda: "db", close=lambda _: None)
+    child = ctx.child()
+    assert isinstance(child, Custom)
+    assert child.parent is ctx
+    assert child.config() == "base"
+    assert child.out is ctx.out
+
+    child.set("config", "child")
+    assert child.config() == "child"
+    assert ctx.config() == "base"
+    assert ctx.child().config() == "base"
+
+    assert child.get("db") == "db"
+    assert ctx.get("db") == "db"
+
+    closed = []
+    with ctx.child() as scoped:
+        assert get_current_context() is scoped
+        scoped.provide("http", lambda: "http", close=closed.append)
+        assert scoped.get("http") == "http"
+        assert ctx.get("http") is None
+    assert closed == ["http"]
+    assert get_current_context() is None
+
+
+def test_scope_asyncio_tasks() -> None:
+    """Test every asyncio task sees its own context."""
+    ctx = Context()
+
+    async def _task(value: int) -> t.Tuple[int, t.Any]:
+        with ctx.child() as scoped:
+            scoped.set("value", value)
+            await asyncio.sleep(0.01)
+            return value, t.cast(Context, get_current_context()).get("value")
+
+    async def _main() -> t.List[t.Tuple[int, t.Any]]:
+        return list(await asyncio.gather(*map(_task, range(10))))
+
+    assert all(value == seen for value, seen in asyncio.run(_main()))
+
+
+def _user() -> str:
+    """Read the user from the context of the running invocation."""
+    return t.cast(Context, get_current_context()).get("user")
+
+
+GREETED: t.List[t.Tuple[str, str]] = []
+
+
+@Group.wrap
+def cli(context: Context, user: Annotated[str, String()] = "nobody") -> None:
+    """CLI"""
+    context.set("user", user)
+
+
+@cli.command
+def greet(delay: Annotated[int, Integer()], context: Context) -> str:
+    """Greet"""
+    time.sleep(delay / 1000)
+    assert get_current_context() is context
+    GREETED.append((context.get("user"), _user()))
+    return context.get("user")
+
+
+def test_concurrent_invocations() -> None:
+    """Test concurrent invocations don't share values."""
+    threads = [
+        threading.Thread(
+            target=cli.invoke,
+            kwargs={"argv": [f"--user=user-{i}", "greet", str(20 - i)]},
+        )
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(GREETED) == [(f"user-{i}", f"user-{i}") for i in range(8)]
+    assert cli.context.get("user") is None
+
+    with cli.context.child() as context:
+        cli.invoke_with(context=context, user="alice")
+        assert greet.invoke_with(context=context, delay=0) == "alice"
+    assert greet.invoke_with(delay=0) is None
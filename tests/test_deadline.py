@@ -0,0 +1,162 @@
+"""Test timeouts and deadlines."""
+
+import asyncio
+import signal
+import threading
+import time
+import typing as t
+
+import pytest
+
+from clea.context import Context
+from clea.deadline import EXIT_TIMEOUT, enforce, get_deadline, run_coroutine
+from clea.exceptions import TimeoutExpired
+from clea.runner import run
+from clea.wrappers import Command, Group
+from tests.conftest import loaded_modules
+
+
+pytestmark = pytest.mark.usefixtures("parsers")
+
+
+def test_get_deadline() -> None:
+    """Test the earliest deadline wins."""
+    assert get_deadline(None, None) is None
+    now = time.monotonic()
+    assert get_deadline(now + 1, 10.0) == now + 1
+    assert get_deadline(None, 1.0, 10.0) < now + 2  # type: ignore
+
+
+def test_enforce() -> None:
+    """Test the signal timer interrupts the main thread."""
+    with pytest.raises(TimeoutExpired, match="Command `cmd` timed out"):
+        with enforce(deadline=time.monotonic() + 0.05, name="cmd"):
+            time.sleep(1)
+    with pytest.raises(TimeoutExpired):
+        with enforce(deadline=time.monotonic() - 1, name="cmd"):
+            pass  # pragma: nocover
+    with enforce(deadline=None, name="cmd"):
+        pass
+
+
+def test_enforce_off_main_thread() -> None:
+    """Test the deadline is not enforced off the main thread."""
+    finished = []
+
+    def _target() -> None:
+        with enforce(deadline=time.monotonic() + 0.01, name="cmd"):
+            time.sleep(0.05)
+        finished.append(True)
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    thread.join()
+    assert finished == [True]
+
+
+def test_run_coroutine() -> None:
+    """Test coroutines are cancelled on the deadline."""
+
+    async def _sleep(delay: float) -> str:
+        await asyncio.sleep(delay)
+        return "done"
+
+    assert run_coroutine(_sleep(0), deadline=None, name="cmd") == "done"
+    assert run_coroutine(_sleep(0), deadline=time.monotonic() + 1, name="cmd") == "done"
+    with pytest.raises(TimeoutExpired):
+        run_coroutine(_sleep(1), deadline=time.monotonic() + 0.05, name="cmd")
+
+
+def test_command_timeout() -> None:
+    """Test command timeout."""
+
+    @Command.wrap(timeout=0.05)
+    def _command() -> None:
+        """Sleep."""
+        time.sleep(1)
+
+    result = run(cli=_command, argv=[], isolated=True)
+    assert result.exit_code == EXIT_TIMEOUT
+    assert "Command `_command` timed out" in result.stderr
+
+
+def test_enforce_nested() -> None:
+    """Test a nested deadline restores the enclosing timer."""
+    with pytest.raises(TimeoutExpired, match="Command `outer` timed out"):
+        with enforce(deadline=time.monotonic() + 0.1, name="outer"):
+            with enforce(deadline=time.monotonic() + 1, name="inner"):
+                time.sleep(2)
+    with enforce(deadline=time.monotonic() + 1, name="outer"):
+        with enforce(deadline=time.monotonic() + 0.5, name="inner"):
+            pass
+        assert 0.9 < signal.getitimer(signal.ITIMER_REAL)[0] <= 1
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+def test_nested_invoke_timeout() -> None:
+    """Test the deadline of a command survives invoking another command."""
+
+    @Command.wrap
+    def _inner() -> None:
+        """Inner."""
+
+    @Command.wrap(timeout=0.5)
+    def _outer(context: Context) -> None:
+        """Outer."""
+        context.invoke(_inner)
+        started = time.monotonic()
+        while time.monotonic() - started < 2:
+            pass
+
+    started = time.monotonic()
+    result = run(cli=_outer, argv=[], isolated=True)
+    assert result.exit_code == EXIT_TIMEOUT
+    assert "Command `_outer` timed out" in result.stderr
+    assert time.monotonic() - started < 1.5
+
+
+def test_async_command_timeout() -> None:
+    """Test async command timeout."""
+
+    @Command.wrap
+    async def _command() -> None:
+        """Sleep."""
+        await asyncio.sleep(1)
+
+    result = run(cli=_command, argv=["--timeout=0.05"], isolated=True)
+    assert result.exit_code == EXIT_TIMEOUT
+
+
+def test_deadline_propagation() -> None:
+    """Test the deadline is set once and shared with the children."""
+    deadlines: t.List[t.Optional[float]] = []
+
+    @Group.wrap(timeout=10)
+    def _group(context: Context) -> None:
+        """Group."""
+        deadlines.append(context.deadline)
+
+    @_group.command(timeout=60)
+    def _command(context: Context) -> None:
+        """Command."""
+        deadlines.append(context.deadline)
+        assert t.cast(float, context.remaining()) <= 10
+
+    result = run(cli=_group, argv=["_command"], isolated=True)
+    assert result.exit_code == 0
+    assert deadlines[0] == deadlines[1]
+
+    result = run(cli=_group, argv=["--timeout=1", "_command"], isolated=True)
+    assert t.cast(float, deadlines[3]) - time.monotonic() <= 1
+
+
+def test_no_deadline() -> None:
+    """Test context without a deadline."""
+    context = Context()
+    assert context.deadline is None
+    assert context.remaining() is None
+
+
+def test_asyncio_loaded_lazily() -> None:
+    """Test `asyncio` is only imported to run a coroutine."""
+    assert "asyncio" not in loaded_modules()
@@ -0,0 +1,170 @@
+"""Test distributed invocations."""
+
+import io
+import os
+import subprocess  # nosec
+import sys
+import textwrap
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from clea.__main__ import main
+from clea.distributed import (
+    distribute,
+    encode,
+    map_items,
+    parse_address,
+    read_message,
+)
+from clea.exceptions import CleaException
+from clea.runner import run
+
+
+WORKER_CLI = '''
+import os
+import time
+from pathlib import Path
+
+from typing_extensions import Annotated
+
+from clea import Integer, String, group
+
+
+@group
+def cli() -> None:
+    """Test CLI."""
+
+
+@cli.command
+def square(n: Annotated[int, Integer()], delay: Annotated[int, Integer()] = 0) -> None:
+    """Square a number."""
+    time.sleep(delay / 1000)
+    print(n, n * n, os.getpid())
+
+
+@cli.command
+def crash(marker: Annotated[str, String()]) -> None:
+    """Kill the worker the first time."""
+    if not Path(marker).exists():
+        Path(marker).write_text("")
+        os._exit(1)
+    print("recovered")
+'''
+
+
+@pytest.fixture(name="workers")
+def _workers(tmp_path: Path) -> t.Iterator[t.List[str]]:
+    """Start three worker processes."""
+    (tmp_path / "worker_cli.py").write_text(textwrap.dedent(WORKER_CLI))
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(tmp_path), str(Path.cwd())]),
+    }
+    processes = [
+        subprocess.Popen(  # pylint: disable=consider-using-with  # nosec
+            [sys.executable, "-m", "clea", "worker", "worker_cli:cli"],
+            stdout=subprocess.PIPE,
+            env=env,
+            text=True,
+        )
+        for _ in range(3)
+    ]
+    try:
+        yield [
+            t.cast(t.IO[str], process.stdout).readline().split()[-1]
+            for process in processes
+        ]
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+            t.cast(t.IO[str], process.stdout).close()
+
+
+def test_messages() -> None:
+    """Test framing and addresses."""
+    stream = io.BytesIO(encode({"argv": ["a", "b"]}) + encode({"x": 1})[:6])
+    assert read_message(stream=stream) == {"argv": ["a", "b"]}
+    assert read_message(stream=stream) is None
+    assert read_message(stream=stream) is None
+
+    assert parse_address("example.com:8000") == ("example.com", 8000)
+    assert parse_address(":8000") == ("127.0.0.1", 8000)
+    assert parse_address("[::1]:8000") == ("::1", 8000)
+    with pytest.raises(CleaException, match="Invalid address"):
+        parse_address("localhost")
+    assert map_items(argv=["square"], items=["1", "2"]) == [
+        ["square", "1"],
+        ["square", "2"],
+    ]
+
+
+def test_distribute(workers: t.List[str]) -> None:
+    """Test results are streamed back from every worker."""
+    results = list(
+        distribute(
+            workers=workers,
+            tasks=map_items(argv=["square", "--delay=20"], items=map(str, range(12))),
+        )
+    )
+    assert sorted(result.index for result in results) == list(range(12))
+    pids = set()
+    for result in results:
+        n, square, pid = result.stdout.split()
+        assert (int(n), int(square)) == (result.index, result.index**2)
+        assert result.exit_code == 0
+        assert result.attempts == 1
+        pids.add(pid)
+    assert len(pids) == 3
+
+
+def test_work_stealing(workers: t.List[str]) -> None:
+    """Test idle workers take the queued tasks of a busy worker."""
+    tasks = [["square", "0", "--delay=1000"]] + [["square", "1"]] * 11
+    results = list(distribute(workers=workers, tasks=tasks))
+    slow = results[-1]
+    assert slow.index == 0
+    assert all(result.worker != slow.worker for result in results[:-1])
+
+
+def test_worker_lost(workers: t.List[str], tmp_path: Path) -> None:
+    """Test tasks of a lost worker are retried on the other workers."""
+    marker = tmp_path / "crashed"
+    tasks = [["crash", str(marker)]] + [["square", "2"]] * 5
+    results = sorted(distribute(workers=workers, tasks=tasks), key=lambda r: r.index)
+    assert results[0].stdout == "recovered\n"
+    assert results[0].attempts == 2
+    assert all(result.exit_code == 0 for result in results)
+    # The first task is taken by the first worker, it is retried elsewhere
+    assert results[0].worker != parse_address(workers[0])
+
+    with pytest.raises(CleaException, match="All workers were lost; 1 tasks"):
+        list(distribute(workers=["127.0.0.1:1"], tasks=[["square", "1"]]))
+    (lost,) = distribute(
+        workers=workers[1:2], tasks=[["crash", str(tmp_path / "again")]], retries=0
+    )
+    assert lost.exit_code == 1
+    assert "Worker lost after 1 attempts" in lost.stderr
+
+
+def test_distribute_command(
+    workers: t.List[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test distributing the lines of stdin."""
+    monkeypatch.setattr(sys, "stdin", io.StringIO("3\n4\n\n5\n"))
+    argv = ["distribute", "--args=square", *(f"-w={worker}" for worker in workers)]
+    result = run(cli=main, argv=argv, isolated=True)
+    assert result.exit_code == 0
+    assert sorted(line.split()[1] for line in result.stdout.read().splitlines()) == [
+        "16",
+        "25",
+        "9",
+    ]
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO("square 6\nsquare x\n"))
+    result = run(cli=main, argv=argv[:1] + argv[2:], isolated=True)
+    assert result.exit_code == 1
+    assert "36" in result.stdout
+    assert "1 of 2 tasks failed" in result.stderr
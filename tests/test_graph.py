@@ -0,0 +1,210 @@
+"""Test dependency graph runner."""
+
+import threading
+import time
+import typing as t
+
+import pytest
+
+from clea.context import Context, get_current_context
+from clea.deadline import EXIT_TIMEOUT
+from clea.exceptions import CleaException
+from clea.graph import resolve
+from clea.runner import run
+from clea.wrappers import Group
+
+
+def _tasks(calls: t.List[str], fail: t.Optional[str] = None) -> Group:
+    """Build a task group, `test` and `lint` depend on `build`."""
+
+    @Group.wrap
+    def tasks() -> None:
+        """Tasks"""
+
+    lock = threading.Lock()
+
+    def _task(name: str) -> None:
+        with lock:
+            calls.append(name)
+        if name == fail:
+            raise CleaException(message=f"{name} failed", exit_code=2)
+
+    @tasks.command
+    def build() -> None:
+        """Build"""
+        _task("build")
+
+    @tasks.command(depends_on=["build"])
+    def test() -> None:
+        """Test"""
+        _task("test")
+
+    @tasks.command(depends_on=["build"])
+    def lint() -> None:
+        """Lint"""
+        _task("lint")
+
+    @tasks.command(depends_on=["test", "lint"])
+    def release() -> None:
+        """Release"""
+        _task("release")
+
+    tasks.add_graph_command()
+    return tasks
+
+
+def test_resolve() -> None:
+    """Test resolving dependencies."""
+    tasks = _tasks(calls=[])
+    graph = resolve(children=tasks._children, targets=["test"])
+    assert graph == {"build": set(), "test": {"build"}}
+
+    with pytest.raises(CleaException, match="Unknown command `deploy`"):
+        resolve(children=tasks._children, targets=["deploy"])
+
+    with pytest.raises(CleaException, match="Unknown command `run`"):
+        resolve(children=tasks._children, targets=["run"])
+
+
+def test_resolve_cycle() -> None:
+    """Test cycle detection."""
+
+    @Group.wrap
+    def tasks() -> None:
+        """Tasks"""
+
+    @tasks.command(depends_on=["b"])
+    def a() -> None:
+        """A"""
+
+    @tasks.command(depends_on=["a"])
+    def b() -> None:
+        """B"""
+
+    with pytest.raises(CleaException, match="Dependency cycle detected a -> b -> a"):
+        resolve(children=tasks._children, targets=["a"])
+
+
+@pytest.mark.parametrize("processes", (False, True))
+def test_run_graph(processes: bool) -> None:
+    """Test running in dependency order."""
+    calls: t.List[str] = []
+    tasks = _tasks(calls=calls)
+    assert tasks.run_graph(targets=["release"], jobs=4, processes=processes) == 0
+    if not processes:
+        assert calls[0] == "build"
+        assert sorted(calls[1:3]) == ["lint", "test"]
+        assert calls[3] == "release"
+
+
+def test_run_graph_parallel() -> None:
+    """Test independent commands run in parallel."""
+
+    @Group.wrap
+    def tasks() -> None:
+        """Tasks"""
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    @tasks.command
+    def a() -> None:
+        """A"""
+        barrier.wait()
+
+    @tasks.command
+    def b() -> None:
+        """B"""
+        barrier.wait()
+
+    assert tasks.run_graph(targets=["a", "b"], jobs=2) == 0
+
+
+def test_run_graph_failure() -> None:
+    """Test no commands are scheduled after a failure."""
+    calls: t.List[str] = []
+    tasks = _tasks(calls=calls, fail="build")
+    assert tasks.run_graph(targets=["release"], jobs=4) == 2
+    assert calls == ["build"]
+
+
+def test_run_graph_failure_waits_running() -> None:
+    """Test running commands finish after a failure."""
+
+    @Group.wrap
+    def tasks() -> None:
+        """Tasks"""
+
+    finished = []
+
+    @tasks.command
+    def slow() -> None:
+        """Slow"""
+        time.sleep(0.1)
+        finished.append("slow")
+
+    @tasks.command
+    def broken() -> None:
+        """Broken"""
+        raise ValueError("broken")
+
+    @tasks.command(depends_on=["broken"])
+    def after() -> None:
+        """After"""
+        finished.append("after")
+
+    assert tasks.run_graph(targets=["slow", "after"], jobs=2) == 1
+    assert finished == ["slow"]
+
+
+def test_graph_command() -> None:
+    """Test running the graph from the command line."""
+    calls: t.List[str] = []
+    tasks = _tasks(calls=calls)
+    result = run(cli=tasks, argv=["run", "test", "lint", "--jobs=2"], isolated=True)
+    assert result.exit_code == 0, result.stderr
+    assert sorted(calls) == ["build", "lint", "test"]
+
+    result = run(cli=tasks, argv=["run", "--help"], isolated=True)
+    assert "Usage: run [OPTIONS] TARGETS..." in result.stdout
+    assert "-j, --jobs" in result.stdout
+
+    result = run(cli=tasks, argv=["run"], isolated=True)
+    assert result.exit_code == 1
+    assert "Missing argument for positional arguments TARGETS" in result.stderr
+
+
+def test_graph_command_options() -> None:
+    """Test commands run with the global options and the graph context."""
+
+    @Group.wrap
+    def tasks(context: Context) -> None:
+        """Tasks"""
+        context.set("env", "prod")
+
+    @tasks.command
+    def build(context: Context) -> str:
+        """Build"""
+        assert get_current_context() is context
+        return f"build {context.get('env')}"
+
+    @tasks.command
+    def slow() -> None:
+        """Slow"""
+        started = time.monotonic()
+        while time.monotonic() - started < 2:
+            pass
+
+    tasks.add_graph_command()
+    result = run(cli=tasks, argv=["run", "build", "--output=text"], isolated=True)
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "build prod\n"
+    assert tasks.context is not None and tasks.context.get("env") is None
+
+    started = time.monotonic()
+    result = run(
+        cli=tasks,
+        argv=["--timeout=0.3", "run", "slow", "--processes"],
+        isolated=True,
+    )
+    assert result.exit_code == EXIT_TIMEOUT
+    assert time.monotonic() - started < 1.5
@@ -1,6 +1,19 @@
 """Test helpers."""
 
-from clea.helpers import get_function_metadata
+import importlib
+import typing as t
+from pathlib import Path
+
+import pytest
+from typing_extensions import Annotated, get_type_hints
+
+import clea.helpers as helpers
+from clea.helpers import get_annotations, get_function_metadata
+from clea.params import Integer, String
+from clea.runner import run
+
+
+pytestmark = pytest.mark.usefixtures("parsers")
 
 
 def test_get_function_metadata_empty() -> None:
@@ -34,3 +47,62 @@ def test_get_function_metadata_with_default() -> None:
     defaults, type_mapping = get_function_metadata(_method_1)
     assert defaults == {"name": 1}
     assert len(type_mapping) == 2  # return param
+
+
+POSTPONED = '''
+from __future__ import annotations
+
+import typing as t
+
+from typing_extensions import Annotated
+
+from clea import Integer, String, command
+
+if t.TYPE_CHECKING:
+    from clea import Context
+
+
+@command
+def greet(
+    context: Context,
+    name: Annotated[str, String()],
+    count: Annotated[int, Integer(long_flag="--count")] = None,
+) -> None:
+    """Greet"""
+    print(" ".join([f"Hello {name}"] * (count or 1)))
+'''
+
+
+def test_get_annotations_postponed(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test resolving postponed annotations lazily."""
+    (tmp_path / "_postponed.py").write_text(POSTPONED, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    calls = []
+    monkeypatch.setattr(
+        helpers,
+        "get_type_hints",
+        lambda *args, **kwargs: calls.append(args) or get_type_hints(*args, **kwargs),
+    )
+    greet = importlib.import_module("_postponed").greet
+    assert len(calls) == 0
+
+    annotations = get_annotations(greet._f)
+    assert annotations["context"] == "Context"
+    assert annotations["name"].__metadata__[0].__class__ is String
+    # Arguments defaulting to `None` are not wrapped in `Optional`
+    assert annotations["count"].__metadata__[0].__class__ is Integer
+    assert get_annotations(greet._f) is annotations
+    resolved = len(calls)
+
+    result = run(cli=greet, argv=["clea", "--count=2"], isolated=True)
+    assert result.stdout == "Hello clea Hello clea\n"
+    assert len(calls) == resolved
+
+
+def test_get_annotations_plain() -> None:
+    """Test plain annotations are used as they are."""
+
+    def _method(name: Annotated[str, String()]) -> None:
+        """Testing method."""
+
+    assert get_annotations(_method) == _method.__annotations__
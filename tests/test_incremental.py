@@ -0,0 +1,135 @@
+"""Test incremental execution."""
+
+import os
+import typing as t
+from pathlib import Path
+
+import pytest
+from typing_extensions import Annotated
+
+from clea.incremental import Incremental, hash_file
+from clea.params import Directory, File
+from clea.runner import run
+from clea.wrappers import Command
+from tests.conftest import loaded_modules
+
+
+pytestmark = pytest.mark.usefixtures("parsers")
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use a temporary state directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def _convert(calls: t.List[Path], target: Path) -> Command:
+    """Build an incremental command writing `target`."""
+
+    @Command.wrap(incremental=True, outputs=[target])
+    def convert(
+        source: Annotated[Path, File(long_flag="--source")],
+        assets: Annotated[t.Optional[Path], Directory(long_flag="--assets")] = None,
+    ) -> None:
+        """Convert"""
+        calls.append(source)
+        target.write_text(source.read_text())
+
+    return convert
+
+
+def test_hash_file(tmp_path: Path) -> None:
+    """Test chunked hashing."""
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"a" * 10)
+    assert hash_file(path=path, chunk_size=3) == hash_file(path=path)
+
+
+def test_skip_unchanged(tmp_path: Path) -> None:
+    """Test unchanged inputs skip the command."""
+    calls: t.List[Path] = []
+    source = tmp_path / "source.txt"
+    source.write_text("data")
+    target = tmp_path / "target.txt"
+    convert = _convert(calls=calls, target=target)
+    argv = [f"--source={source}"]
+
+    assert run(cli=convert, argv=argv, isolated=True).exit_code == 0
+    result = run(cli=convert, argv=argv, isolated=True)
+    assert result.exit_code == 0
+    assert "inputs are unchanged" in result.stderr
+    assert len(calls) == 1
+
+    run(cli=convert, argv=[*argv, "--force"], isolated=True)
+    assert len(calls) == 2
+
+    target.unlink()
+    run(cli=convert, argv=argv, isolated=True)
+    assert len(calls) == 3
+
+    source.write_text("changed")
+    run(cli=convert, argv=argv, isolated=True)
+    assert len(calls) == 4
+
+
+def test_touch_reuses_digest(tmp_path: Path) -> None:
+    """Test a new modification time with the same contents doesn't rerun."""
+    calls: t.List[Path] = []
+    source = tmp_path / "source.txt"
+    source.write_text("data")
+    convert = _convert(calls=calls, target=tmp_path / "target.txt")
+    argv = [f"--source={source}"]
+    run(cli=convert, argv=argv, isolated=True)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    run(cli=convert, argv=argv, isolated=True)
+    assert len(calls) == 1
+
+
+def test_directory_inputs(tmp_path: Path) -> None:
+    """Test files under directory arguments are fingerprinted."""
+    calls: t.List[Path] = []
+    source = tmp_path / "source.txt"
+    source.write_text("data")
+    assets = tmp_path / "assets"
+    (assets / "nested").mkdir(parents=True)
+    (assets / "nested" / "a.txt").write_text("a")
+    convert = _convert(calls=calls, target=tmp_path / "target.txt")
+    argv = [f"--source={source}", f"--assets={assets}"]
+    run(cli=convert, argv=argv, isolated=True)
+    run(cli=convert, argv=argv, isolated=True)
+    assert len(calls) == 1
+    (assets / "nested" / "a.txt").write_text("b")
+    run(cli=convert, argv=argv, isolated=True)
+    assert len(calls) == 2
+
+
+def test_state_per_arguments(tmp_path: Path) -> None:
+    """Test alternating between arguments keeps the state of each."""
+    calls: t.List[Path] = []
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text("first")
+    second.write_text("second")
+    convert = _convert(calls=calls, target=tmp_path / "target.txt")
+    for source in (first, second, first, second):
+        run(cli=convert, argv=[f"--source={source}"], isolated=True)
+    assert calls == [first, second]
+
+
+def test_failure_not_recorded(tmp_path: Path) -> None:
+    """Test failed runs are not recorded."""
+    incremental = Incremental(directory=tmp_path)
+    calls = []
+
+    def _call() -> int:
+        calls.append(1)
+        return 1
+
+    assert incremental.run(name="failing", kwargs={}, call=_call) == 1
+    assert incremental.run(name="failing", kwargs={}, call=_call) == 1
+    assert len(calls) == 2
+
+
+def test_sqlite3_loaded_lazily() -> None:
+    """Test `sqlite3` is only imported to open the state database."""
+    assert "sqlite3" not in loaded_modules()
@@ -0,0 +1,78 @@
+"""Test memory profiler."""
+
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+from clea import memory
+from clea.runner import run
+from examples.manage_students import main
+from tests.conftest import loaded_modules
+
+
+def test_profile_to_stderr() -> None:
+    """Test phases are reported on stderr."""
+    result = run(
+        cli=main,
+        argv=["admin", "remove", "name"],
+        isolated=True,
+        profile_memory=True,
+    )
+    assert result.exit_code == 0
+    assert "Memory profile" in result.stderr
+    for phase in (
+        "build students",
+        "parse students",
+        "callback students",
+        "callback admin",
+        "parse remove",
+        "command remove",
+    ):
+        assert phase in result.stderr
+    assert not tracemalloc.is_tracing()
+
+
+def test_profile_to_file(tmp_path: Path, monkeypatch: t.Any) -> None:
+    """Test report file configured using the environment."""
+    report = tmp_path / "memory.txt"
+    monkeypatch.setenv(memory.ENV_VAR, str(report))
+    result = run(cli=main, argv=["admin", "remove", "name"], isolated=True)
+    assert "Memory profile" not in result.stderr
+    assert "command remove" in report.read_text()
+
+
+def test_mark_inactive() -> None:
+    """Test marking phases is a no-op without an active profiler."""
+    memory.mark("phase")
+    assert memory.stop() is None
+
+
+def test_mark_listener() -> None:
+    """Test listeners receive the phase marks."""
+    phases: t.List[str] = []
+    memory.add_listener(phases.append)
+    try:
+        run(cli=main, argv=["admin", "remove", "name"], isolated=True)
+    finally:
+        memory.remove_listener(phases.append)
+    memory.mark("after")
+    assert "parse remove" in phases
+    assert "after" not in phases
+
+
+def test_profiler_top_allocations() -> None:
+    """Test allocation sites are reported per phase."""
+    profiler = memory.MemoryProfiler(top=3)
+    profiler.start()
+    data = [bytearray(1024) for _ in range(64)]
+    profiler.mark("allocate")
+    profiler.stop()
+    assert len(data) == 64
+    (phase,) = profiler.phases
+    assert phase.peak >= 64 * 1024
+    assert "test_memory.py" in profiler.report()
+
+
+def test_tracemalloc_loaded_lazily() -> None:
+    """Test `tracemalloc` is only imported when profiling."""
+    assert "tracemalloc" not in loaded_modules()
@@ -0,0 +1,125 @@
+"""Test output channels."""
+
+import contextlib
+import io
+import threading
+import typing as t
+
+import pytest
+
+from clea.output import OutputFormat, Writer, render
+
+
+def test_writer_buffering() -> None:
+    """Test data is held until the buffer fills up."""
+    writer = Writer(buffer_size=8)
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        writer.write("abc")
+        assert stdout.getvalue() == ""
+        writer.write(b"defgh")
+        assert stdout.getvalue() == "abcdefgh"
+        writer.write("i")
+        writer.flush()
+    assert stdout.getvalue() == "abcdefghi"
+
+
+def test_writer_bytes_fast_path() -> None:
+    """Test bytes are written to the binary buffer."""
+    stream = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", write_through=True)
+    writer = Writer(stream="stderr")
+    with contextlib.redirect_stderr(new_target=stream):
+        print("first", file=stream, end="\n")
+        writer.writelines([b"second\n", "third\n"])
+        writer.flush()
+    assert _value(stream) == b"first\nsecond\nthird\n"
+
+
+def _value(stream: io.TextIOWrapper) -> bytes:
+    """Read the bytes written to a text wrapper."""
+    return stream.buffer.getvalue()  # type: ignore
+
+
+def test_writer_flush_empty() -> None:
+    """Test flushing an empty buffer does not touch the stream."""
+    writer = Writer()
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        writer.flush()
+    assert stdout.getvalue() == ""
+
+
+def test_writer_threads() -> None:
+    """Test concurrent writes don't lose data."""
+    writer = Writer(buffer_size=64)
+
+    def _write(char: str) -> None:
+        for _ in range(1000):
+            writer.write(char * 8)
+
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        threads = [threading.Thread(target=_write, args=(c,)) for c in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+    value = stdout.getvalue()
+    assert len(value) == 32000
+    assert all(value.count(c) == 8000 for c in "abcd")
+
+
+@pytest.mark.parametrize(
+    argnames=("output", "expected"),
+    argvalues=(
+        (OutputFormat.TEXT, "a: 1\n"),
+        (OutputFormat.JSON, '{"a": 1}\n'),
+        (OutputFormat.NDJSON, '{"a": 1}\n'),
+    ),
+)
+def test_render_value(output: OutputFormat, expected: str) -> None:
+    """Test rendering a single value."""
+    writer = Writer()
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        render(value={"a": 1}, output=output, writer=writer)
+        render(value=None, output=output, writer=writer)
+        writer.flush()
+    assert stdout.getvalue() == expected
+
+
+@pytest.mark.parametrize(
+    argnames=("output", "expected"),
+    argvalues=(
+        (OutputFormat.TEXT, "0\n1\n2\n"),
+        (OutputFormat.JSON, "[0,1,2]\n"),
+        (OutputFormat.NDJSON, "0\n1\n2\n"),
+    ),
+)
+def test_render_generator(output: OutputFormat, expected: str) -> None:
+    """Test rendering a generator."""
+    writer = Writer()
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        render(value=(i for i in range(3)), output=output, writer=writer)
+        writer.flush()
+    assert stdout.getvalue() == expected
+
+
+def test_render_closes_generator() -> None:
+    """Test the generator is closed when the consumer goes away."""
+    closed = []
+
+    def _items() -> t.Iterator[int]:
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.append(True)
+
+    class _Closed(io.StringIO):
+        def write(self, s: str) -> int:
+            raise BrokenPipeError()
+
+    writer = Writer(buffer_size=1)
+    with contextlib.redirect_stdout(new_target=_Closed()), pytest.raises(
+        BrokenPipeError
+    ):
+        render(value=_items(), output=OutputFormat.NDJSON, writer=writer)
+    assert closed == [True]
@@ -131,6 +131,64 @@ def test_choice_by_flag_parameter() -> None:
     assert param.help() == "--one, --two                  Choice"
 
 
+def test_choice_index() -> None:
+    """Test case insensitive and prefix matching."""
+    regions = Enum(  # type: ignore
+        "Region", {f"R{i}": f"region-{i:04d}" for i in range(2000)}
+    )
+    param = Choice(regions, "-r", case_sensitive=False, prefix=True)
+    param.name = "region"
+    param.create_long_flag()
+    assert param.parse("REGION-0042") == regions.R42
+    assert param.parse("region-1999") == regions.R1999
+    with pytest.raises(ParsingError, match="Value matches multiple choices"):
+        param.parse("region-00")
+    with pytest.raises(ParsingError, match=r"\.\.\. \+1984 more\}; Did you mean"):
+        param.parse("regoin-0042")
+    assert "region-0015|... +1984 more]" in param.help()
+
+    exact = Choice(_TestEnum, "-p")
+    exact.name = "param"
+    with pytest.raises(ParsingError, match="Expected value from"):
+        exact.parse("ONE")
+    with pytest.raises(ParsingError, match="Expected value from"):
+        exact.parse("on")
+
+
+def test_choice_index_suggestions() -> None:
+    """Test suggestions for large enums compare only the nearby choices."""
+    members = Enum(  # type: ignore
+        "Member", {f"M{i}": f"member_{i}" for i in range(20000)}
+    )
+    index = Choice(members, "-m").index
+    assert index.suggest("membr_123")[0] == "member_123"
+    assert index.suggest("xember_77")[0] == "member_77"
+    assert (
+        len(index._candidates("membr_123")) <= 128
+    )  # pylint: disable=protected-access
+
+
+def test_choice_index_case_collisions() -> None:
+    """Test choices which differ only by case are matched exactly."""
+    names = Enum("Names", {"A": "Foo", "B": "FOO", "C": "bar"})  # type: ignore
+    param = Choice(names, "-n", case_sensitive=False)
+    param.name = "name"
+    assert param.parse("Foo") == names.A
+    assert param.parse("FOO") == names.B
+    with pytest.raises(ParsingError, match="Did you mean"):
+        param.parse("foo")
+    with pytest.raises(ParsingError, match="Expected value from"):
+        param.parse("BAR")
+
+
+def test_choice_by_flag_suggestions() -> None:
+    """Test close matches are suggested for unknown flags."""
+    param = ChoiceByFlag(_TestEnum, help="Choice")
+    param.name = "param"
+    with pytest.raises(ParsingError, match="Did you mean --one"):
+        param.parse("--onr")
+
+
 def test_file_parameter() -> None:
     """Test File object."""
     param = File(exists=True)
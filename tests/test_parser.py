@@ -4,8 +4,17 @@ import typing as t
 
 import pytest
 
-from clea.exceptions import ExtraArgumentProvided, ArgumentsMissing
-from clea.params import Boolean, ContextParameter, String, StringList, VersionParameter
+from clea.exceptions import ExtraArgumentProvided, ArgumentsMissing, ParsingError
+from clea.params import (
+    Boolean,
+    ContextParameter,
+    Integer,
+    String,
+    StringList,
+    Values,
+    Variadic,
+    VersionParameter,
+)
 from clea.parser import BaseParser, CommandParser, GroupParser
 from clea.runner import run
 
@@ -130,3 +139,69 @@ class TestGroupParser:
         parser = GroupParser()
         *_, sub_command, _ = parser.parse(["hello"], commands={"hello": "cmd"})
         assert sub_command == "cmd"
+
+
+class TestVariadic:
+    """Test variadic positional arguments."""
+
+    def get_parser(self, nargs: str = "*") -> CommandParser:
+        """Get parser with a fixed and a variadic argument."""
+        first = String()
+        first.name = "first"
+        rest = Variadic(Integer(), nargs=nargs)
+        rest.name = "rest"
+        flag = Boolean(long_flag="--flag")
+        flag.name = "flag"
+        parser = CommandParser()
+        parser.add(first)
+        parser.add(rest)
+        parser.add(flag)
+        return parser
+
+    def test_parse_variadic(self) -> None:
+        """Test capturing the remaining arguments."""
+        argv = ["a", "1", "2", "--flag", "3"]
+        kwargs, *_ = self.get_parser().copy().parse(argv)
+        assert kwargs["first"] == "a"
+        assert kwargs["flag"] is True
+        assert isinstance(kwargs["rest"], Values)
+        assert list(kwargs["rest"]) == [1, 2, 3]
+        # Values are converted again on every iteration
+        assert list(kwargs["rest"]) == [1, 2, 3]
+
+    def test_parse_end_of_options(self) -> None:
+        """Test `--` ends the options."""
+        kwargs, *_ = self.get_parser().copy().parse(["a", "1", "--", "-2", "--3"])
+        with pytest.raises(ParsingError, match="Provided value=--3"):
+            list(kwargs["rest"])
+        assert kwargs["flag"] is False
+
+        kwargs, *_ = self.get_parser().copy().parse(["--", "--help", "-1"])
+        assert kwargs["first"] == "--help"
+        assert list(kwargs["rest"]) == [-1]
+
+    def test_parse_nargs(self) -> None:
+        """Test the minimum number of values."""
+        kwargs, *_ = self.get_parser(nargs="*").copy().parse(["a"])
+        assert list(kwargs["rest"]) == []
+        with pytest.raises(ArgumentsMissing, match="<REST... type=int>"):
+            self.get_parser(nargs="+").copy().parse(["a", "--flag"])
+        with pytest.raises(ValueError, match="Invalid nargs"):
+            Variadic(Integer(), nargs="?")
+
+    def test_lazy_conversion(self) -> None:
+        """Test the values are converted while iterating."""
+        argv = ["a", "1", "x", *map(str, range(100_000))]
+        kwargs, *_ = self.get_parser().copy().parse(argv)
+        values = iter(kwargs["rest"])
+        assert next(values) == 1
+        with pytest.raises(ParsingError, match="Provided value=x"):
+            next(values)
+
+    def test_positional_after_variadic(self) -> None:
+        """Test positional arguments can't follow a variadic argument."""
+        parser = self.get_parser()
+        last = String()
+        last.name = "last"
+        with pytest.raises(ValueError, match="can't follow the variadic argument"):
+            parser.add(last)
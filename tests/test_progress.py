@@ -0,0 +1,79 @@
+"""Test progress reporting."""
+
+import contextlib
+import io
+import threading
+import typing as t
+
+from clea.context import Context
+from clea.progress import Progress, ProgressMode
+from clea.runner import run
+from clea.wrappers import Command
+
+
+class _TTY(io.StringIO):
+    """Terminal stream."""
+
+    def isatty(self) -> bool:
+        """Pretend to be a terminal."""
+        return True
+
+
+def test_progress_tty() -> None:
+    """Test rendering on a terminal."""
+    with contextlib.redirect_stderr(new_target=_TTY()) as stderr:
+        with Progress(total=10, description="items", rate=1e9) as progress:
+            assert progress.mode == ProgressMode.TTY
+            progress.update(5)
+    output = stderr.getvalue()
+    assert "\r\033[Kitems [##########..........]  50% 5/10" in output
+    assert "ETA" in output
+    assert output.endswith("\n")
+
+
+def test_progress_log() -> None:
+    """Test periodic log lines when not on a terminal."""
+    with contextlib.redirect_stderr(new_target=io.StringIO()) as stderr:
+        progress = Progress(log_interval=60)
+        assert progress.mode == ProgressMode.LOG
+        progress.update()
+        assert stderr.getvalue() == ""
+        progress.close()
+    assert stderr.getvalue().startswith("1 ")
+    assert "elapsed 00:00:00\n" in stderr.getvalue()
+
+
+def test_progress_threads() -> None:
+    """Test updating from multiple threads."""
+    progress = Progress(total=8000, mode=ProgressMode.DISABLED)
+
+    def _work() -> None:
+        for _ in range(1000):
+            progress.update()
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert progress.count == 8000
+    assert progress.eta is not None
+
+
+def test_progress_isolated() -> None:
+    """Test progress is not rendered in isolated runs."""
+    modes: t.List[ProgressMode] = []
+
+    @Command.wrap
+    def _command(context: Context) -> None:
+        """Track progress."""
+        with context.progress(total=3) as progress:
+            modes.append(progress.mode)
+            for _ in range(3):
+                progress.update()
+
+    result = run(cli=_command, argv=[], isolated=True)
+    assert result.stderr == ""
+    assert modes == [ProgressMode.DISABLED]
+    assert _command.context is not None
+    assert _command.context.isolated is False
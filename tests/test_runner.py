@@ -2,12 +2,24 @@
 
 import contextlib
 import io
+import json
 from unittest import mock
 
+import pytest
+from typing_extensions import Annotated
+
+from clea.capture import CapturedOutput, Spool
+from clea.context import Context
+from clea.exceptions import CleaException
+from clea.params import Integer
 from clea.runner import run
+from clea.wrappers import command
 from examples.add import add as cli
 
 
+pytestmark = pytest.mark.usefixtures("parsers")
+
+
 def test_runner() -> None:
     """Test runner."""
     with mock.patch("sys.exit"), contextlib.redirect_stdout(
@@ -30,3 +42,112 @@ def test_runner_stderr_capture() -> None:
         "Missing argument for positional arguments <N1 type=int>, <N2 type=int>"
         in result.stderr
     )
+
+
+def test_runner_isolated_buffered_output() -> None:
+    """Test buffered context output is flushed into the capture."""
+
+    @command
+    def _command(context: Context) -> None:
+        """Write through the context."""
+        print("first")
+        context.out.write(b"second\n")
+        context.out.writelines(["third\n", "fourth\n"])
+        context.err.write("error\n")
+
+    result = run(cli=_command, argv=[], isolated=True)
+    assert result.stdout == "first\nsecond\nthird\nfourth\n"
+    assert result.stderr == "error\n"
+
+
+def test_runner_buffered_output_flush_on_error() -> None:
+    """Test buffered context output is flushed when the command fails."""
+
+    @command
+    def _command(context: Context) -> None:
+        """Write and fail."""
+        context.out.write("partial\n")
+        raise ValueError("failed")
+
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        assert _command.invoke(argv=[], isolated=True) == 1
+    assert stdout.getvalue() == "partial\n"
+
+
+def test_runner_closes_resources() -> None:
+    """Test provided resources are closed when the invocation ends."""
+    events = []
+    context = Context()
+    context.provide("db", lambda: "db", close=events.append)
+
+    @command(context=context)
+    def _command(context: Context) -> None:
+        """Use the resource and fail."""
+        assert context.get("db") == "db"
+        raise CleaException(message="failed", exit_code=2)
+
+    result = run(cli=_command, argv=[], isolated=True)
+    assert result.exit_code == 2
+    assert events == ["db"]
+
+    run(cli=_command, argv=["--help"], isolated=True)
+    assert events == ["db"]
+
+
+def test_runner_spooled_capture(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test large output is moved to a temporary file and read lazily."""
+
+    @command
+    def _command(count: Annotated[int, Integer()]) -> None:
+        """Write lines."""
+        for i in range(count):
+            print(f"line {i} é")
+        raise CleaException(message="failed", exit_code=2)
+
+    result = run(cli=_command, argv=["20000"], isolated=True, spool_size=1024)
+    assert result.exit_code == 2
+    assert not result.stdout.in_memory
+    assert result.stdout.size == sum(
+        len(f"line {i} é\n".encode()) for i in range(20000)
+    )
+    assert result.stdout.tail(2) == ["line 19998 é\n", "line 19999 é\n"]
+    assert result.stdout.tail(0) == []
+    lines = list(result.stdout)
+    assert len(lines) == 20000
+    assert lines[12345] == "line 12345 é\n"
+    assert "line 19999 é" in result.stdout
+    assert "line 20000" not in result.stdout
+    assert result.stdout == "".join(lines)
+    assert len(result.stdout) == len("".join(lines))
+    assert result.stdout.read().splitlines()[0] == "line 0 é"
+    assert result.stderr == "failed"
+    result.stdout.close()
+
+    monkeypatch.setenv("CLEA_SPOOL_SIZE", "100000000")
+    result = run(cli=_command, argv=["3"], isolated=True)
+    assert result.stdout.in_memory
+    assert result.stdout.tail(5) == list(result.stdout)
+    assert result.stdout.read() == "line 0 é\nline 1 é\nline 2 é\n"
+
+
+def test_captured_output() -> None:
+    """Test reading captured output."""
+    spool = Spool(max_size=4)
+    spool.write(b"ab\ncd")
+    assert spool.spilled
+    output = spool.output()
+    assert output.tail(1) == ["cd"]
+    assert output.tail(5) == ["ab\n", "cd"]
+    assert list(output) == ["ab\n", "cd"]
+    assert "b\nc" in output
+    assert output + "!" == "ab\ncd!"
+    assert repr(output) == "<CapturedOutput 5 bytes>"
+    assert len(output) == 5
+    assert output[0] == "a"
+    assert output[-2:] == "cd"
+    assert str(output) == "ab\ncd"
+    assert not hasattr(output, "splitlines")
+    assert len(CapturedOutput.from_text("é")) == 1
+    assert json.loads(CapturedOutput.from_text('{"n": 1}').read()) == {"n": 1}
+    assert not CapturedOutput.from_text("")
+    assert repr(CapturedOutput.from_text("x")) == "'x'"
@@ -0,0 +1,92 @@
+"""Test sampling profiler."""
+
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+import pytest
+from typing_extensions import Annotated
+
+from clea.params import Float
+from clea.runner import run
+from clea.sampling import SamplingProfiler, profile
+from clea.wrappers import Command
+
+
+def _spin(seconds: float) -> int:
+    """Burn CPU time."""
+    count = 0
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        count += 1
+    return count
+
+
+@Command.wrap
+def spin(seconds: Annotated[float, Float()]) -> None:
+    """Spin"""
+    _spin(seconds=seconds)
+
+
+def test_sampling_profiler() -> None:
+    """Test sampling and rendering the stacks."""
+    profiler = SamplingProfiler(frequency=200)
+    profiler.start()
+    try:
+        _spin(seconds=0.2)
+    finally:
+        profiler.stop()
+    assert profiler.samples >= 10
+    assert sum(profiler.stacks.values()) == profiler.samples
+
+    lines = profiler.collapsed().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+    assert any(
+        "test_sampling_profiler (" in line and ";_spin (" in line for line in lines
+    )
+
+    (label, own, total), *_ = profiler.top(n=3)
+    assert label == f"_spin ({__file__}:{_spin.__code__.co_firstlineno})"
+    assert own == total
+    assert "_spin (" in profiler.report().splitlines()[3]
+
+    with pytest.raises(ValueError, match="Invalid sampling frequency"):
+        SamplingProfiler(frequency=0)
+
+
+def test_run_profiled(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test profiling a run."""
+    output = tmp_path / "stacks.txt"
+    result = run(
+        cli=spin,
+        argv=["0.1"],
+        isolated=True,
+        profile_cpu=output,
+        profile_frequency=500,
+    )
+    assert result.exit_code == 0
+    assert "samples at 500 Hz" in result.stderr
+    assert ";spin (" in output.read_text()
+
+    monkeypatch.setenv("CLEA_PROFILE_CPU", "-")
+    monkeypatch.setenv("CLEA_PROFILE_FREQUENCY", "50")
+    result = run(cli=spin, argv=["0"], isolated=True)
+    assert result.stderr.read().startswith("CPU profile, ")
+    assert "at 50 Hz" in result.stderr
+
+
+def test_profile_off_main_thread() -> None:
+    """Test profiling is skipped off the main thread."""
+    profilers: t.List[t.Any] = []
+
+    def _target() -> None:
+        with profile(target=True) as profiler:
+            profilers.append(profiler)
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    thread.join()
+    assert profilers == [None]
+    with profile(target=None) as profiler:
+        assert profiler is None
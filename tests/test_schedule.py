@@ -0,0 +1,149 @@
+"""Test scheduled runs."""
+
+import time
+import typing as t
+from datetime import datetime
+from functools import partial
+
+import pytest
+from typing_extensions import Annotated
+
+import clea.wrappers
+from clea.context import Context
+from clea.exceptions import CleaException, ParsingError
+from clea.params import Integer
+from clea.schedule import (
+    Cron,
+    CronParameter,
+    IntervalParameter,
+    IntervalSchedule,
+    Overlap,
+    RunStats,
+    get_schedule,
+    parse_interval,
+    run_scheduled,
+)
+from clea.wrappers import Command
+
+
+def test_parse_interval() -> None:
+    """Test parsing intervals."""
+    assert parse_interval("10") == 10
+    assert parse_interval("250ms") == 0.25
+    assert parse_interval("1.5m") == 90
+    assert parse_interval("2h") == 7200
+    assert parse_interval("1d") == 86400
+    for value in ("", "10x", "-1s", "0s"):
+        with pytest.raises(ValueError):
+            parse_interval(value)
+    with pytest.raises(ParsingError, match="Invalid interval `soon`"):
+        IntervalParameter(long_flag="--every").parse("soon")
+
+
+def test_cron() -> None:
+    """Test computing the next run of cron expressions."""
+    now = datetime(2024, 12, 31, 23, 58, 30)
+    assert Cron("*/5 * * * *").next_after(now) == datetime(2025, 1, 1, 0, 0)
+    assert Cron("30 9 * * 1-5").next_after(now) == datetime(2025, 1, 1, 9, 30)
+    assert Cron("0 12 15 */3 *").next_after(now) == datetime(2025, 1, 15, 12, 0)
+    assert Cron("@monthly").next_after(now) == datetime(2025, 1, 1, 0, 0)
+    # Either day field matches if both are restricted, 2025-01-03 is a friday
+    assert Cron("0 0 10 * 5").next_after(now) == datetime(2025, 1, 3, 0, 0)
+    assert Cron("0 0 * * 7").next_after(now) == datetime(2025, 1, 5, 0, 0)
+    assert Cron("0,30 8-9 * * *").next_after(datetime(2025, 1, 1, 8, 30)) == (
+        datetime(2025, 1, 1, 9, 0)
+    )
+    assert Cron("0 0 29 2 *").next_after(now) == datetime(2028, 2, 29, 0, 0)
+
+    for expression, error in (
+        ("* * * *", "expected 5 fields"),
+        ("60 * * * *", "Invalid minute field `60`"),
+        ("* * * x *", "Invalid month field `x`"),
+        ("*/0 * * * *", "Invalid minute field"),
+        ("0 0 31 2 *", "never matches"),
+    ):
+        with pytest.raises(ValueError, match=error):
+            Cron(expression)
+    with pytest.raises(ParsingError, match="expected 5 fields"):
+        CronParameter(long_flag="--cron").parse("daily")
+
+
+def test_get_schedule() -> None:
+    """Test selecting the schedule."""
+    assert get_schedule() is None
+    assert t.cast(IntervalSchedule, get_schedule(every=2.0)).interval == 2.0
+    with pytest.raises(CleaException, match="Use either `--every` or `--cron`"):
+        get_schedule(every=2.0, cron=Cron("@hourly"))
+
+
+def test_run_scheduled_drift() -> None:
+    """Test slow runs don't shift the due times."""
+    starts: t.List[float] = []
+
+    def _call() -> int:
+        starts.append(time.monotonic())
+        time.sleep(0.03)
+        return 0
+
+    stats = RunStats()
+    exit_code = run_scheduled(
+        call=_call, schedule=IntervalSchedule(interval=0.05), runs=5, stats=stats
+    )
+    assert exit_code == 0
+    assert stats.runs == 5 and stats.skipped == 0
+    for index, start in enumerate(starts):
+        assert start - starts[0] == pytest.approx(index * 0.05, abs=0.02)
+    assert stats.max_duration >= 0.03
+
+
+@pytest.mark.parametrize(
+    ("overlap", "max_queue", "skipped"),
+    ((Overlap.SKIP, 16, 3), (Overlap.QUEUE, 16, 0), (Overlap.QUEUE, 1, 2)),
+)
+def test_run_scheduled_overlap(overlap: Overlap, max_queue: int, skipped: int) -> None:
+    """Test runs which come due during a slow run."""
+    durations = [0.17, 0.0, 0.0, 0.0, 0.0]
+    exit_codes = []
+
+    def _call() -> int:
+        time.sleep(durations[len(exit_codes)])
+        exit_codes.append(len(exit_codes) % 2)
+        return exit_codes[-1]
+
+    stats = RunStats()
+    run_scheduled(
+        call=_call,
+        schedule=IntervalSchedule(interval=0.05),
+        overlap=overlap,
+        runs=2,
+        max_queue=max_queue,
+        stats=stats,
+    )
+    assert stats.skipped == skipped
+    assert stats.failures == 1
+    assert stats.last_exit_code == 1
+    if skipped == 0:
+        # The oldest queued run starts right away, well after it was due
+        assert stats.max_lag >= 0.1
+    assert stats.to_dict()["runs"] == 2
+
+
+def test_scheduled_command(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test running a command on schedule."""
+    monkeypatch.setattr(clea.wrappers, "run_scheduled", partial(run_scheduled, runs=3))
+    seen = []
+
+    @Command.wrap
+    def poll(
+        context: Context,
+        limit: Annotated[int, Integer(long_flag="--limit")],
+    ) -> None:
+        """Poll"""
+        seen.append((limit, t.cast(RunStats, context.schedule).runs))
+
+    poll.set_context(Context())
+    assert poll.invoke(argv=["--limit=2", "--every=10ms"]) == 0
+    assert seen == [(2, 0), (2, 1), (2, 2)]
+
+    with pytest.raises(CleaException, match="Use either `--watch` or a schedule"):
+        poll.invoke(argv=["--limit=2", "--every=10ms", "--watch"])
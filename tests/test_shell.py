@@ -0,0 +1,116 @@
+"""Test interactive shell."""
+
+import contextlib
+import io
+import typing as t
+from enum import Enum
+from unittest import mock
+
+from typing_extensions import Annotated
+
+from clea.context import Context, get_current_context
+from clea.params import ChoiceByFlag, String, StringList
+from clea.shell import Shell
+from clea.wrappers import Group
+from examples.calculator import calculator
+from examples.manage_students import main
+
+
+def test_onecmd() -> None:
+    """Test running a single line."""
+    shell = Shell(cli=calculator)
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        assert shell.onecmd("add 1 2") == 0
+        assert shell.onecmd("") == 0
+    assert "Answer 3" in stdout.getvalue()
+
+
+def test_onecmd_error() -> None:
+    """Test error reporting."""
+    shell = Shell(cli=calculator, timed=True)
+    with contextlib.redirect_stderr(new_target=io.StringIO()) as stderr:
+        assert shell.onecmd("add 1") == 1
+    assert "Missing argument for positional arguments <N2 type=int>" in (
+        stderr.getvalue()
+    )
+    assert "Finished in" in stderr.getvalue()
+
+
+def test_candidates() -> None:
+    """Test completion candidates."""
+    shell = Shell(cli=main)
+    assert shell.candidates(line="", text="ad") == ["admin"]
+    assert shell.candidates(line="admin ", text="") == ["--help", "add", "remove"]
+    assert "--interests" in shell.candidates(line="admin add ", text="--i")
+    assert "--debug" in shell.candidates(line="", text="--d")
+    assert shell.candidates(line="admin 'add", text="") == []
+
+
+def test_loop() -> None:
+    """Test reading lines until exit."""
+    lines = iter(["add 1 2", "multiply 2 3", "exit"])
+    with mock.patch("builtins.input", side_effect=lambda _: next(lines)), (
+        contextlib.redirect_stdout(new_target=io.StringIO())
+    ) as stdout:
+        assert calculator.shell() == 0
+    assert "Answer 3\nAnswer 6\n" == stdout.getvalue()
+
+
+def test_loop_eof() -> None:
+    """Test loop termination on EOF."""
+    with mock.patch("builtins.input", side_effect=EOFError), (
+        contextlib.redirect_stdout(new_target=io.StringIO())
+    ):
+        assert Shell(cli=calculator).loop() == 0
+
+
+def test_session_context() -> None:
+    """Test context values stay set between the commands of a session."""
+
+    @Group.wrap
+    def cli(context: Context, user: Annotated[str, String()] = "") -> None:
+        """CLI"""
+        if user:
+            context.set("user", user)
+
+    @cli.command
+    def whoami(context: Context) -> None:
+        """Print the user."""
+        assert get_current_context() is context
+        print(context.get("user"))
+
+    lines = iter(["--user=alice whoami", "whoami", "exit"])
+    with mock.patch("builtins.input", side_effect=lambda _: next(lines)), (
+        contextlib.redirect_stdout(new_target=io.StringIO())
+    ) as stdout:
+        assert cli.shell() == 0
+    assert stdout.getvalue() == "alice\nalice\n"
+    assert cli.context.get("user") is None
+
+
+def test_session_flags_reset() -> None:
+    """Test flag values of a command don't leak into its next runs."""
+
+    class Mode(Enum):
+        """Mode"""
+
+        FAST = "fast"
+        SAFE = "safe"
+
+    @Group.wrap
+    def cli() -> None:
+        """CLI"""
+
+    @cli.command
+    def show(
+        include: Annotated[t.List[str], StringList("-i")] = None,
+        mode: Annotated[Mode, ChoiceByFlag(Mode, default=Mode.SAFE)] = None,
+    ) -> None:
+        """Print the flags."""
+        print(include, mode.value)
+
+    shell = Shell(cli=cli)
+    with contextlib.redirect_stdout(new_target=io.StringIO()) as stdout:
+        for line in ("show -i=x --fast", "show -i=y", "show"):
+            assert shell.onecmd(line) == 0
+    assert stdout.getvalue() == "['x'] fast\n['y'] safe\n[] safe\n"
@@ -0,0 +1,116 @@
+"""Test argument validation."""
+
+import time
+import typing as t
+from pathlib import Path
+
+from typing_extensions import Annotated
+
+from clea.params import File, Files, Integer, Variadic
+from clea.validate import validate, validate_many
+from clea.wrappers import Command, Group
+from examples.manage_students import main
+
+
+def _cli() -> Group:
+    """Build a CLI whose callbacks fail if called."""
+
+    @Group.wrap
+    def cli() -> None:
+        """CLI"""
+        raise AssertionError("Group callback called")
+
+    @cli.command
+    def load(
+        source: Annotated[Path, File("-s", exists=True)],
+        limit: Annotated[int, Integer("-l", default=10)],
+    ) -> None:
+        """Load"""
+        raise AssertionError("Command called")
+
+    @cli.command(depends_on=["load"])
+    def report() -> None:
+        """Report"""
+        raise AssertionError("Command called")
+
+    cli.add_graph_command()
+    return cli
+
+
+def test_validate() -> None:
+    """Test valid and invalid argument lists."""
+    cli = _cli()
+    assert validate(cli=cli, argv=["load", "-s=pyproject.toml", "-l=5"]) is None
+    assert validate(cli=cli, argv=["load", "--help"]) is None
+    assert validate(cli=cli, argv=["run", "report", "--jobs=2"]) is None
+
+    error = validate(cli=cli, argv=["load", "-s=pyproject.toml", "-l=five"])
+    assert error is not None
+    assert error.command == ("cli", "load")
+    assert error.kind == "ParsingError"
+    assert "Expected type=int" in error.message
+    assert error.to_dict()["exit_code"] == 1
+
+    error = validate(cli=cli, argv=["run", "deploy"])
+    assert error is not None
+    assert error.message == "Unknown command `deploy`"
+
+    error = validate(cli=cli, argv=["unload"])
+    assert error is not None
+    assert error.command == ("cli",)
+    assert error.kind == "ExtraArgumentProvided"
+
+
+def test_validate_paths() -> None:
+    """Test path checks can be disabled."""
+    cli = _cli()
+    argv = ["load", "-s=missing.csv"]
+    error = validate(cli=cli, argv=argv)
+    assert error is not None
+    assert "does not exist" in error.message
+    assert validate(cli=cli, argv=argv, check_paths=False) is None
+    assert validate(cli=cli, argv=argv) is not None
+
+
+def test_validate_variadic(tmp_path: Path) -> None:
+    """Test every value of a variadic argument is converted."""
+
+    @Command.wrap
+    def total(numbers: Annotated[t.Iterable[int], Variadic(Integer())]) -> None:
+        """Total"""
+        raise AssertionError("Command called")
+
+    @Command.wrap
+    def concat(files: Annotated[t.Iterable[Path], Files(exists=True)]) -> None:
+        """Concat"""
+        raise AssertionError("Command called")
+
+    assert validate(cli=total, argv=["1", "2"]) is None
+    error = validate(cli=total, argv=["1", "x"])
+    assert error is not None
+    assert "Provided value=x" in error.message
+
+    (tmp_path / "a.txt").write_text("")
+    argv = [str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+    error = validate(cli=concat, argv=argv)
+    assert error is not None
+    assert "does not exist" in error.message
+    assert validate(cli=concat, argv=argv, check_paths=False) is None
+
+
+def test_validate_many() -> None:
+    """Test batch validation."""
+    argvs = [
+        ["--debug", "admin", "add", "jo", "20", "9.5", "-b=OP", "-c=pyproject.toml"],
+        ["admin", "remove"],
+        ["admin", "remove", "jo"],
+        ["admin", "add", "jo", "twenty", "9.5", "-b=OP", "-c=pyproject.toml"],
+    ] * 2500
+    start = time.perf_counter()
+    errors = validate_many(cli=main, argvs=argvs)
+    elapsed = time.perf_counter() - start
+    assert [error.index for error in errors[:2]] == [1, 3]
+    assert len(errors) == 5000
+    assert errors[0].kind == "ArgumentsMissing"
+    assert errors[1].command == ("students", "admin", "add")
+    assert elapsed < 5
@@ -0,0 +1,172 @@
+"""Test watch mode."""
+
+import threading
+import time
+import typing as t
+from functools import partial
+from pathlib import Path
+
+import pytest
+from typing_extensions import Annotated
+
+import clea.wrappers
+from clea.exceptions import CleaException
+from clea.params import File
+from clea.watch import (
+    InotifyBackend,
+    PollingBackend,
+    Watcher,
+    get_targets,
+    watch,
+)
+from clea.wrappers import Command
+from tests.conftest import loaded_modules
+
+
+def _touch(path: Path, content: str) -> None:
+    """Write the file with a new modification time."""
+    path.write_text(content)
+    stat = path.stat()
+    path.touch()
+    if path.stat().st_mtime_ns == stat.st_mtime_ns:  # pragma: nocover
+        time.sleep(0.01)
+        path.write_text(content)
+
+
+def test_get_targets(tmp_path: Path) -> None:
+    """Test resolving watch targets."""
+    source = tmp_path / "source.csv"
+    source.write_text("")
+    file_target, dir_target, glob_target = get_targets(
+        paths=[source, tmp_path], globs=[str(tmp_path / "conf" / "*.yaml")]
+    )
+    assert (file_target.root, file_target.recursive) == (tmp_path, False)
+    assert file_target.match(source)
+    assert not file_target.match(tmp_path / "other.csv")
+    assert dir_target.recursive and dir_target.match(tmp_path / "x" / "y")
+    assert glob_target.root == tmp_path / "conf"
+    assert glob_target.match(tmp_path / "conf" / "app.yaml")
+    assert not glob_target.match(tmp_path / "conf" / "app.json")
+
+
+def test_polling_backend(tmp_path: Path) -> None:
+    """Test change detection by polling."""
+    (tmp_path / "data").mkdir()
+    files = [tmp_path / "data" / f"{i}.csv" for i in range(3)]
+    for file in files:
+        file.write_text("")
+    backend = PollingBackend(
+        targets=get_targets(paths=[tmp_path / "data"], globs=[]),
+        interval=0,
+        batch_size=1,
+    )
+    time.sleep(0.01)
+    _touch(files[2], "changed")
+    changes = set()
+    for _ in range(4):
+        changes |= backend.poll(timeout=0)
+    assert changes == {files[2]}
+
+    (tmp_path / "data" / "nested").mkdir()
+    (tmp_path / "data" / "nested" / "new.csv").write_text("")
+    files[0].unlink()
+    changes = set()
+    for _ in range(8):
+        changes |= backend.poll(timeout=0)
+    assert changes == {files[0], tmp_path / "data" / "nested" / "new.csv"}
+
+
+def test_inotify_backend(tmp_path: Path) -> None:
+    """Test change detection using inotify."""
+    source = tmp_path / "source.csv"
+    other = tmp_path / "other.csv"
+    source.write_text("")
+    try:
+        backend = InotifyBackend(targets=get_targets(paths=[source], globs=[]))
+    except OSError:  # pragma: nocover
+        pytest.skip("inotify is not available")
+    try:
+        other.write_text("ignored")
+        assert backend.poll(timeout=0.05) == set()
+        source.write_text("changed")
+        assert backend.poll(timeout=1) == {source}
+    finally:
+        backend.close()
+
+
+def test_watcher_debounce(tmp_path: Path) -> None:
+    """Test bursts of changes are reported once."""
+    files = [tmp_path / f"{i}.csv" for i in range(3)]
+    for file in files:
+        file.write_text("")
+    backend = PollingBackend(
+        targets=get_targets(paths=[tmp_path], globs=[]), interval=0.01
+    )
+    watcher = Watcher(backend=backend, debounce=0.05, interval=0.01)
+    time.sleep(0.01)
+
+    def _burst() -> None:
+        for file in files:
+            _touch(file, "changed")
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=_burst)
+    thread.start()
+    changes = watcher.wait()
+    thread.join()
+    changes |= backend.poll(timeout=0)
+    assert changes == set(files)
+    watcher.close()
+
+
+@pytest.mark.parametrize("polling", (False, True))
+def test_watch(tmp_path: Path, polling: bool) -> None:
+    """Test re-running on changes."""
+    source = tmp_path / "source.csv"
+    source.write_text("first")
+    seen: t.List[str] = []
+
+    def _call() -> int:
+        seen.append(source.read_text())
+        if len(seen) == 1:
+            threading.Timer(0.1, source.write_text, args=("second",)).start()
+        return 0 if len(seen) > 1 else 1
+
+    assert (
+        watch(call=_call, paths=[source], runs=2, debounce=0.05, polling=polling) == 0
+    )
+    assert seen == ["first", "second"]
+
+
+def test_watch_command(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the command is re-run with the parsed arguments."""
+    source = tmp_path / "source.csv"
+    source.write_text("first")
+    seen: t.List[str] = []
+    monkeypatch.setattr(
+        clea.wrappers, "run_watched", partial(watch, runs=2, debounce=0.05)
+    )
+
+    @Command.wrap(watch=[str(tmp_path / "*.yaml")])
+    def convert(source: Annotated[Path, File(long_flag="--source")]) -> None:
+        """Convert"""
+        seen.append(source.read_text())
+        if len(seen) == 1:
+            threading.Timer(0.1, (tmp_path / "app.yaml").write_text, args=("",)).start()
+
+    assert convert.invoke(argv=[f"--source={source}", "--watch"]) == 0
+    assert seen == ["first", "first"]
+
+    @Command.wrap
+    def noop() -> None:
+        """Noop"""
+
+    with pytest.raises(CleaException, match="Nothing to watch"):
+        noop.invoke(argv=["--watch"])
+
+
+def test_ctypes_loaded_lazily() -> None:
+    """Test `ctypes` is only imported to load inotify."""
+    modules = loaded_modules()
+    assert "ctypes" not in modules
+    assert "tempfile" not in modules
@@ -1,13 +1,30 @@
 """Test wrappers."""
 
+import asyncio
+import contextlib
+import io
+import typing as t
+from enum import Enum
+from pathlib import Path
+
 from typing_extensions import Annotated
 
 from clea import params as p
+from clea.context import Context
+from clea.exceptions import (
+    ArgumentsMissing,
+    ExtraArgumentProvided,
+    ParsingError,
+    TimeoutExpired,
+)
 from clea.wrappers import Command, Group
 from clea.runner import run
 import pytest
 
 
+pytestmark = pytest.mark.usefixtures("parsers")
+
+
 class TestCommandWrapper:
     """Test command wrapper."""
 
@@ -20,6 +37,20 @@ class TestCommandWrapper:
 
         assert isinstance(_command, Command)
 
+    def test_deferred_parser(self) -> None:
+        """Test the parser is built on first use."""
+
+        @Command.wrap
+        def _command(p1: Annotated[str, p.String()]) -> None:
+            """Example command"""
+
+        assert _command._built_parser is None
+        _command.invoke(["value"])
+        parser = _command._built_parser
+        assert parser is not None
+        _command.invoke(["value"])
+        assert _command._built_parser is parser
+
     def test_wrap_with_arguments(self) -> None:
         """Test wrapper with arguments."""
 
@@ -65,6 +96,46 @@ class TestCommandWrapper:
             _command.invoke([])
         assert _command.invoke([], isolated=True) == 1
 
+    def test_output_format(self) -> None:
+        """Test rendering the return value."""
+
+        @Command.wrap
+        def _command() -> t.Iterator[t.Dict[str, int]]:
+            """Example command"""
+            for i in range(2):
+                yield {"n": i}
+
+        result = run(cli=_command, argv=["--output=ndjson"], isolated=True)
+        assert result.stdout == '{"n": 0}\n{"n": 1}\n'
+
+        result = run(cli=_command, argv=["--output=json"], isolated=True)
+        assert result.stdout == '[{"n": 0},{"n": 1}]\n'
+
+        result = run(cli=_command, argv=[], isolated=True)
+        assert result.stdout == ""
+
+    def test_output_format_conflict(self) -> None:
+        """Test command parameters take precedence over global options."""
+
+        @Command.wrap
+        def _command(output: Annotated[str, p.String(long_flag="--output")]) -> None:
+            """Example command"""
+            print(output)
+
+        result = run(cli=_command, argv=["--output=json"], isolated=True)
+        assert result.stdout == "json\n"
+
+    def test_broken_pipe(self) -> None:
+        """Test a closed stdout terminates the command."""
+
+        @Command.wrap
+        def _command() -> None:
+            """Example command"""
+            raise BrokenPipeError()
+
+        with contextlib.redirect_stdout(new_target=io.StringIO()):
+            assert _command.invoke([]) == 141
+
 
 class TestGroupWrapper:
     """Test Group wrapper."""
@@ -111,3 +182,171 @@ class TestGroupWrapper:
 
         result = run(cli=_group, argv=[], isolated=True)
         assert "Running..." in result.stdout
+
+    def test_global_option_propagation(self) -> None:
+        """Test global options are passed down to the child commands."""
+
+        @Group.wrap
+        def _group() -> None:
+            """Example group"""
+
+        @_group.command
+        def _command() -> t.List[int]:
+            """Example command"""
+            return [1, 2]
+
+        result = run(cli=_group, argv=["--output=json", "_command"], isolated=True)
+        assert result.stdout == "[1, 2]\n"
+
+
+class TestInvokeWith:
+    """Test programmatic invocation."""
+
+    def test_invoke_with(self) -> None:
+        """Test calling a command with python values."""
+
+        class Color(Enum):
+            """Color"""
+
+            RED = "red"
+            BLUE = "blue"
+
+        @Command.wrap
+        def _command(
+            name: Annotated[str, p.String()],
+            age: Annotated[int, p.Integer()] = 30,
+            ratio: Annotated[float, p.Float(long_flag="--ratio")] = None,
+            color: Annotated[Color, p.Choice(Color, default=Color.RED)] = None,
+            tags: Annotated[t.List[str], p.StringList("-t")] = None,
+        ) -> t.Tuple:
+            """Example command"""
+            return name, age, ratio, color, tags
+
+        assert _command.invoke_with(name="a") == ("a", 30, None, Color.RED, [])
+        assert _command.invoke_with(
+            name="a", age=1, ratio=2, color="blue", tags=("x",)
+        ) == ("a", 1, 2.0, Color.BLUE, ["x"])
+        # Arguments parsed from argv are unaffected
+        result = run(cli=_command, argv=["b", "--age=2"], isolated=True)
+        assert result.exit_code == 0
+
+        with pytest.raises(ArgumentsMissing, match="Missing value for arguments name"):
+            _command.invoke_with(age=1)
+        with pytest.raises(ExtraArgumentProvided, match="Unknown arguments height"):
+            _command.invoke_with(name="a", height=1)
+        with pytest.raises(ParsingError, match="Provided value='1'; Expected type=int"):
+            _command.invoke_with(name="a", age="1")
+        with pytest.raises(ParsingError, match="Expected type=int"):
+            _command.invoke_with(name="a", age=True)
+        with pytest.raises(ParsingError, match="Expected type=list of str"):
+            _command.invoke_with(name="a", tags=[1])
+        with pytest.raises(ParsingError, match="Expected value from"):
+            _command.invoke_with(name="a", color="green")
+
+    def test_invoke_with_paths(self, tmp_path: Path) -> None:
+        """Test path values go through the path checks."""
+
+        @Command.wrap
+        def _command(source: Annotated[Path, p.File(exists=True)]) -> Path:
+            """Example command"""
+            return source
+
+        (tmp_path / "a.csv").write_text("")
+        assert (
+            _command.invoke_with(source=str(tmp_path / "a.csv")) == tmp_path / "a.csv"
+        )
+        with pytest.raises(ParsingError, match="does not exist"):
+            _command.invoke_with(source=tmp_path / "b.csv")
+
+    def test_invoke_with_flush(self) -> None:
+        """Test the buffered output is written once the call returns."""
+
+        @Command.wrap
+        def _command(n: Annotated[int, p.Integer()], context: Context) -> None:
+            """Example command"""
+            context.out.write(f"out {n}\n")
+            context.err.write(f"err {n}\n")
+            if n < 0:
+                raise ValueError("negative")
+
+        _command.set_context(Context())
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                _command.invoke_with(n=1)
+                assert (stdout.getvalue(), stderr.getvalue()) == ("out 1\n", "err 1\n")
+                with pytest.raises(ValueError, match="negative"):
+                    _command.invoke_with(n=-1)
+        assert stdout.getvalue() == "out 1\nout -1\n"
+        assert stderr.getvalue() == "err 1\nerr -1\n"
+
+    def test_context_invoke(self) -> None:
+        """Test calling a command from another one through the context."""
+        calls = []
+
+        @Group.wrap
+        def _group(context: Context) -> None:
+            """Example group"""
+            calls.append("group")
+            context.set("user", "admin")
+
+        @_group.command
+        def _add(n1: Annotated[int, p.Integer()], context: Context) -> int:
+            """Example command"""
+            calls.append(context.get("user"))
+            return n1 + 1
+
+        @_group.command(timeout=10)
+        def _total(context: Context) -> t.Optional[int]:
+            """Example command"""
+            assert context.remaining() is not None
+            return context.invoke(_add, n1=1) + context.invoke(_add, n1=2)
+
+        _group.set_context(Context())
+        assert _total.invoke_with(callbacks=True) == 5
+        assert calls == ["group", "admin", "admin"]
+        assert t.cast(Context, _total.context).deadline is None
+
+    def test_invoke_with_async(self) -> None:
+        """Test calling an async command."""
+
+        @Command.wrap(timeout=0.05)
+        async def _command(delay: Annotated[float, p.Float()]) -> str:
+            """Example command"""
+            await asyncio.sleep(delay)
+            return "done"
+
+        assert _command.invoke_with(delay=0) == "done"
+        with pytest.raises(TimeoutExpired):
+            _command.invoke_with(delay=1)
+
+
+def test_variadic_command(tmp_path: Path) -> None:
+    """Test a command taking any number of files."""
+    files = [tmp_path / f"{i}.csv" for i in range(3)]
+    for file in files:
+        file.write_text("")
+
+    @Command.wrap
+    def _command(
+        files: Annotated[t.Iterable[Path], p.Files(nargs="+", exists=True)],
+        verbose: Annotated[bool, p.Boolean(long_flag="--verbose")] = False,
+    ) -> t.List[str]:
+        """Example command"""
+        return [file.name for file in files] + (["verbose"] if verbose else [])
+
+    result = run(cli=_command, argv=["--help"], isolated=True)
+    assert "Usage: _command [OPTIONS] FILES..." in result.stdout
+
+    argv = ["--output=json", *map(str, files), "--verbose"]
+    result = run(cli=_command, argv=argv, isolated=True)
+    assert result.stdout == '["0.csv", "1.csv", "2.csv", "verbose"]\n'
+
+    result = run(cli=_command, argv=[str(tmp_path / "missing.csv")], isolated=True)
+    assert result.exit_code == 1
+    assert "does not exist" in result.stderr
+
+    result = run(cli=_command, argv=["--verbose"], isolated=True)
+    assert "Missing argument for positional arguments <FILES... type=Path>" in (
+        result.stderr
+    )
+    assert _command.invoke_with(files=files[:1]) == ["0.csv"]